@@ -16,4 +16,11 @@ then
     python manage.py createsuperuser --noinput >/dev/null 2>&1
 fi
 
+if [ "$PROMETHEUS_MULTIPROC_DIR" ]
+then
+    echo "Clear the metrics of previous processes."
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
 exec "$@"
@@ -0,0 +1,26 @@
+# Gunicorn configuration of the container, the bind address, number of workers
+#  and worker class are set by the supervisord configuration.
+import gc
+
+# Load the application in the master process before the workers are forked, so
+#  the workers share the memory of the imported code instead of each importing
+#  it again on startup.
+preload_app = True
+
+
+def when_ready(server):
+    # Django imports the URLconf on the first request and some libraries are
+    #  only imported on first use, so import them in the master process as well.
+    from django.db import connections
+    from django.urls import get_resolver
+    import zxcvbn  # noqa: F401
+
+    get_resolver().url_patterns
+
+    # Connections must not be shared with the forked workers.
+    connections.close_all()
+
+    # Move the loaded objects to a permanent generation, so the garbage
+    #  collector of the workers doesn't touch them and the shared memory pages
+    #  aren't copied.
+    gc.freeze()
@@ -16,7 +16,7 @@ import {IntlShape, useIntl} from "react-intl";
 import {DateRange, Location} from "../../common/types";
 import Spinner from "../../common/components/Spinner";
 import {useIsMobile} from "../../common/utils";
-import {useGetStationsQuery, useLazyGetPriceStationFrequencyQuery} from "./locationApiSlice";
+import {useLazyGetPriceStationFrequencyQuery} from "./locationApiSlice";
 import DateRangeButton from "../../common/components/DateRangeButton";
 import NoGraphDataField from "../../common/components/NoGraphDataField";
 
@@ -152,13 +152,6 @@ interface Props {
 }
 
 export default function PriceStationFrequencyChart({location, setErrorMessage}: Props) {
-  const {
-    data: stations,
-    error: stationsError,
-    isError: isStationsError,
-    isFetching: isStationsFetching,
-    isSuccess: isStationsSuccess
- } = useGetStationsQuery();
   const [
     getPriceStationFrequency,
     {
@@ -187,38 +180,26 @@ export default function PriceStationFrequencyChart({location, setErrorMessage}:
             "bitte probier es nochmal."
         }));
       });
-  }, [location, selectedDateRange, isStationsSuccess]);
-
-  useEffect(() => {
-    if (isStationsError) {
-      console.error(`Failed to get stations: ${
-        JSON.stringify(stationsError, null, 2)}`);
-   }
- }, [isStationsError]);
+  }, [location, selectedDateRange]);
 
   useEffect(() => {
     if (
-      !isStationsFetching && isStationsSuccess && stations &&
       !isStationFrequencyFetching && isStationFrequencySuccess && stationFrequencyData
     ) {
-      const labels = stationFrequencyData.stationIds.map((id) => {
-        let stationName = stations[id].name;
-        if (typeof stationName === "undefined") {
-          console.error(`Station id ${id} not found in stations ${JSON.stringify(stations, null, 2)}`);
-          stationName = String(id);
-        }
-
-        return stationName;
-      });
-
+      // The station names are provided together with the frequencies, so we
+      //  don't have to request the stations separately.
       setChartData(
-        new ChartData({intl, labels, data: stationFrequencyData.data})
+        new ChartData({
+          intl,
+          labels: stationFrequencyData.stationNames,
+          data: stationFrequencyData.data
+        })
       );
     }
-  }, [isStationsFetching, isStationFrequencyFetching]);
+  }, [isStationFrequencyFetching]);
 
   useEffect(() => {
-    if (isStationsFetching || isStationFrequencyFetching || !chartData) {
+    if (isStationFrequencyFetching || !chartData) {
       return;
     }
 
@@ -234,7 +215,7 @@ export default function PriceStationFrequencyChart({location, setErrorMessage}:
   }, [chartData, isMobile, intl]);
 
   let mainComponent;
-  if (!isStationsFetching && !isStationFrequencyFetching && chartData) {
+  if (!isStationFrequencyFetching && chartData) {
     if (chartData.datasets[0].data.length === 0) {
       mainComponent = <NoGraphDataField />;
     } else {
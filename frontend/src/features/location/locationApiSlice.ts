@@ -78,7 +78,7 @@ interface PriceHistoryData extends PriceData {
 }
 
 interface StationFrequencyData {
-  stationIds: number[];
+  stationNames: string[];
   data: number[];
 }
 
@@ -327,11 +327,11 @@ const extendedApi = spritstatApi.injectEndpoints({
           }
         };
       },
-      transformResponse: (data: {station_id: number, frequency: number}[]) => {
-        const chartData: StationFrequencyData = {stationIds: [], data: []};
+      transformResponse: (data: {station_id: number, name: string, frequency: number}[]) => {
+        const chartData: StationFrequencyData = {stationNames: [], data: []};
 
         data.forEach((item) => {
-          chartData.stationIds.push(item.station_id);
+          chartData.stationNames.push(item.name);
           chartData.data.push(item.frequency);
         });
         return chartData;
@@ -1,5 +1,9 @@
 from django import forms
 from django.contrib import admin
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
 
 from . import models
 from users.models import CustomUser
@@ -77,6 +81,12 @@ class PriceAdmin(admin.ModelAdmin):
     readonly_fields = ("datetime",)
 
 
+@admin.register(models.PriceAlert)
+class PriceAlertAdmin(admin.ModelAdmin):
+    list_display = ("location", "target_amount", "active", "triggered")
+    readonly_fields = ("last_sent_at",)
+
+
 @admin.register(models.IntroSettings)
 class IntroSettingsAdmin(admin.ModelAdmin):
     fields = (
@@ -94,3 +104,54 @@ class SettingsAdmin(admin.ModelAdmin):
         "intro",
         "notifications_active",
     )
+
+
+@admin.register(models.Profile)
+class ProfileAdmin(admin.ModelAdmin):
+    # The profiles are created by spritstat.profiling and can be downloaded in
+    #  the collapsed stack format for flamegraph.pl or speedscope.
+    list_display = ("created_at", "kind", "name", "user", "duration", "samples")
+    list_filter = ("kind",)
+    search_fields = ("name",)
+    fields = ("created_at", "kind", "name", "user", "duration", "samples", "download")
+    readonly_fields = fields
+
+    def get_queryset(self, request):
+        # The profile data is only loaded for the download.
+        return super().get_queryset(request).defer("data")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "<int:profile_id>/download/",
+                self.admin_site.admin_view(self.download_view),
+                name="spritstat_profile_download",
+            ),
+            *super().get_urls(),
+        ]
+
+    @admin.display(description="Profile")
+    def download(self, obj):
+        return format_html(
+            '<a href="{}">Download ({} kB)</a>',
+            reverse("admin:spritstat_profile_download", args=[obj.id]),
+            round(obj.size / 1024),
+        )
+
+    def download_view(self, request, profile_id):
+        if not self.has_view_permission(request):
+            return HttpResponse(status=403)
+
+        profile = get_object_or_404(models.Profile, id=profile_id)
+        response = HttpResponse(profile.data, content_type="text/plain")
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="profile-{profile.id}.folded"'
+
+        return response
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class SpritstatConfig(AppConfig):
+    name = "spritstat"
+
+    def ready(self):
+        # Connect the receivers of the task signals, as the scheduler doesn't
+        #  import the modules otherwise.
+        from . import metrics, slow_queries, tracing  # noqa: F401
+
+        tracing.configure()
+        slow_queries.configure()
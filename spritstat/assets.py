@@ -0,0 +1,158 @@
+from dataclasses import dataclass
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+import gzip
+import hashlib
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# In-memory serving of the most requested files (index, manifest and service
+#  worker). Each asset is loaded once per process and the compressed variants
+#  and ETags are calculated upfront. In debug mode the asset is reloaded if
+#  any of its source files changed.
+
+
+class AssetNotFoundError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class _Variant:
+    content: bytes
+    etag: str
+
+
+@dataclass(frozen=True)
+class _Variants:
+    # Maps the content encoding to the corresponding variant. The empty string
+    #  is the uncompressed variant.
+    variants: Dict[str, _Variant]
+    source_mtimes: Tuple[Optional[float], ...]
+
+
+def _get_mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _parse_accept_encoding(header: str) -> List[str]:
+    # Return the accepted encodings, ignoring those that have been explicitly
+    #  rejected with q=0.
+    encodings = []
+    for item in header.split(","):
+        encoding, *params = [part.strip() for part in item.split(";")]
+        rejected = False
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    rejected = float(value) == 0
+                except ValueError:
+                    rejected = True
+        if encoding and not rejected:
+            encodings.append(encoding.lower())
+
+    return encodings
+
+
+class CachedAsset:
+    ENCODINGS = ("br", "gzip")
+
+    def __init__(
+        self,
+        content_type: str,
+        load: Callable[[], bytes],
+        sources: Callable[[], List[str]],
+    ) -> None:
+        """
+        Asset that is served from memory.
+
+        :param content_type: content type of the response
+        :param load: function that returns the content of the asset and raises
+            AssetNotFoundError if it isn't available
+        :param sources: function that returns the paths of the files the asset
+            is created from, which are checked for changes in debug mode
+        """
+
+        self._content_type = content_type
+        self._load = load
+        self._sources = sources
+        self._variants: Optional[_Variants] = None
+        self._lock = threading.Lock()
+
+    def _source_mtimes(self) -> Tuple[Optional[float], ...]:
+        return tuple(_get_mtime(path) for path in self._sources())
+
+    def _create_variants(self) -> _Variants:
+        # Get the modification times before loading, so a change during
+        #  loading triggers another reload.
+        source_mtimes = self._source_mtimes() if settings.DEBUG else ()
+        content = self._load()
+        digest = hashlib.sha256(content).hexdigest()[:32]
+
+        variants = {"": _Variant(content, f'"{digest}"')}
+        variants["gzip"] = _Variant(
+            gzip.compress(content, compresslevel=9, mtime=0), f'"{digest}-gzip"'
+        )
+        if brotli:
+            variants["br"] = _Variant(brotli.compress(content), f'"{digest}-br"')
+
+        return _Variants(variants, source_mtimes)
+
+    def _get_variants(self) -> _Variants:
+        variants = self._variants
+        if variants is not None and (
+            not settings.DEBUG or variants.source_mtimes == self._source_mtimes()
+        ):
+            return variants
+
+        with self._lock:
+            # Another thread might have loaded the asset in the meantime
+            if self._variants is variants:
+                self._variants = self._create_variants()
+
+            return self._variants
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._variants = None
+
+    def response(self, request) -> HttpResponse:
+        variants = self._get_variants().variants
+
+        # All variants have the same content, so any of the ETags matches.
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        etag = next(
+            (v.etag for v in variants.values() if v.etag in if_none_match), None
+        )
+        if etag or "*" in if_none_match:
+            response = HttpResponseNotModified()
+            response["ETag"] = etag or variants[""].etag
+        else:
+            accepted = _parse_accept_encoding(
+                request.headers.get("Accept-Encoding", "")
+            )
+            encoding = next(
+                (e for e in self.ENCODINGS if e in accepted and e in variants), ""
+            )
+            variant = variants[encoding]
+
+            response = HttpResponse(variant.content, content_type=self._content_type)
+            response["ETag"] = variant.etag
+            if encoding:
+                response["Content-Encoding"] = encoding
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        return response
@@ -0,0 +1,186 @@
+from abc import ABC, abstractmethod
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import Serializer
+from typing import Any, Optional, Union
+
+from . import models
+from . import serializers
+from . import views
+from .permissions import IsOwner
+from .tracing import traced
+from users.models import CustomUser
+
+
+# Async variants of the read-only price and location views, which are used if
+#  the application is served via ASGI (see settings.ASYNC_VIEWS). The queries
+#  are executed using the async ORM interface, so slow analytics queries don't
+#  block a worker. Requests and responses are the same as for the DRF views.
+
+
+@sync_to_async
+def _get_authenticated_user(request) -> Optional[CustomUser]:
+    # The user is loaded lazily from the session, which requires a database
+    #  query, so this can't be done from the event loop.
+    if not request.user.is_authenticated:
+        return None
+
+    return request.user
+
+
+class AsyncAPIView(View):
+    user: CustomUser
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Like DRF views we rely on the CSRF check of the session
+        #  authentication, which is handled by the sync view for unsafe methods.
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            user = await _get_authenticated_user(request)
+            if user is None:
+                # Session authentication doesn't provide an authenticate
+                #  header, so DRF responds with 403 instead of 401.
+                e = exceptions.NotAuthenticated()
+                e.status_code = status.HTTP_403_FORBIDDEN
+                raise e
+            self.user = user
+
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as e:
+            # Provide the same error response as the DRF exception handler.
+            if isinstance(e.detail, (list, dict)):
+                data = e.detail
+            else:
+                data = {"detail": e.detail}
+
+            return self._render(data, e.status_code)
+
+    async def http_method_not_allowed(self, request, *args, **kwargs):
+        raise exceptions.MethodNotAllowed(request.method)
+
+    @staticmethod
+    def _render(data: Any, status_code: int = status.HTTP_200_OK) -> HttpResponse:
+        return HttpResponse(
+            JSONRenderer().render(data),
+            content_type="application/json",
+            status=status_code,
+        )
+
+
+class AsyncUserLocationMixin(AsyncAPIView):
+    @traced()
+    async def _get_user_location(self) -> models.Location:
+        location_id = self.kwargs["location_id"]
+        location = await models.Location.objects.filter(id=location_id).afirst()
+
+        if location is None:
+            raise exceptions.NotFound()
+
+        if location.user_id != self.user.id:
+            raise exceptions.PermissionDenied(getattr(IsOwner, "message", None))
+
+        return location
+
+
+class AsyncAbstractPriceList(ABC, AsyncUserLocationMixin):
+    serializer_class: Serializer
+
+    async def get(self, request, *args, **kwargs):
+        location = await self._get_user_location()
+        date_range = request.GET.get("date_range")
+
+        queryset = self._process_data(
+            models.Price.objects.filter(location=location).date_range(date_range)
+        )
+        data = [item async for item in queryset]
+
+        return self._render(self.serializer_class(data, many=True).data)
+
+    @abstractmethod
+    def _process_data(
+        self, data: Union[models.PriceQuerySet, QuerySet]
+    ) -> Union[models.PriceQuerySet, QuerySet]:
+        pass
+
+
+class PriceHistory(AsyncAbstractPriceList):
+    serializer_class = serializers.PriceHistorySerializer
+
+    def _process_data(self, data: QuerySet[models.Price]) -> QuerySet[models.Price]:
+        # The stations have to be prefetched, as the serializer can't execute
+        #  queries from the event loop.
+        return data.prefetch_related("stations")
+
+
+class PriceHour(AsyncAbstractPriceList):
+    serializer_class = serializers.PriceHourSerializer
+
+    def _process_data(
+        self, data: Union[models.PriceQuerySet, QuerySet]
+    ) -> Union[models.PriceQuerySet, QuerySet]:
+        return data.average_hour()
+
+
+class PriceDayOfWeek(AsyncAbstractPriceList):
+    serializer_class = serializers.PriceDayOfWeekSerializer
+
+    def _process_data(
+        self, data: Union[models.PriceQuerySet, QuerySet]
+    ) -> Union[models.PriceQuerySet, QuerySet]:
+        return data.average_day_of_week()
+
+
+class PriceDayOfMonth(AsyncAbstractPriceList):
+    serializer_class = serializers.PriceDayOfMonthSerializer
+
+    def _process_data(
+        self, data: Union[models.PriceQuerySet, QuerySet]
+    ) -> Union[models.PriceQuerySet, QuerySet]:
+        return data.average_day_of_month()
+
+
+class PriceStationFrequency(AsyncAbstractPriceList):
+    serializer_class = serializers.PriceStationFrequencySerializer
+
+    def _process_data(
+        self, data: Union[models.PriceQuerySet, QuerySet]
+    ) -> Union[models.PriceQuerySet, QuerySet]:
+        return data.station_frequency(views.parse_top_n(self.request.GET.get("top_n")))
+
+
+class LocationList(AsyncAPIView):
+    async def get(self, request, *args, **kwargs):
+        include = views.parse_include(request.GET.get("include"))
+
+        queryset = models.Location.objects.filter(user=self.user.id)
+        if include:
+            queryset = queryset.with_latest_price()
+            serializer_class = serializers.LocationPriceSerializer
+        else:
+            serializer_class = serializers.LocationSerializer
+        if "trend" in include:
+            queryset = queryset.with_price_trend()
+
+        data = [item async for item in queryset]
+        serializer = serializer_class(
+            data, many=True, context={"request": request, "include": include}
+        )
+
+        return self._render(serializer.data)
+
+    async def post(self, request, *args, **kwargs):
+        # Creating a location also schedules the price requests, so we just
+        #  use the sync view for this.
+        return await sync_to_async(views.LocationList.as_view())(
+            request, *args, **kwargs
+        )
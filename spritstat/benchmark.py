@@ -0,0 +1,211 @@
+from dataclasses import dataclass
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+import json
+from statistics import mean, quantiles
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+from unittest.mock import patch
+import urllib3
+
+from spritstat.models import Location
+from spritstat.services import request_location_prices
+
+
+# Benchmarks of the API endpoints and the price ingestion, executed by the
+#  benchmark command against a generated dataset (see the generatedata
+#  command). They are kept separate from the unit tests, as their results are
+#  only meaningful for a production-scale dataset.
+# The latency is measured over several iterations, the number of queries and
+#  the allocations are measured in separate iterations, as capturing them slows
+#  down the execution.
+
+API_BENCHMARKS = {
+    "LocationList": "locations",
+    "PriceHistory": "prices_history",
+    "PriceHour": "prices_hour",
+    "PriceDayOfWeek": "prices_day_of_week",
+    "PriceDayOfMonth": "prices_day_of_month",
+    "PriceStationFrequency": "prices_station_frequency",
+}
+INGESTION_BENCHMARK = "request_location_prices"
+BENCHMARKS = (*API_BENCHMARKS, INGESTION_BENCHMARK)
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    iterations: int
+    latency_ms: Dict[str, float]
+    queries: int
+    peak_allocation_kb: float
+
+
+def _latency_distribution(latencies: List[float]) -> Dict[str, float]:
+    percentiles = (
+        quantiles(latencies, n=100, method="inclusive")
+        if len(latencies) > 1
+        else latencies * 99
+    )
+
+    return {
+        "min": min(latencies),
+        "mean": mean(latencies),
+        "p50": percentiles[49],
+        "p95": percentiles[94],
+        "p99": percentiles[98],
+        "max": max(latencies),
+    }
+
+
+def measure(
+    function: Callable[[], None], iterations: int, warmup: int = 1
+) -> BenchmarkResult:
+    """
+    Measure the latency, number of queries and the peak allocation of the
+    function.
+
+    :param function: function to benchmark
+    :param iterations: number of iterations the latency is measured for
+    :param warmup: number of iterations executed before the measurement, so
+        caches are populated
+    :return: benchmark result
+    """
+
+    for _ in range(warmup):
+        function()
+
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        function()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    # The query log is reset at the start of each request, so the queries are
+    #  counted by an execute wrapper instead.
+    queries = 0
+
+    def _count_query(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(_count_query):
+        function()
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(
+        iterations=iterations,
+        latency_ms=_latency_distribution(latencies),
+        queries=queries,
+        peak_allocation_kb=peak / 1024,
+    )
+
+
+def api_benchmark(
+    client: Client, name: str, location: Location, date_range: Optional[str]
+) -> Callable[[], None]:
+    # The client has to be logged in as the user of the location.
+    if name == "LocationList":
+        url = reverse(API_BENCHMARKS[name])
+    else:
+        url = reverse(API_BENCHMARKS[name], kwargs={"location_id": location.id})
+    data = {"date_range": date_range} if date_range else {}
+
+    def _request() -> None:
+        response = client.get(url, data)
+        if response.status_code != 200:
+            raise BenchmarkError(f"{url} returned status {response.status_code}")
+
+    return _request
+
+
+def ingestion_benchmark(location: Location) -> Callable[[], None]:
+    # The E-Control API is replaced by a response containing the stations of
+    #  the user, so only the processing of the prices is measured. The created
+    #  price is rolled back, so the dataset isn't changed.
+    stations = list(location.user.stations.order_by("id")[:10])
+    if not stations:
+        raise BenchmarkError(f"The user of location {location.id} has no stations")
+
+    response = SimpleNamespace(
+        status=200,
+        data=json.dumps(
+            [
+                {
+                    "id": station.id,
+                    "name": station.name,
+                    "location": {
+                        "address": station.address,
+                        "postalCode": station.postal_code,
+                        "city": station.city,
+                        "latitude": float(station.latitude),
+                        "longitude": float(station.longitude),
+                    },
+                    "prices": [
+                        {"fuelType": location.fuel_type, "amount": 1.5 + index / 100}
+                    ],
+                }
+                for index, station in enumerate(stations)
+            ]
+        ).encode("utf-8"),
+    )
+
+    def _request_location_prices() -> None:
+        with patch.object(urllib3.PoolManager, "request", return_value=response):
+            with transaction.atomic():
+                request_location_prices(location.id)
+                transaction.set_rollback(True)
+
+    return _request_location_prices
+
+
+def compare(
+    baseline: Dict[str, Dict], results: Dict[str, Dict], threshold: float
+) -> List[str]:
+    """
+    Compare the results of a run to the results of a baseline run.
+
+    :param baseline: benchmark results of the baseline run by name
+    :param results: benchmark results of the current run by name
+    :param threshold: relative increase of the median latency and the peak
+        allocation that is tolerated. The number of queries may never increase.
+    :return: descriptions of the regressions
+    """
+
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        base = baseline[name]
+        latency = result["latency_ms"]["p50"]
+        base_latency = base["latency_ms"]["p50"]
+        if latency > base_latency * (1 + threshold):
+            regressions.append(
+                f"{name}: median latency {latency:.1f}ms > {base_latency:.1f}ms"
+            )
+        if result["queries"] > base["queries"]:
+            regressions.append(
+                f"{name}: {result['queries']} queries > {base['queries']}"
+            )
+        allocation = result["peak_allocation_kb"]
+        base_allocation = base["peak_allocation_kb"]
+        if allocation > base_allocation * (1 + threshold):
+            regressions.append(
+                f"{name}: peak allocation {allocation:.0f}kB > {base_allocation:.0f}kB"
+            )
+
+    return regressions
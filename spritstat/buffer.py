@@ -0,0 +1,90 @@
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from typing import Any, Callable, List
+
+
+# Buffer that collects values in the cache, so they can be written to the
+#  database in bulk by a periodic task instead of on the request path.
+# Each value is stored in a numbered slot. The slot counter is incremented
+#  atomically, so values appended by different processes don't overwrite each
+#  other.
+# A slot is only set after the counter was incremented, so a flush can find a
+#  slot below the counter that isn't set yet. The flush stops at this slot and
+#  the next flush continues with it. If it is still missing then, the value
+#  has expired or the appending process failed, so it is skipped.
+# If the slot counter is below the flushed slot, the counter was evicted or the
+#  cache was restarted, so the counter starts again at 0 and the flush as well.
+
+# Buffered values expire if they aren't flushed within this time.
+CACHE_TIMEOUT = 24 * 60 * 60
+
+FLUSH_BATCH_SIZE = 500
+
+
+class CacheBuffer:
+    def __init__(self, name: str) -> None:
+        self._key_slot = f"{name}:slot:{{slot}}"
+        self._key_last_slot = f"{name}:last_slot"
+        self._key_flushed_slot = f"{name}:flushed_slot"
+        self._key_missing_slot = f"{name}:missing_slot"
+
+    @staticmethod
+    def is_shared() -> bool:
+        # The buffer can only be flushed by the scheduler if the cache is
+        #  shared by all processes.
+        return not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+    def append(self, value: Any) -> None:
+        cache.add(self._key_last_slot, 0, timeout=None)
+        slot = cache.incr(self._key_last_slot)
+        cache.set(self._key_slot.format(slot=slot), value, timeout=CACHE_TIMEOUT)
+
+    def flush(self, process: Callable[[List[Any]], None]) -> None:
+        """
+        Process the buffered values and remove them from the buffer.
+
+        :param process: function that is called with all buffered values. The
+            values stay in the buffer if it raises an exception.
+        """
+
+        last_slot = cache.get(self._key_last_slot, 0)
+        flushed_slot = cache.get(self._key_flushed_slot, 0)
+        missing_slot = cache.get(self._key_missing_slot)
+        if last_slot < flushed_slot:
+            flushed_slot = 0
+            missing_slot = None
+            cache.delete(self._key_missing_slot)
+        if last_slot <= flushed_slot:
+            return
+
+        values = []
+        end_slot = last_slot
+        for start in range(flushed_slot + 1, last_slot + 1, FLUSH_BATCH_SIZE):
+            batch_slots = range(start, min(start + FLUSH_BATCH_SIZE, last_slot + 1))
+            batch = cache.get_many(
+                [self._key_slot.format(slot=slot) for slot in batch_slots]
+            )
+            # Keep the order in which the values have been appended.
+            for slot in batch_slots:
+                key = self._key_slot.format(slot=slot)
+                if key in batch:
+                    values.append(batch[key])
+                elif slot != missing_slot:
+                    end_slot = slot - 1
+                    break
+            if end_slot < last_slot:
+                break
+
+        if values:
+            process(values)
+
+        cache.set(self._key_flushed_slot, end_slot, timeout=None)
+        if end_slot < last_slot:
+            cache.set(self._key_missing_slot, end_slot + 1, timeout=None)
+        cache.delete_many(
+            [
+                self._key_slot.format(slot=slot)
+                for slot in range(flushed_slot + 1, end_slot + 1)
+            ]
+        )
@@ -26,6 +26,14 @@ class Database:
     PORT = os.getenv("DJANGO_POSTGRES_PORT") or 5432
 
 
+class Cache:
+    BACKEND = (
+        os.getenv("DJANGO_CACHE_BACKEND")
+        or "django.core.cache.backends.locmem.LocMemCache"
+    )
+    LOCATION = os.getenv("DJANGO_CACHE_LOCATION") or ""
+
+
 class Email:
     BACKEND = (
         os.getenv("DJANGO_EMAIL_BACKEND")
@@ -55,6 +63,18 @@ class Settings:
     SECRET_KEY = os.getenv("DJANGO_SECRET")
     SECURE_COOKIE = _parse_boolean("DJANGO_SECURE_COOKIE")
     DOMAIN = os.getenv("DJANGO_DOMAIN") or "localhost"
+    ASYNC_VIEWS = _parse_boolean("DJANGO_ASYNC_VIEWS")
+    SESSION_ENGINE = (
+        os.getenv("DJANGO_SESSION_ENGINE") or "django.contrib.sessions.backends.db"
+    )
+    METRICS_TOKEN = os.getenv("DJANGO_METRICS_TOKEN") or ""
+    TRACING_EXPORTER = os.getenv("DJANGO_TRACING_EXPORTER") or ""
+    PROFILING_PRICE_REQUEST_PERCENTAGE = float(
+        os.getenv("DJANGO_PROFILE_PRICE_REQUESTS") or 0
+    )
+    SLOW_QUERY_LOG = os.getenv("DJANGO_SLOW_QUERY_LOG") or ""
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv("DJANGO_SLOW_QUERY_THRESHOLD_MS") or 100)
+    SLOW_QUERY_LOG_PARAMS = _parse_boolean("DJANGO_SLOW_QUERY_LOG_PARAMS")
 
 
 class Frontend:
@@ -0,0 +1,137 @@
+from dataclasses import asdict
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.utils import timezone
+import json
+
+from spritstat.benchmark import (
+    BENCHMARKS,
+    INGESTION_BENCHMARK,
+    BenchmarkError,
+    api_benchmark,
+    compare,
+    ingestion_benchmark,
+    measure,
+)
+from spritstat.models import DateRange, Location, Price
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the price and location endpoints and the price ingestion "
+        "against the current database and optionally compares the results to "
+        "a baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--location",
+            type=int,
+            help="Location the benchmarks are executed for, defaults to the "
+            "location with the most prices",
+        )
+        parser.add_argument(
+            "-n", "--iterations", type=int, default=30, help="Number of iterations"
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=3, help="Number of warmup iterations"
+        )
+        parser.add_argument(
+            "--date-range",
+            choices=[date_range.value for date_range in DateRange],
+            help="Date range of the price requests, defaults to all prices",
+        )
+        parser.add_argument(
+            "--only",
+            action="append",
+            choices=BENCHMARKS,
+            help="Only execute this benchmark, can be used multiple times",
+        )
+        parser.add_argument("-o", "--output", help="Write the results to this file")
+        parser.add_argument(
+            "--baseline", help="Compare the results to the results in this file"
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Tolerated relative increase of the median latency and the peak "
+            "allocation compared to the baseline",
+        )
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1 or options["warmup"] < 0:
+            raise CommandError("Iterations have to be positive")
+
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                baseline = json.load(f)
+
+        if options["location"]:
+            location = Location.objects.filter(id=options["location"]).first()
+        else:
+            location = (
+                Location.objects.annotate(num_prices=Count("prices"))
+                .order_by("-num_prices", "id")
+                .first()
+            )
+        if not location:
+            raise CommandError("No location found, generate a dataset first")
+
+        results = {}
+        # The test client uses its own host name.
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            client = Client()
+            client.force_login(location.user)
+            try:
+                for name in options["only"] or BENCHMARKS:
+                    if name == INGESTION_BENCHMARK:
+                        function = ingestion_benchmark(location)
+                    else:
+                        function = api_benchmark(
+                            client, name, location, options["date_range"]
+                        )
+                    result = measure(
+                        function, options["iterations"], warmup=options["warmup"]
+                    )
+                    results[name] = asdict(result)
+                    self._write_result(name, result.latency_ms, result)
+            except BenchmarkError as e:
+                raise CommandError(e)
+            finally:
+                client.logout()
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(
+                    {
+                        "created": timezone.now().isoformat(),
+                        "database": connection.vendor,
+                        "location": location.id,
+                        "location_prices": location.prices.count(),
+                        "prices": Price.objects.count(),
+                        "date_range": options["date_range"],
+                        "benchmarks": results,
+                    },
+                    f,
+                    indent=2,
+                )
+
+        if baseline:
+            regressions = compare(baseline["benchmarks"], results, options["threshold"])
+            if regressions:
+                raise CommandError(
+                    "Regressions compared to the baseline:\n" + "\n".join(regressions)
+                )
+            self.stdout.write("No regressions compared to the baseline")
+
+    def _write_result(self, name, latency, result) -> None:
+        self.stdout.write(
+            f"{name:<24} p50 {latency['p50']:8.1f}ms, p95 {latency['p95']:8.1f}ms, "
+            f"p99 {latency['p99']:8.1f}ms, {result.queries:3} queries, "
+            f"peak {result.peak_allocation_kb:8.0f}kB"
+        )
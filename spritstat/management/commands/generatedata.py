@@ -0,0 +1,432 @@
+from allauth.account.models import EmailAddress
+from dateutil.relativedelta import relativedelta
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max, Model
+from django.utils import timezone
+import io
+import random
+import time
+from typing import Dict, Iterable, List, Sequence, Tuple, Type
+from zoneinfo import ZoneInfo
+
+from spritstat.models import (
+    IntroSettings,
+    Location,
+    LocationType,
+    Price,
+    Settings,
+    Station,
+)
+from users.models import CustomUser
+
+
+# Generates a synthetic dataset at production scale, so query plans and
+#  response times can be reproduced locally. Users, locations and stations are
+#  created with bulk inserts, the prices are loaded with COPY on PostgreSQL,
+#  which is the only way to load millions of rows within minutes. All values
+#  are derived from the seed, only the timestamps depend on the end date.
+
+EMAIL_DOMAIN = "synthetic.spritstat.at"
+INSERT_BATCH_SIZE = 1000
+COPY_BATCH_SIZE = 100_000
+
+# Cities with their coordinates, Bundesland and Bezirk codes, and their share
+#  of the users.
+CITIES = (
+    ("Wien", 48.2083537, 16.3725042, 9, 900, 0.25),
+    ("Graz", 47.0708678, 15.4382786, 6, 601, 0.09),
+    ("Linz", 48.3059078, 14.2862700, 4, 401, 0.08),
+    ("Salzburg", 47.7981346, 13.0464806, 5, 501, 0.07),
+    ("Innsbruck", 47.2654296, 11.3927685, 7, 701, 0.07),
+    ("Klagenfurt", 46.6245963, 14.3075976, 2, 201, 0.05),
+    ("Villach", 46.6167284, 13.8500268, 2, 202, 0.04),
+    ("Wels", 48.1565472, 14.0243752, 4, 403, 0.04),
+    ("St. Pölten", 48.2043985, 15.6229118, 3, 302, 0.05),
+    ("Dornbirn", 47.4124950, 9.7438323, 8, 803, 0.04),
+    ("Wiener Neustadt", 47.8152450, 16.2464130, 3, 304, 0.05),
+    ("Steyr", 48.0427059, 14.4212721, 4, 402, 0.03),
+    ("Feldkirch", 47.2379650, 9.5977880, 8, 804, 0.03),
+    ("Bregenz", 47.5025779, 9.7472924, 8, 802, 0.03),
+    ("Eisenstadt", 47.8455220, 16.5186680, 1, 101, 0.04),
+    ("Krems", 48.4108392, 15.6102842, 3, 301, 0.04),
+)
+STATION_BRANDS = ("OMV", "BP", "Shell", "ENI", "JET", "Avanti", "Turmöl", "SOCAR")
+
+# Share of the locations per fuel type and the base price of each fuel type.
+FUEL_TYPES = {"DIE": (0.55, 1.55), "SUP": (0.4, 1.62), "GAS": (0.05, 1.25)}
+# Prices may only be raised at noon in Austria and are lowered during the rest
+#  of the day, so the prices have their maximum at noon and their minimum in
+#  the early morning.
+DIURNAL_OFFSETS = (
+    -0.012, -0.014, -0.015, -0.016, -0.016, -0.015, -0.012, -0.008,
+    -0.005, -0.004, -0.003, -0.002, 0.030, 0.026, 0.021, 0.017,
+    0.013, 0.010, 0.007, 0.004, 0.001, -0.003, -0.006, -0.009,
+)  # fmt: skip
+# Offsets from Monday to Sunday, prices are higher before the weekend.
+WEEKLY_OFFSETS = (-0.004, -0.003, -0.002, 0.000, 0.006, 0.004, 0.001)
+
+
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return str(value)
+
+
+def _insert(model: Type[Model], fields: Sequence[str], rows: Iterable[Sequence]):
+    # Insert the rows in batches, using COPY on PostgreSQL. Each batch is
+    #  committed separately, so the deferred foreign key checks of a batch
+    #  don't pile up.
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = [model._meta.get_field(field).column for field in fields]
+    column_list = ", ".join(connection.ops.quote_name(column) for column in columns)
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= COPY_BATCH_SIZE:
+            _insert_batch(table, column_list, len(columns), batch)
+            batch = []
+    if batch:
+        _insert_batch(table, column_list, len(columns), batch)
+
+
+def _insert_batch(table: str, column_list: str, num_columns: int, batch: List):
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            data = io.StringIO(
+                "".join(
+                    "\t".join(_copy_value(value) for value in row) + "\n"
+                    for row in batch
+                )
+            )
+            cursor.copy_expert(f"COPY {table} ({column_list}) FROM STDIN", data)
+        else:
+            placeholders = ", ".join(["%s"] * num_columns)
+            cursor.executemany(
+                f"INSERT INTO {table} ({column_list}) VALUES ({placeholders})",
+                batch,
+            )
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a synthetic dataset of users with locations, stations and "
+        "hourly prices"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-u", "--users", type=int, default=1000, help="Number of users"
+        )
+        parser.add_argument(
+            "-m", "--months", type=int, default=6, help="Months of hourly prices"
+        )
+        parser.add_argument(
+            "--stations", type=int, default=2700, help="Number of stations"
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seed of the random generator"
+        )
+        parser.add_argument(
+            "--end",
+            type=datetime.fromisoformat,
+            help="Date of the last price (ISO format), defaults to now",
+        )
+        parser.add_argument(
+            "--password",
+            default="synthetic",
+            help="Password of the generated users",
+        )
+
+    def _log(self, message: str) -> None:
+        self.stdout.write(f"[{time.perf_counter() - self._start:7.1f}s] {message}")
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["months"] < 1 or options["stations"] < 1:
+            raise CommandError("Users, months and stations have to be positive")
+
+        if CustomUser.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").exists():
+            raise CommandError(
+                f"Users of a synthetic dataset exist already (@{EMAIL_DOMAIN})"
+            )
+
+        self._start = time.perf_counter()
+        self._rng = random.Random(options["seed"])
+        end = options["end"] or timezone.now()
+        if timezone.is_naive(end):
+            end = timezone.make_aware(end)
+        end = end.replace(minute=0, second=0, microsecond=0)
+        start = end - relativedelta(months=options["months"])
+
+        stations = self._create_stations(options["stations"])
+        self._log(f"Created {options['stations']} stations")
+        users = self._create_users(options["users"], options["password"], start, end)
+        self._log(f"Created {len(users)} users")
+        locations = self._create_locations(users, stations)
+        self._log(f"Created {len(locations)} locations")
+        num_prices = self._create_prices(locations, start, end)
+        self._log(f"Created {num_prices} prices")
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                for model in (Price, Price.stations.through):
+                    cursor.execute(f"ANALYZE {model._meta.db_table}")
+            self._log("Analyzed the price tables")
+
+    def _create_stations(self, count: int) -> Dict[int, List[Station]]:
+        # Create the stations around the cities, grouped by city.
+        weights = [city[5] for city in CITIES]
+        cities = self._rng.choices(range(len(CITIES)), weights=weights, k=count)
+        stations = []
+        for number, city in enumerate(cities):
+            name, latitude, longitude, _, _, _ = CITIES[city]
+            stations.append(
+                Station(
+                    name=f"{self._rng.choice(STATION_BRANDS)} {name} {number}",
+                    address=f"Hauptstraße {self._rng.randint(1, 200)}",
+                    postal_code=str(self._rng.randint(1010, 9992)),
+                    city=name,
+                    latitude=self._coordinate(latitude, 0.08),
+                    longitude=self._coordinate(longitude, 0.12),
+                )
+            )
+        Station.objects.bulk_create(stations, batch_size=INSERT_BATCH_SIZE)
+
+        by_city: Dict[int, List[Station]] = {index: [] for index in range(len(CITIES))}
+        for city, station in zip(cities, stations):
+            by_city[city].append(station)
+
+        return by_city
+
+    def _coordinate(self, center: float, deviation: float) -> Decimal:
+        return Decimal(f"{self._rng.gauss(center, deviation):.7f}")
+
+    def _create_users(
+        self, count: int, password: str, start: datetime, end: datetime
+    ) -> List[CustomUser]:
+        # All users share the same password, so it is only hashed once.
+        password = make_password(password)
+        joined_range = (end - start).total_seconds()
+        users = []
+        for number in range(count):
+            date_joined = start + timedelta(seconds=self._rng.uniform(0, joined_range))
+            users.append(
+                CustomUser(
+                    username=f"user{number}@{EMAIL_DOMAIN}",
+                    email=f"user{number}@{EMAIL_DOMAIN}",
+                    password=password,
+                    date_joined=date_joined,
+                    last_activity=date_joined
+                    + timedelta(
+                        seconds=self._rng.uniform(
+                            0, (end - date_joined).total_seconds()
+                        )
+                    ),
+                    locale=self._rng.choice(("de", "en")),
+                )
+            )
+        CustomUser.objects.bulk_create(users, batch_size=INSERT_BATCH_SIZE)
+
+        # The settings and email addresses are created by signals and allauth
+        #  otherwise.
+        EmailAddress.objects.bulk_create(
+            [
+                EmailAddress(user=user, email=user.email, verified=True, primary=True)
+                for user in users
+            ],
+            batch_size=INSERT_BATCH_SIZE,
+        )
+        intros = IntroSettings.objects.bulk_create(
+            [IntroSettings() for _ in users], batch_size=INSERT_BATCH_SIZE
+        )
+        Settings.objects.bulk_create(
+            [Settings(user=user, intro=intro) for user, intro in zip(users, intros)],
+            batch_size=INSERT_BATCH_SIZE,
+        )
+
+        return users
+
+    def _create_locations(
+        self, users: List[CustomUser], stations: Dict[int, List[Station]]
+    ) -> List[Tuple[Location, List[Station]]]:
+        # Most users only have a few locations, which are close to each other.
+        weights = [city[5] for city in CITIES]
+        fuel_types = list(FUEL_TYPES)
+        fuel_type_weights = [share for share, _ in FUEL_TYPES.values()]
+        locations = []
+        user_stations = []
+        for user in users:
+            city = self._rng.choices(range(len(CITIES)), weights=weights)[0]
+            name, latitude, longitude, state_code, district_code, _ = CITIES[city]
+            count = min(int(self._rng.expovariate(0.5)) + 1, settings.LOCATION_LIMIT)
+            user_station_ids = set()
+            for _ in range(count):
+                fuel_type = self._rng.choices(fuel_types, weights=fuel_type_weights)[0]
+                candidates = stations[city] or [
+                    station
+                    for city_stations in stations.values()
+                    for station in city_stations
+                ]
+                if self._rng.random() < 0.8:
+                    location = Location(
+                        user=user,
+                        type=LocationType.NAMED,
+                        name=f"Hauptplatz {self._rng.randint(1, 50)}, {name}",
+                        latitude=self._coordinate(latitude, 0.05),
+                        longitude=self._coordinate(longitude, 0.07),
+                        fuel_type=fuel_type,
+                    )
+                    location_stations = self._rng.sample(
+                        candidates, min(5, len(candidates))
+                    )
+                else:
+                    region_type, region_code = self._rng.choice(
+                        (("BL", state_code), ("PB", district_code))
+                    )
+                    location = Location(
+                        user=user,
+                        type=LocationType.REGION,
+                        name=name,
+                        region_code=region_code,
+                        region_type=region_type,
+                        fuel_type=fuel_type,
+                    )
+                    location_stations = self._rng.sample(
+                        candidates, min(10, len(candidates))
+                    )
+                locations.append((location, location_stations))
+                user_station_ids.update(station.id for station in location_stations)
+            user_stations.extend(
+                Station.users.through(station_id=station_id, customuser_id=user.id)
+                for station_id in sorted(user_station_ids)
+            )
+
+        Location.objects.bulk_create(
+            [location for location, _ in locations], batch_size=INSERT_BATCH_SIZE
+        )
+        Station.users.through.objects.bulk_create(
+            user_stations, batch_size=INSERT_BATCH_SIZE
+        )
+
+        return locations
+
+    def _price_offsets(self, start: datetime, end: datetime) -> List[float]:
+        # Offsets of the national price level for each hour, consisting of a
+        #  random walk of the daily price and the diurnal and weekly patterns.
+        #  The patterns follow the local time.
+        local_timezone = ZoneInfo("Europe/Vienna")
+        hours = int((end - start).total_seconds() // 3600) + 1
+        offsets = []
+        daily = 0.0
+        for hour in range(hours):
+            local = (start + timedelta(hours=hour)).astimezone(local_timezone)
+            if hour == 0 or local.hour == 0:
+                daily = max(min(daily + self._rng.gauss(0, 0.006), 0.25), -0.25)
+            offsets.append(
+                daily + DIURNAL_OFFSETS[local.hour] + WEEKLY_OFFSETS[local.weekday()]
+            )
+
+        return offsets
+
+    def _create_prices(
+        self,
+        locations: List[Tuple[Location, List[Station]]],
+        start: datetime,
+        end: datetime,
+    ) -> int:
+        # The ids are assigned here, so the stations of the prices can be
+        #  inserted without reading the ids back.
+        next_id = (Price.objects.aggregate(max_id=Max("id"))["max_id"] or 0) + 1
+        offsets = {
+            fuel_type: self._price_offsets(start, end) for fuel_type in FUEL_TYPES
+        }
+        # Datetimes per minute, as each location requests its prices at a
+        #  different minute of the hour.
+        datetimes: Dict[int, List] = {}
+        price_rows = []
+        station_rows = []
+
+        def _flush() -> None:
+            _insert(
+                Price,
+                (
+                    "id",
+                    "location",
+                    "datetime",
+                    "min_amount",
+                    "max_amount",
+                    "average_amount",
+                    "median_amount",
+                ),
+                price_rows,
+            )
+            _insert(Price.stations.through, ("price", "station"), station_rows)
+            price_rows.clear()
+            station_rows.clear()
+
+        num_prices = 0
+        for location, stations in locations:
+            minute = self._rng.randrange(60)
+            if minute not in datetimes:
+                datetimes[minute] = [
+                    connection.ops.adapt_datetimefield_value(
+                        start + timedelta(hours=hour, minutes=minute)
+                    )
+                    for hour in range(len(offsets[location.fuel_type]))
+                ]
+            # Locations joined later have a shorter history
+            first_hour = self._rng.choice(
+                (0, 0, 0, self._rng.randrange(len(datetimes[minute])))
+            )
+            level = FUEL_TYPES[location.fuel_type][1] + self._rng.gauss(0, 0.03)
+            spread = self._rng.uniform(0.05, 0.15)
+            for hour in range(first_hour, len(datetimes[minute])):
+                min_amount = round(
+                    level
+                    + offsets[location.fuel_type][hour]
+                    + self._rng.gauss(0, 0.004),
+                    3,
+                )
+                max_amount = round(min_amount + spread * self._rng.uniform(0.8, 1.2), 3)
+                average_amount = round(min_amount + (max_amount - min_amount) * 0.45, 4)
+                median_amount = round(min_amount + (max_amount - min_amount) * 0.4, 4)
+                price_rows.append(
+                    (
+                        next_id,
+                        location.id,
+                        datetimes[minute][hour],
+                        min_amount,
+                        max_amount,
+                        average_amount,
+                        median_amount,
+                    )
+                )
+                # The same station is the cheapest most of the time.
+                if self._rng.random() < 0.6:
+                    cheapest = stations[0]
+                else:
+                    cheapest = self._rng.choice(stations)
+                station_rows.append((next_id, cheapest.id))
+                if self._rng.random() < 0.1 and len(stations) > 1:
+                    other = stations[1] if cheapest is stations[0] else stations[0]
+                    station_rows.append((next_id, other.id))
+                next_id += 1
+                num_prices += 1
+
+            if len(price_rows) >= COPY_BATCH_SIZE:
+                _flush()
+                self._log(f"Created {num_prices} prices")
+        _flush()
+
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Price]):
+                cursor.execute(sql)
+
+        return num_prices
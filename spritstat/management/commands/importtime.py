@@ -0,0 +1,91 @@
+from collections import defaultdict
+from django.core.management.base import BaseCommand, CommandError
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+
+# Python prints the import time of each module to stderr if started with
+#  "-X importtime". The self time of a module excludes the time of the
+#  modules it imports, so summing it up per top level package shows which
+#  libraries make the startup of a process slow.
+
+IMPORT_TIME_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)$")
+
+STARTUP_CODE = "import django; django.setup()"
+URLS_CODE = "from django.urls import get_resolver; get_resolver().url_patterns"
+
+
+class Command(BaseCommand):
+    help = (
+        "Starts the application in a new interpreter and prints the import time "
+        "of the slowest packages"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--urls",
+            action="store_true",
+            help="Additionally import the URLconf, like a web worker on the first "
+            "request",
+        )
+        parser.add_argument(
+            "--import",
+            dest="modules",
+            action="append",
+            default=[],
+            help="Additionally import the module, can be used multiple times",
+        )
+        parser.add_argument(
+            "-n", "--limit", type=int, default=20, help="Number of packages printed"
+        )
+
+    @staticmethod
+    def _profile(code: str) -> List[Tuple[str, int]]:
+        # Return the module names and their self import time in microseconds.
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True,
+            text=True,
+            env=os.environ.copy(),
+        )
+        if process.returncode:
+            raise CommandError(
+                f"Starting the application failed:\n{process.stderr[-2000:]}"
+            )
+
+        imports = []
+        for line in process.stderr.splitlines():
+            match = IMPORT_TIME_PATTERN.match(line)
+            if match:
+                imports.append((match.group(4), int(match.group(1))))
+
+        return imports
+
+    def handle(self, *args, **options):
+        statements = [STARTUP_CODE]
+        if options["urls"]:
+            statements.append(URLS_CODE)
+        statements.extend(f"import {module}" for module in options["modules"])
+
+        imports = self._profile("; ".join(statements))
+        packages: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+        for name, self_time in imports:
+            package = packages[name.split(".")[0]]
+            package[0] += self_time
+            package[1] += 1
+        total = sum(self_time for _, self_time in imports)
+
+        self.stdout.write(
+            f"Imported {len(imports)} modules in {total / 1000:.1f}ms "
+            f"({len(packages)} packages)"
+        )
+        self.stdout.write(f"{'Package':<30} {'Time':>10} {'Share':>7} {'Modules':>8}")
+        ranking = sorted(packages.items(), key=lambda item: item[1][0], reverse=True)
+        for name, (self_time, count) in ranking[: options["limit"]]:
+            self.stdout.write(
+                f"{name:<30} {self_time / 1000:>8.1f}ms "
+                f"{self_time / total:>7.1%} {count:>8}"
+            )
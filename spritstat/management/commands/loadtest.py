@@ -0,0 +1,82 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from statistics import mean, quantiles
+import time
+from typing import Dict, Tuple
+import urllib3
+
+
+class Command(BaseCommand):
+    help = (
+        "Executes concurrent GET requests against a running server and prints "
+        "the throughput and latency distribution"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", help="URL to request")
+        parser.add_argument(
+            "-n", "--requests", type=int, default=1000, help="Number of requests"
+        )
+        parser.add_argument(
+            "-c",
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Number of concurrent requests",
+        )
+        parser.add_argument(
+            "--session",
+            help="Value of the session cookie used to authenticate the requests",
+        )
+
+    @staticmethod
+    def _request(
+        http: urllib3.PoolManager, url: str, headers: Dict
+    ) -> Tuple[int, float]:
+        start = time.perf_counter()
+        try:
+            status = http.request("GET", url, headers=headers, retries=False).status
+        except urllib3.exceptions.HTTPError:
+            status = 0
+
+        return status, time.perf_counter() - start
+
+    def handle(self, *args, **options):
+        num_requests = options["requests"]
+        concurrency = options["concurrency"]
+        if num_requests < 1 or concurrency < 1:
+            raise CommandError("Requests and concurrency have to be positive")
+
+        headers = {}
+        if options["session"]:
+            headers["Cookie"] = f"sessionid={options['session']}"
+
+        http = urllib3.PoolManager(maxsize=concurrency)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(
+                executor.map(
+                    lambda _: self._request(http, options["url"], headers),
+                    range(num_requests),
+                )
+            )
+        duration = time.perf_counter() - start
+
+        latencies = [latency * 1000 for _, latency in results]
+        percentiles = quantiles(latencies, n=100) if len(latencies) > 1 else latencies
+        statuses = Counter(status for status, _ in results)
+
+        self.stdout.write(f"Requests:    {num_requests} ({concurrency} concurrent)")
+        self.stdout.write(f"Duration:    {duration:.2f}s")
+        self.stdout.write(f"Throughput:  {num_requests / duration:.1f} requests/s")
+        self.stdout.write(
+            f"Latency:     mean {mean(latencies):.1f}ms, "
+            f"p50 {percentiles[len(percentiles) // 2]:.1f}ms, "
+            f"p95 {percentiles[int(len(percentiles) * 0.95)]:.1f}ms, "
+            f"p99 {percentiles[-1]:.1f}ms"
+        )
+        self.stdout.write(
+            "Status:      "
+            + ", ".join(f"{status}: {count}" for status, count in statuses.items())
+        )
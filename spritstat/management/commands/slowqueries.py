@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, NotSupportedError, connections, transaction
+
+from spritstat.slow_queries import QueryStatistics, aggregate, read_log
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports the queries of the slow query log with the highest total or "
+        "95th percentile duration and explains the worst of them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--log",
+            help="Path of the slow query log, defaults to the SLOW_QUERY_LOG setting",
+        )
+        parser.add_argument(
+            "-n", "--top", type=int, default=10, help="Number of reported queries"
+        )
+        parser.add_argument(
+            "--sort",
+            choices=["total", "p95"],
+            default="total",
+            help="Duration the queries are ranked by",
+        )
+        parser.add_argument(
+            "--explain",
+            type=int,
+            default=1,
+            help="Number of the highest ranked queries that are explained",
+        )
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Execute the explained queries to show the actual plan (PostgreSQL)",
+        )
+
+    def handle(self, *args, **options):
+        if options["top"] < 1 or options["explain"] < 0:
+            raise CommandError("The number of queries has to be positive")
+
+        path = options["log"] or settings.SLOW_QUERY_LOG
+        if not path:
+            raise CommandError("No slow query log configured")
+
+        statistics = aggregate(read_log(path))
+        if not statistics:
+            self.stdout.write("No slow queries logged")
+            return
+
+        key = "total_ms" if options["sort"] == "total" else "p95_ms"
+        statistics.sort(key=lambda entry: getattr(entry, key), reverse=True)
+        top = statistics[: options["top"]]
+        for rank, entry in enumerate(top, 1):
+            self._write_statistics(rank, entry)
+
+        for entry in top[: options["explain"]]:
+            self._explain(entry, options["analyze"])
+
+    def _write_statistics(self, rank: int, entry: QueryStatistics) -> None:
+        sources = ", ".join(
+            f"{source} ({count})" for source, count in entry.sources.most_common(3)
+        )
+        self.stdout.write(
+            f"{rank:>2}. [{entry.id}] {entry.count} calls, total "
+            f"{entry.total_ms:.1f}ms, mean {entry.mean_ms:.1f}ms, p95 "
+            f"{entry.p95_ms:.1f}ms, max {entry.max_ms:.1f}ms\n"
+            f"    sources: {sources}\n"
+            f"    {entry.fingerprint}"
+        )
+
+    def _explain(self, entry: QueryStatistics, analyze: bool) -> None:
+        query = entry.slowest
+        self.stdout.write(f"\nPlan of [{entry.id}] ({query['duration_ms']:.1f}ms):")
+        if query["many"]:
+            self.stdout.write("    Queries executed for many rows can't be explained")
+            return
+        if "sql" not in query:
+            self.stdout.write(
+                "    The parameters of the query weren't logged (SLOW_QUERY_LOG_PARAMS)"
+            )
+            return
+
+        connection = connections[query.get("database", "default")]
+        try:
+            prefix = connection.ops.explain_query_prefix(
+                **({"analyze": True} if analyze else {})
+            )
+        except (NotSupportedError, ValueError) as e:
+            raise CommandError(f"Can't explain the query: {e}")
+
+        # The parameters were logged as JSON, dates are passed as strings and
+        #  are converted by the database. Analyzing a query executes it, so the
+        #  transaction is rolled back.
+        try:
+            with transaction.atomic(using=connection.alias):
+                with connection.cursor() as cursor:
+                    cursor.execute(f"{prefix} {query['sql']}", query["params"])
+                    rows = cursor.fetchall()
+                transaction.set_rollback(True, using=connection.alias)
+        except DatabaseError as e:
+            self.stdout.write(f"    Failed to explain the query: {e}")
+            return
+
+        for row in rows:
+            self.stdout.write("    " + " ".join(str(column) for column in row))
@@ -0,0 +1,151 @@
+from django.conf import settings
+from django.dispatch import receiver
+from django.http import HttpRequest
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django_q.signals import pre_execute
+import os
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+import typing
+
+
+# Metrics of the web and scheduler processes in the Prometheus format. If the
+#  environment variable PROMETHEUS_MULTIPROC_DIR is set, each process writes its
+#  metrics to a file in this directory and the metrics endpoint aggregates the
+#  files of all processes, so the gunicorn workers and the qcluster processes
+#  are exposed by every worker. The directory has to be emptied before the
+#  processes are started, see docker/entrypoint.sh.
+
+_LOCAL_ADDRESSES = ("127.0.0.1", "::1")
+_QUERY_BUCKETS = (1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30, 50, 100)
+
+REQUEST_DURATION = Histogram(
+    "spritstat_http_request_duration_seconds",
+    "Duration of the requests by view",
+    ["view", "method", "status"],
+)
+REQUEST_QUERIES = Histogram(
+    "spritstat_http_request_queries",
+    "Number of database queries of the requests by view",
+    ["view"],
+    buckets=_QUERY_BUCKETS,
+)
+REQUEST_DB_DURATION = Histogram(
+    "spritstat_http_request_db_duration_seconds",
+    "Time spent in the database by the requests by view",
+    ["view"],
+)
+CACHE_REQUESTS = Counter(
+    "spritstat_cache_requests",
+    "Cache lookups by cached value and result (hit or miss)",
+    ["cache", "result"],
+)
+INGESTION_STAGE_DURATION = Histogram(
+    "spritstat_ingestion_stage_duration_seconds",
+    "Duration of the stages of the price ingestion",
+    ["stage"],
+)
+ECONTROL_REQUEST_DURATION = Histogram(
+    "spritstat_econtrol_request_duration_seconds",
+    "Duration of the requests to the E-Control API by status code",
+    ["status"],
+    buckets=(0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10, 30),
+)
+PURGED_ROWS = Counter(
+    "spritstat_purged_rows",
+    "Rows deleted by the batched purges of the scheduler tasks by model",
+    ["model"],
+)
+# The sizes are set by the scheduler task that measures them, the most recent
+#  value of all processes is served.
+TABLE_ROWS = Gauge(
+    "spritstat_table_rows",
+    "Number of rows of the tables compacted by the scheduler tasks",
+    ["table"],
+    multiprocess_mode="mostrecent",
+)
+TABLE_SIZE = Gauge(
+    "spritstat_table_size_bytes",
+    "Size of the tables compacted by the scheduler tasks including indexes",
+    ["table"],
+    multiprocess_mode="mostrecent",
+)
+TASK_QUEUE_LAG = Histogram(
+    "spritstat_task_queue_lag_seconds",
+    "Time between the enqueuing and the execution of the tasks",
+    ["func"],
+    buckets=(0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+
+
+def observe_request(
+    view: typing.Optional[str],
+    method: str,
+    status: int,
+    duration: float,
+    queries: int,
+    db_duration: float,
+) -> None:
+    # Requests which don't match a named URL (e.g. the frontend paths) are
+    #  grouped, so the number of label values stays small.
+    view = view or "other"
+    REQUEST_DURATION.labels(view, method, f"{status // 100}xx").observe(duration)
+    REQUEST_QUERIES.labels(view).observe(queries)
+    REQUEST_DB_DURATION.labels(view).observe(db_duration)
+
+
+def observe_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def observe_table_size(table: str, rows: int, size: int) -> None:
+    TABLE_ROWS.labels(table).set(rows)
+    TABLE_SIZE.labels(table).set(size)
+
+
+@receiver(pre_execute)
+def observe_task_queue_lag(sender: str, task: typing.Dict, **kwargs) -> None:
+    # The task is stamped with the time it was enqueued.
+    if "started" not in task:
+        return
+
+    func = task["func"]
+    if callable(func):
+        func = f"{func.__module__}.{func.__name__}"
+    lag = (timezone.now() - task["started"]).total_seconds()
+    TASK_QUEUE_LAG.labels(func).observe(max(lag, 0))
+
+
+def is_authorized_scraper(request: HttpRequest) -> bool:
+    # Without a token the metrics are only served in development to a scraper
+    #  on the same host. Behind a reverse proxy on the same host every request
+    #  has a local address, so forwarded requests are refused.
+    if not settings.METRICS_TOKEN:
+        return (
+            settings.DEBUG
+            and request.META.get("REMOTE_ADDR") in _LOCAL_ADDRESSES
+            and "X-Forwarded-For" not in request.headers
+        )
+
+    return constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {settings.METRICS_TOKEN}"
+    )
+
+
+def generate_metrics() -> bytes:
+    # Aggregate the metrics of all processes if they are written to files.
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return generate_latest(registry)
@@ -0,0 +1,256 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+import logging
+import time
+import typing
+
+from . import metrics, slow_queries, tracing
+from .models import ProfileKind
+from .profiling import async_profile, profile
+
+
+# Counts the queries and measures the database time of each request. The
+#  timings are sent in the Server-Timing header, so they show up in the network
+#  panel of the browser, and requests which exceed the query budget of their
+#  view are logged, so N+1 queries are noticed.
+# The budgets are configured by URL name in QUERY_BUDGETS, the tests of the
+#  endpoints assert the same budgets, see spritstat.tests.utils. The same
+#  measurements are recorded as metrics by view.
+# The middlewares support sync and async requests, as the async views are
+#  only executed without a thread if all middlewares do (including the one of
+#  allauth, which supports them since 0.61). The queries of an async request
+#  are executed by the thread of its sync code, see
+#  asgiref.sync.sync_to_async, so the execute wrappers are installed there.
+
+LOG = logging.getLogger(__name__)
+
+
+class AsyncCapableMiddleware:
+    # Like django.utils.deprecation.MiddlewareMixin, __call__ of the subclasses
+    #  returns the coroutine of __acall__ if the next handler is async.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: typing.Callable) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+
+def get_query_budget(name: typing.Optional[str]) -> typing.Dict[str, float]:
+    budgets = settings.QUERY_BUDGETS
+
+    return {**budgets["default"], **budgets.get(name, {})}
+
+
+class QueryTimer:
+    # Execute wrapper that counts the queries and sums up their duration.
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+    def track(self) -> ExitStack:
+        # Track the queries of all connections of this thread.
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+
+        return stack
+
+
+class QueryBudgetMiddleware(AsyncCapableMiddleware):
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timer = QueryTimer()
+        request._query_timer = timer
+        start = time.perf_counter()
+        with timer.track():
+            response = self.get_response(request)
+        self._process_response(request, response, timer, start)
+
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        timer = QueryTimer()
+        request._query_timer = timer
+        start = time.perf_counter()
+        tracked = await sync_to_async(timer.track)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(tracked.close)()
+        self._process_response(request, response, timer, start)
+
+        return response
+
+    def _process_response(
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        timer: QueryTimer,
+        start: float,
+    ) -> None:
+        end = time.perf_counter()
+
+        # The serialization covers the view and the rendering of the response,
+        #  without the time spent in the database.
+        timings = [
+            f'db;dur={timer.duration * 1000:.1f};desc="{timer.count} queries"',
+        ]
+        view_start = getattr(request, "_view_start", None)
+        if view_start is not None:
+            view_db_duration = timer.duration - request._view_db_duration
+            timings.append(
+                f"serialize;dur={(end - view_start - view_db_duration) * 1000:.1f}"
+            )
+        timings.append(f"total;dur={(end - start) * 1000:.1f}")
+        response["Server-Timing"] = ", ".join(timings)
+
+        name = request.resolver_match.url_name if request.resolver_match else None
+        self._check_budget(request, name, timer)
+        metrics.observe_request(
+            name,
+            request.method,
+            response.status_code,
+            end - start,
+            timer.count,
+            timer.duration,
+        )
+
+    @staticmethod
+    def process_view(request: HttpRequest, *args, **kwargs) -> None:
+        request._view_start = time.perf_counter()
+        request._view_db_duration = request._query_timer.duration
+
+    @staticmethod
+    def _check_budget(
+        request: HttpRequest, name: typing.Optional[str], timer: QueryTimer
+    ) -> None:
+        budget = get_query_budget(name)
+        db_time_ms = timer.duration * 1000
+        if timer.count > budget["queries"] or db_time_ms > budget["db_time_ms"]:
+            LOG.warning(
+                f"{request.method} {request.path} ({name}) exceeded its query "
+                f"budget: {timer.count} queries (budget {budget['queries']}), "
+                f"{db_time_ms:.1f}ms database time (budget {budget['db_time_ms']}ms)"
+            )
+
+
+class TracingMiddleware(AsyncCapableMiddleware):
+    # Trace the requests if tracing is enabled, see spritstat.tracing.
+    def __init__(self, get_response: typing.Callable) -> None:
+        if not tracing.is_enabled():
+            raise MiddlewareNotUsed("Tracing is disabled")
+        super().__init__(get_response)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with tracing.request_span(request) as span:
+            request._trace_span = span
+            response = self.get_response(request)
+            tracing.set_response(span, response)
+
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        async with tracing.async_request_span(request) as span:
+            request._trace_span = span
+            response = await self.get_response(request)
+            tracing.set_response(span, response)
+
+        return response
+
+    @staticmethod
+    def process_view(request: HttpRequest, *args, **kwargs) -> None:
+        tracing.set_view(request._trace_span, request)
+
+
+class SlowQueryMiddleware(AsyncCapableMiddleware):
+    # Attribute the slow queries of the requests to their view if the slow
+    #  queries are logged, see spritstat.slow_queries. The source is stored in
+    #  a context variable, which is passed to the thread of the sync code of an
+    #  async request.
+    def __init__(self, get_response: typing.Callable) -> None:
+        if not slow_queries.is_enabled():
+            raise MiddlewareNotUsed("Slow query log is disabled")
+        super().__init__(get_response)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = slow_queries.set_source(f"{request.method} {request.path}")
+        try:
+            return self.get_response(request)
+        finally:
+            slow_queries.reset_source(token)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        token = slow_queries.set_source(f"{request.method} {request.path}")
+        try:
+            return await self.get_response(request)
+        finally:
+            slow_queries.reset_source(token)
+
+    @staticmethod
+    def process_view(request: HttpRequest, *args, **kwargs) -> None:
+        if request.resolver_match.url_name:
+            slow_queries.set_source(
+                f"{request.method} {request.resolver_match.url_name}"
+            )
+
+
+class ProfilingMiddleware(AsyncCapableMiddleware):
+    # Profile requests of staff users which set the X-Profile header or the
+    #  profile query parameter, see spritstat.profiling. The ID of the stored
+    #  profile is returned in the X-Profile-Id header.
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if not self._is_requested(request):
+            return self.get_response(request)
+
+        with profile(
+            ProfileKind.REQUEST, f"{request.method} {request.path}", request.user
+        ) as sampler:
+            response = self.get_response(request)
+        response["X-Profile-Id"] = sampler.profile.id
+
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        # The user is loaded lazily from the session, which requires a
+        #  database query.
+        if not await sync_to_async(self._is_requested)(request):
+            return await self.get_response(request)
+
+        async with async_profile(
+            ProfileKind.REQUEST, f"{request.method} {request.path}", request.user
+        ) as sampler:
+            response = await self.get_response(request)
+        response["X-Profile-Id"] = sampler.profile.id
+
+        return response
+
+    @staticmethod
+    def _is_requested(request: HttpRequest) -> bool:
+        return (
+            "HTTP_X_PROFILE" in request.META or "profile" in request.GET
+        ) and request.user.is_staff
@@ -2,12 +2,13 @@
 
 from django.db import migrations
 
-from spritstat.models import Location, LocationType
+from spritstat.models import LocationType
 
 
 def set_name(apps, schema_editor):
     # Create the name from the address/city/plz/region_name fields
 
+    Location = apps.get_model("spritstat", "Location")
     locations = Location.objects.all()
 
     for loc in locations:
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.8 on 2026-10-19 12:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("spritstat", "0021_alter_settings_intro"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="price",
+            index=models.Index(
+                fields=["location", "datetime"], name="spritstat_p_locatio_de755d_idx"
+            ),
+        ),
+    ]
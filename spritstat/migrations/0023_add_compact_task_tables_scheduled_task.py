@@ -0,0 +1,22 @@
+# Generated by Django 4.2.8 on 2026-10-19 13:20
+
+from django.db import migrations
+
+
+def add_compact_task_tables_schedule(apps, schema_editor):
+    Schedule = apps.get_model("django_q", "schedule")
+
+    # Delete the results of executed tasks once per day.
+    Schedule.objects.create(
+        func="spritstat.services.compact_task_tables",
+        schedule_type="D",
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_q", "0014_schedule_cluster"),
+        ("spritstat", "0022_price_location_datetime_index"),
+    ]
+
+    operations = [migrations.RunPython(add_compact_task_tables_schedule)]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.8 on 2026-10-19 12:57
+
+from django.db import migrations, models
+
+
+def add_purge_deleted_schedule(apps, schema_editor):
+    Schedule = apps.get_model("django_q", "schedule")
+
+    # Purge the soft deleted users and locations every 5 minutes.
+    Schedule.objects.create(
+        func="spritstat.services.purge_deleted",
+        schedule_type="I",
+        minutes=5,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("spritstat", "0023_add_compact_task_tables_scheduled_task"),
+        ("users", "0008_customuser_deleted_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="location",
+            name="deleted_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(add_purge_deleted_schedule),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.8 on 2026-10-19 14:02
+
+from django.db import migrations
+
+
+def add_send_due_notifications_schedule(apps, schema_editor):
+    Schedule = apps.get_model("django_q", "schedule")
+
+    # Send the due notifications in batches every 5 minutes.
+    Schedule.objects.create(
+        func="spritstat.services.send_due_notifications",
+        schedule_type="I",
+        minutes=5,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_q", "0014_schedule_cluster"),
+        ("spritstat", "0024_location_deleted_at"),
+    ]
+
+    operations = [migrations.RunPython(add_send_due_notifications_schedule)]
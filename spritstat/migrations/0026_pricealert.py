@@ -0,0 +1,48 @@
+# Generated by Django 4.2.8 on 2026-10-19 13:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("spritstat", "0025_send_due_notifications_scheduled_task"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PriceAlert",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("target_amount", models.FloatField()),
+                ("active", models.BooleanField(default=True)),
+                ("triggered", models.BooleanField(default=False)),
+                ("last_sent_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "location",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="price_alerts",
+                        to="spritstat.location",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("active", True)),
+                        fields=["location"],
+                        name="spritstat_active_alert_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -1,12 +1,13 @@
 from __future__ import annotations
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
 from typing import Optional, Union
 
 from dateutil.relativedelta import relativedelta
 from django.db import models
-from django.db.models import Avg
+from django.db.models import Avg, Count, F, FloatField, Func, OuterRef, Subquery
 from django.db.models.functions import (
+    Cast,
     Length,
     ExtractIsoWeekDay,
     ExtractDay,
@@ -14,9 +15,10 @@ from django.db.models.functions import (
 )
 from django.db.models.signals import pre_delete, post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
 from django_q.models import Schedule
-from users.models import CustomUser
+from users.models import CustomUser, Notifications
 
 
 # We need to modify the CharField, so it provides the length function for our
@@ -64,7 +66,74 @@ class LocationType(models.IntegerChoices):
     REGION = 2, "Region"
 
 
+class LocationQuerySet(models.QuerySet):
+    def with_latest_price(self) -> Union[LocationQuerySet, models.QuerySet]:
+        # Annotate the latest price and its cheapest station using correlated
+        #  subqueries, so the number of queries doesn't depend on the number
+        #  of locations.
+        # If multiple stations offered the cheapest price we use the one with
+        #  the lowest id.
+        latest = Price.objects.filter(location=OuterRef("pk")).order_by("-datetime")
+        latest_station = latest.order_by("-datetime", "stations__id")
+
+        return self.annotate(
+            latest_price_datetime=Subquery(latest.values("datetime")[:1]),
+            latest_price_min_amount=Subquery(latest.values("min_amount")[:1]),
+            cheapest_station_id=Subquery(latest_station.values("stations__id")[:1]),
+            cheapest_station_name=Subquery(latest_station.values("stations__name")[:1]),
+        )
+
+    def with_price_trend(self) -> Union[LocationQuerySet, models.QuerySet]:
+        # Annotate the change of the minimum price compared to 24 hours and 7
+        #  days before the latest price, so the changes cover the same time
+        #  span even if no prices were requested lately. This requires the
+        #  annotations of with_latest_price.
+
+        def _min_amount_before(delta: timedelta) -> Subquery:
+            return Subquery(
+                Price.objects.filter(
+                    location=OuterRef("pk"),
+                    datetime__lte=OuterRef("latest_price_datetime") - delta,
+                )
+                .order_by("-datetime")
+                .values("min_amount")[:1]
+            )
+
+        return self.annotate(
+            price_change_24h=(
+                F("latest_price_min_amount") - _min_amount_before(timedelta(hours=24))
+            ),
+            price_change_7d=(
+                F("latest_price_min_amount") - _min_amount_before(timedelta(days=7))
+            ),
+        )
+
+    def soft_delete(self) -> None:
+        # Hide the locations immediately and stop requesting prices for them.
+        #  The locations and their prices are deleted in the background by
+        #  spritstat.services.purge_deleted.
+        location_ids = list(self.values_list("id", flat=True))
+        Location.all_objects.filter(id__in=location_ids).update(
+            deleted_at=timezone.now()
+        )
+        Schedule.objects.filter(location__id__in=location_ids).delete()
+        # The location reminder refers to the latest location of the user
+        CustomUser.objects.filter(
+            locations__id__in=location_ids,
+            next_notification_type=Notifications.LOCATION_REMINDER,
+        ).update(next_notification_type=None, next_notification_at=None)
+
+
+class LocationManager(models.Manager.from_queryset(LocationQuerySet)):
+    def get_queryset(self) -> Union[LocationQuerySet, models.QuerySet]:
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Location(models.Model):
+    objects = LocationManager()
+    # Includes the deleted locations
+    all_objects = LocationQuerySet.as_manager()
+
     user = models.ForeignKey(
         CustomUser, on_delete=models.CASCADE, related_name="locations"
     )
@@ -80,6 +149,7 @@ class Location(models.Model):
     region_type = models.CharField(max_length=2, choices=REGION_TYPES, blank=True)
     fuel_type = models.CharField(max_length=10, choices=FUEL_TYPES)
     schedule = models.OneToOneField(Schedule, null=True, on_delete=models.SET_NULL)
+    deleted_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         constraints = [
@@ -110,6 +180,47 @@ class Location(models.Model):
         if isinstance(instance, Location) and instance.schedule:
             instance.schedule.delete()
 
+    @staticmethod
+    @receiver(post_save)
+    def soft_delete_for_user(
+        instance: CustomUser, update_fields: Optional[frozenset] = None, **kwargs
+    ) -> None:
+        # Hide the locations of a deleted user, see CustomUser.soft_delete.
+        if (
+            isinstance(instance, CustomUser)
+            and instance.deleted_at
+            and update_fields
+            and "deleted_at" in update_fields
+        ):
+            Location.objects.filter(user=instance).soft_delete()
+
+
+class PriceAlert(models.Model):
+    # Notifies the user once the minimum price of the location drops to or
+    #  below the target amount, see spritstat.services.evaluate_price_alerts.
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["location"],
+                condition=models.Q(active=True),
+                name="spritstat_active_alert_idx",
+            )
+        ]
+
+    location = models.ForeignKey(
+        Location, on_delete=models.CASCADE, related_name="price_alerts"
+    )
+    target_amount = models.FloatField()
+    active = models.BooleanField(default=True)
+    # Set when the alert was sent and reset once the price rose above the
+    #  target amount plus the hysteresis again.
+    triggered = models.BooleanField(default=False)
+    last_sent_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def user(self) -> CustomUser:
+        return self.location.user
+
 
 class Station(models.Model):
     users = models.ManyToManyField(CustomUser, related_name="stations")
@@ -181,10 +292,44 @@ class PriceQuerySet(models.QuerySet):
             .order_by("day_of_month")
         )
 
+    def station_frequency(self, top_n: Optional[int] = None) -> models.QuerySet:
+        # Calculate how often each station provided the minimum price in this
+        #  queryset together with the station data, so the frontend doesn't
+        #  have to request the stations separately.
+        # The total count is a scalar subquery in the same statement. A window
+        #  count over the grouped rows can't be used here, as prices with
+        #  multiple stations would be counted multiple times.
+        prices = self.order_by()
+        count = prices.annotate(count=Func(F("id"), function="COUNT")).values("count")
+        data = (
+            Station.objects.filter(prices__in=prices.values("id"))
+            .annotate(count=Count("prices"))
+            .annotate(
+                frequency=Cast(F("count"), output_field=FloatField()) / Subquery(count)
+            )
+            .values(
+                "name",
+                "address",
+                "postal_code",
+                "city",
+                "latitude",
+                "longitude",
+                "frequency",
+                station_id=F("id"),
+            )
+            .order_by("-count", "id")
+        )
+
+        if top_n is not None:
+            data = data[:top_n]
+
+        return data
+
 
 class Price(models.Model):
     class Meta:
         ordering = ["datetime"]
+        indexes = [models.Index(fields=["location", "datetime"])]
 
     objects = PriceQuerySet.as_manager()
 
@@ -197,3 +342,28 @@ class Price(models.Model):
     max_amount = models.FloatField()
     average_amount = models.FloatField()
     median_amount = models.FloatField()
+
+
+class ProfileKind(models.TextChoices):
+    REQUEST = "request", "Request"
+    TASK = "task", "Task"
+
+
+class Profile(models.Model):
+    # Sampled profile of a request or scheduler task in the collapsed stack
+    #  format, see spritstat.profiling.
+    class Meta:
+        ordering = ["-created_at"]
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    kind = models.CharField(max_length=7, choices=ProfileKind.choices)
+    name = models.CharField(max_length=200)
+    user = models.ForeignKey(
+        CustomUser, null=True, blank=True, on_delete=models.SET_NULL
+    )
+    # Duration of the profiled request or task in seconds
+    duration = models.FloatField()
+    samples = models.IntegerField()
+    data = models.TextField()
+    # Size of the data in bytes, which is used to enforce the storage limit
+    size = models.IntegerField()
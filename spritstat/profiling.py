@@ -0,0 +1,188 @@
+from asgiref.sync import sync_to_async
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from django.conf import settings
+import functools
+import os
+import random
+import sys
+import threading
+import time
+from types import FrameType
+from typing import AsyncIterator, Callable, Iterator, List, Optional
+
+from .models import CustomUser, Profile, ProfileKind
+
+
+# Sampling profiler for single requests and scheduler tasks. While a request or
+#  task is profiled, a background thread samples the stack of the executing
+#  thread at a fixed interval. The profile is stored in the collapsed stack
+#  format ("frame;frame;frame count" per line), which can be loaded by
+#  flamegraph.pl or speedscope. Sampling keeps the overhead independent of the
+#  number of function calls, unlike cProfile.
+# The stored profiles are limited in size, the oldest profiles are deleted once
+#  the limit is exceeded.
+
+_PATH_PREFIXES = sorted(
+    {os.path.join(path, "") for path in sys.path if path}, key=len, reverse=True
+)
+
+
+def _short_path(path: str) -> str:
+    # Remove the longest import path prefix, so the paths are module paths.
+    for prefix in _PATH_PREFIXES:
+        if path.startswith(prefix):
+            return path[len(prefix) :]
+
+    return path
+
+
+def _collapse(frame: Optional[FrameType]) -> str:
+    names: List[str] = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(
+            f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+        )
+        frame = frame.f_back
+
+    return ";".join(reversed(names))
+
+
+class Sampler:
+    """
+    Sample the stack of the thread that enters the context.
+    """
+
+    def __init__(self, interval: float) -> None:
+        """
+        :param interval: seconds between two samples
+        """
+
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.duration = 0.0
+        self.profile: Optional[Profile] = None
+        self._thread_id: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start = 0.0
+
+    def __enter__(self) -> "Sampler":
+        self._thread_id = threading.get_ident()
+        self._thread = threading.Thread(
+            target=self._run, name="profiling-sampler", daemon=True
+        )
+        self._start = time.perf_counter()
+        self._thread.start()
+
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.duration = time.perf_counter() - self._start
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self.stacks[_collapse(frame)] += 1
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def collapsed(self) -> str:
+        return "\n".join(
+            f"{stack} {count}" for stack, count in sorted(self.stacks.items())
+        )
+
+
+def _enforce_storage_limit() -> None:
+    # Delete the oldest profiles that exceed the storage limit.
+    total = 0
+    expired = []
+    for profile_id, size in Profile.objects.order_by("-created_at", "-id").values_list(
+        "id", "size"
+    ):
+        total += size
+        if total > settings.PROFILING_STORAGE_LIMIT:
+            expired.append(profile_id)
+
+    if expired:
+        Profile.objects.filter(id__in=expired).delete()
+
+
+def _store(
+    sampler: Sampler, kind: ProfileKind, name: str, user: Optional[CustomUser]
+) -> Profile:
+    data = sampler.collapsed()
+    stored = Profile.objects.create(
+        kind=kind,
+        name=name[: Profile._meta.get_field("name").max_length],
+        user=user,
+        duration=sampler.duration,
+        samples=sampler.samples,
+        data=data,
+        size=len(data.encode()),
+    )
+    _enforce_storage_limit()
+
+    return stored
+
+
+@contextmanager
+def profile(
+    kind: ProfileKind, name: str, user: Optional[CustomUser] = None
+) -> Iterator[Sampler]:
+    """
+    Profile the code executed in the context and store the profile, even if an
+    exception is raised.
+
+    :param kind: kind of the profiled code
+    :param name: name of the profile, e.g. the request path
+    :param user: user that requested the profile
+    :return: sampler, its profile attribute is set once the profile is stored
+    """
+
+    sampler = Sampler(settings.PROFILING_INTERVAL)
+    try:
+        with sampler:
+            yield sampler
+    finally:
+        sampler.profile = _store(sampler, kind, name, user)
+
+
+@asynccontextmanager
+async def async_profile(
+    kind: ProfileKind, name: str, user: Optional[CustomUser] = None
+) -> AsyncIterator[Sampler]:
+    # Like profile for async code. The thread of the event loop is sampled, so
+    #  the profile contains the coroutines of all concurrent requests, but not
+    #  the sync code executed in threads.
+    sampler = Sampler(settings.PROFILING_INTERVAL)
+    try:
+        with sampler:
+            yield sampler
+    finally:
+        sampler.profile = await sync_to_async(_store)(sampler, kind, name, user)
+
+
+def profiled_task(percentage_setting: str) -> Callable:
+    # Decorator that profiles the percentage of the executions of a scheduler
+    #  task configured by the provided setting.
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if random.random() * 100 >= getattr(settings, percentage_setting):
+                return func(*args, **kwargs)
+
+            arguments = ", ".join(repr(arg) for arg in args)
+            with profile(ProfileKind.TASK, f"{func.__name__}({arguments})"):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,121 @@
+from dataclasses import dataclass
+from django.conf import settings
+from django.db import connections
+from django.db.models import QuerySet
+import logging
+import time
+from typing import Optional
+
+from .metrics import PURGED_ROWS
+
+
+# Deletes the rows of a queryset in batches, so large deletes don't lock the
+#  table and bloat the WAL for a long time. The batches are selected by
+#  primary key order and a short pause between the batches allows other
+#  queries and the autovacuum to catch up.
+# Scheduler tasks pass a deadline, after which no further batch is started, so
+#  they finish before the timeout of the scheduler. As the rows are deleted in
+#  primary key order, the next run of the task continues with the remaining
+#  rows.
+
+LOG = logging.getLogger(__name__)
+
+PURGE_BATCH_SIZE = 1000
+PURGE_PAUSE_SECONDS = 0.1
+
+
+@dataclass(frozen=True)
+class PurgeResult:
+    model: str
+    deleted: int
+    batches: int
+    duration: float
+    complete: bool
+
+
+def _raw_delete(queryset: QuerySet, pks: list) -> int:
+    # Delete the rows directly, without collecting related objects and
+    #  sending signals.
+    model = queryset.model
+    connection = connections[queryset.db]
+    quote_name = connection.ops.quote_name
+    placeholders = ", ".join(["%s"] * len(pks))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {quote_name(model._meta.db_table)} "
+            f"WHERE {quote_name(model._meta.pk.column)} IN ({placeholders})",
+            pks,
+        )
+        return cursor.rowcount
+
+
+def get_deadline() -> float:
+    # Deadline of a purge started now by a scheduler task, tasks executing
+    #  multiple purges pass the same deadline to all of them.
+    return time.perf_counter() + settings.PURGE_TIME_LIMIT_SECONDS
+
+
+def purge(
+    queryset: QuerySet,
+    raw: bool = False,
+    batch_size: Optional[int] = None,
+    pause: Optional[float] = None,
+    deadline: Optional[float] = None,
+) -> PurgeResult:
+    """
+    Delete all rows of the queryset in batches.
+
+    :param queryset: rows to delete
+    :param raw: delete the rows with raw SQL, which may only be used if no
+        other rows reference the rows and no delete signals are required
+    :param batch_size: number of rows deleted per batch, defaults to
+        PURGE_BATCH_SIZE
+    :param pause: seconds to wait between two batches, defaults to
+        PURGE_PAUSE_SECONDS
+    :param deadline: time.perf_counter() value after which no further batch is
+        started, see get_deadline
+    :return: number of deleted rows, batches, the duration of the purge and if
+        all rows were deleted
+    """
+
+    start = time.perf_counter()
+    batch_size = batch_size or PURGE_BATCH_SIZE
+    pause = PURGE_PAUSE_SECONDS if pause is None else pause
+    model = queryset.model._meta.label
+    queryset = queryset.order_by("pk")
+    deleted = 0
+    batches = 0
+    last_pk = None
+    complete = True
+    while True:
+        if deadline is not None and time.perf_counter() >= deadline:
+            complete = False
+            break
+
+        batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        pks = list(batch.values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            break
+
+        if raw:
+            count = _raw_delete(queryset, pks)
+        else:
+            count = queryset.model.objects.filter(pk__in=pks).delete()[1].get(model, 0)
+        deleted += count
+        batches += 1
+        PURGED_ROWS.labels(model).inc(count)
+        LOG.debug(f"Purged batch {batches} of {count} rows of {model}")
+        last_pk = pks[-1]
+
+        if len(pks) < batch_size:
+            break
+        time.sleep(pause)
+
+    result = PurgeResult(model, deleted, batches, time.perf_counter() - start, complete)
+    LOG.info(
+        f"Purged {result.deleted} rows of {model} in {result.batches} batches "
+        f"({result.duration:.2f}s)"
+        + ("" if complete else ", the remaining rows are purged by the next run")
+    )
+
+    return result
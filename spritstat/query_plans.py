@@ -0,0 +1,131 @@
+from django.db import connection
+from django.db.models import QuerySet
+import json
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from spritstat.models import DateRange, Location, Price
+
+
+# Query plans of the core price querysets on PostgreSQL, used by the query plan
+#  regression tests against a generated dataset (see the generatedata
+#  command). The plans are captured with EXPLAIN (FORMAT JSON) and checked for
+#  properties that keep the price requests fast on a production-scale table,
+#  e.g. that the prices of a location are read using an index. The structure
+#  of each plan is rendered without costs and row estimates, so changes of
+#  the plans can be reviewed as text diffs.
+
+QUERYSETS: Dict[str, Callable[[QuerySet], QuerySet]] = {
+    "PriceHistory": lambda prices: prices,
+    "PriceHour": lambda prices: prices.average_hour(),
+    "PriceDayOfWeek": lambda prices: prices.average_day_of_week(),
+    "PriceDayOfMonth": lambda prices: prices.average_day_of_month(),
+    "PriceStationFrequency": lambda prices: prices.station_frequency(),
+    "PriceStationFrequencyTopN": lambda prices: prices.station_frequency(5),
+}
+DATE_RANGES = (None, DateRange.OneMonth)
+
+SEQUENTIAL_SCAN = "Seq Scan"
+NESTED_LOOP = "Nested Loop"
+
+
+def queryset(name: str, location: Location, date_range: Optional[DateRange]):
+    # Queryset as it is executed by the price views.
+    return QUERYSETS[name](
+        Price.objects.filter(location=location).date_range(date_range)
+    )
+
+
+def explain(query: QuerySet) -> Dict:
+    """
+    Estimated plan of the queryset.
+
+    :param query: queryset to explain
+    :return: root node of the plan
+    """
+
+    return json.loads(query.explain(format="json"))[0]["Plan"]
+
+
+def sequential_scan_cost(table: str) -> float:
+    # Estimated cost of reading the whole table, the cost bounds of the plans
+    #  are relative to it, so they don't depend on the size of the dataset.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"EXPLAIN (FORMAT JSON) SELECT * FROM {connection.ops.quote_name(table)}"
+        )
+        plan = cursor.fetchone()[0]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    return plan[0]["Plan"]["Total Cost"]
+
+
+def nodes(plan: Dict) -> Iterator[Dict]:
+    # All nodes of the plan, including the plans of subqueries.
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from nodes(child)
+
+
+def scans(plan: Dict) -> List[Tuple[str, str]]:
+    # Relations read by the plan with the node type used to read them.
+    return [
+        (node["Relation Name"], node["Node Type"])
+        for node in nodes(plan)
+        if "Relation Name" in node
+    ]
+
+
+def sequential_scans(plan: Dict) -> Set[str]:
+    return {
+        relation for relation, node_type in scans(plan) if node_type == SEQUENTIAL_SCAN
+    }
+
+
+def nested_loop_sequential_scans(plan: Dict) -> Set[str]:
+    """
+    Relations which are read sequentially on the inner side of a nested loop,
+    so the whole relation is read for each row of the outer side. Nested loops
+    which look up the rows of the inner side using an index aren't returned.
+
+    :param plan: root node of the plan
+    :return: names of the relations
+    """
+
+    relations = set()
+    for node in nodes(plan):
+        if node["Node Type"] == NESTED_LOOP:
+            inner = node["Plans"][1]
+            relations.update(sequential_scans(inner))
+
+    return relations
+
+
+def render(plan: Dict, depth: int = 0) -> str:
+    """
+    Render the structure of the plan as text, without costs and row estimates,
+    so the rendering only changes if the plan changes.
+
+    :param plan: root node of the plan
+    :param depth: indentation of the node
+    :return: one line per node
+    """
+
+    parts = [plan["Node Type"]]
+    if "Strategy" in plan and plan["Strategy"] != "Plain":
+        parts.append(f"({plan['Strategy']})")
+    if "Join Type" in plan:
+        parts.append(f"({plan['Join Type']})")
+    if "Relation Name" in plan:
+        parts.append(f"on {plan['Relation Name']}")
+    if "Index Name" in plan:
+        parts.append(f"using {plan['Index Name']}")
+    if "Subplan Name" in plan:
+        parts.append(f"[{plan['Subplan Name']}]")
+
+    lines = ["  " * depth + " ".join(parts)]
+    for child in plan.get("Plans", []):
+        lines.append(render(child, depth + 1))
+
+    return "\n".join(lines)
@@ -7,7 +7,7 @@ from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
 from users.models import CustomUser
-from .models import IntroSettings, Location, Price, Settings, Station
+from .models import IntroSettings, Location, Price, PriceAlert, Settings, Station
 from .services import Token
 
 
@@ -48,8 +48,8 @@ class SettingsSerializer(serializers.ModelSerializer):
 
             # Also delete the currently scheduled notification if notifications
             #  have been deactivated
-            if not notifications_active and self.user.next_notification:
-                self.user.next_notification.delete()
+            if not notifications_active:
+                self.user.cancel_notification()
 
         return instance
 
@@ -78,9 +78,8 @@ class UnsubscribeSerializer(serializers.Serializer):
         self.user.settings.notifications_active = False
         self.user.settings.save()
 
-        # Delete the currently scheduled notifications
-        if self.user.next_notification:
-            self.user.next_notification.delete()
+        # Cancel the currently scheduled notification
+        self.user.cancel_notification()
 
 
 class LocationSerializer(serializers.ModelSerializer):
@@ -114,6 +113,79 @@ class LocationSerializer(serializers.ModelSerializer):
         return data
 
 
+# Fields provided by the location price serializer for each include option
+LOCATION_INCLUDE_FIELDS = {
+    "latest": (
+        "latest_price_datetime",
+        "latest_price_min_amount",
+        "cheapest_station_id",
+        "cheapest_station_name",
+    ),
+    "trend": ("price_change_24h", "price_change_7d"),
+}
+
+
+class LocationPriceSerializer(LocationSerializer):
+    # Location serializer that additionally provides the price data annotated
+    #  by LocationQuerySet. Only the fields of the requested includes are
+    #  provided.
+
+    latest_price_datetime = serializers.DateTimeField(read_only=True)
+    latest_price_min_amount = serializers.FloatField(read_only=True)
+    cheapest_station_id = serializers.IntegerField(read_only=True)
+    cheapest_station_name = serializers.CharField(read_only=True)
+    price_change_24h = serializers.FloatField(read_only=True)
+    price_change_7d = serializers.FloatField(read_only=True)
+
+    class Meta(LocationSerializer.Meta):
+        fields = LocationSerializer.Meta.fields + tuple(
+            field for fields in LOCATION_INCLUDE_FIELDS.values() for field in fields
+        )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        include = self.context.get("include", ())
+        for key, fields in LOCATION_INCLUDE_FIELDS.items():
+            if key not in include:
+                for field in fields:
+                    self.fields.pop(field)
+
+
+class PriceAlertSerializer(serializers.ModelSerializer):
+    class Meta:
+        ordering = ["id"]
+        model = PriceAlert
+        fields = (
+            "id",
+            "location",
+            "target_amount",
+            "active",
+            "triggered",
+            "last_sent_at",
+        )
+        read_only_fields = ("location", "triggered", "last_sent_at")
+        extra_kwargs = {"target_amount": {"min_value": 0}}
+
+    def validate(self, data):
+        if self.instance is None:
+            location = self.context["location"]
+            count = PriceAlert.objects.filter(location=location).count()
+            if count >= settings.PRICE_ALERT_LIMIT:
+                raise serializers.ValidationError(
+                    f"Price alert limit reached ({settings.PRICE_ALERT_LIMIT})"
+                )
+        return data
+
+    def update(self, instance: PriceAlert, validated_data: Dict) -> PriceAlert:
+        # A changed target amount has to be reached again first.
+        target_amount = validated_data.get("target_amount")
+        if target_amount is not None and target_amount != instance.target_amount:
+            instance.triggered = False
+
+        return super().update(instance, validated_data)
+
+
 class StationSerializer(serializers.ModelSerializer):
     class Meta:
         ordering = ["id"]
@@ -159,7 +231,13 @@ class PriceDayOfMonthSerializer(serializers.BaseSerializer):
 
 
 class PriceStationFrequencySerializer(serializers.BaseSerializer):
-    id = serializers.IntegerField(min_value=1)
+    station_id = serializers.IntegerField(min_value=1)
+    name = serializers.CharField()
+    address = serializers.CharField()
+    postal_code = serializers.CharField()
+    city = serializers.CharField()
+    latitude = serializers.DecimalField(max_digits=9, decimal_places=7)
+    longitude = serializers.DecimalField(max_digits=9, decimal_places=7)
     frequency = serializers.FloatField(min_value=0, max_value=1)
 
     def to_representation(self, instance):
@@ -1,15 +1,33 @@
-from django.contrib.sessions.management.commands.clearsessions import (
-    Command as ClearSessionCommand,
-)
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DBSessionStore
+from django.utils import timezone
+from importlib import import_module
 
+from .alert import evaluate_price_alerts
+from .deletion import purge_deleted
 from .notification import (
-    send_create_location_notification,
-    send_location_reminder_notification,
+    send_due_notifications,
+    send_price_alerts,
     Token,
 )
 from .price import request_location_prices
+from .task import compact_task_tables
+from ..purge import get_deadline, purge
+from ..tracing import traced_task
 
 
+@traced_task
 def clear_expired_sessions():
-    # Clear database backed sessions using the clearsessions command
-    ClearSessionCommand().handle()
+    # Clear expired sessions. Database backed sessions are deleted in batches,
+    #  so the session table isn't locked for long.
+
+    session_store = import_module(settings.SESSION_ENGINE).SessionStore
+    if not issubclass(session_store, DBSessionStore):
+        session_store.clear_expired()
+        return
+
+    purge(
+        session_store.get_model_class().objects.filter(expire_date__lt=timezone.now()),
+        raw=True,
+        deadline=get_deadline(),
+    )
@@ -0,0 +1,60 @@
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from django_q.tasks import async_task
+import logging
+
+from spritstat.models import Location, PriceAlert
+
+
+LOG = logging.getLogger(__name__)
+
+
+# Price alerts are evaluated whenever a new price of a location was saved.
+#  Most locations don't have any alerts, so this must only cost a single
+#  indexed query in that case. The notifications are sent by a separate task,
+#  so sending emails doesn't delay the price requests.
+
+
+def evaluate_price_alerts(location: Location, min_amount: float) -> None:
+    """
+    Check the active price alerts of the location against the new price and
+    enqueue the notifications of the matching alerts.
+
+    :param location: location the price was requested for
+    :param min_amount: minimum amount of the new price
+    """
+
+    alerts = list(PriceAlert.objects.filter(location=location, active=True))
+    if not alerts:
+        return
+
+    now = timezone.now()
+    min_interval = timedelta(seconds=settings.PRICE_ALERT_MIN_INTERVAL)
+    changed = []
+    matched = []
+    for alert in alerts:
+        if alert.triggered:
+            # Only rearm the alert once the price rose clearly above the target
+            #  amount, so small fluctuations don't send the alert repeatedly.
+            if min_amount > alert.target_amount + settings.PRICE_ALERT_HYSTERESIS:
+                alert.triggered = False
+                changed.append(alert)
+        elif min_amount <= alert.target_amount and (
+            alert.last_sent_at is None or now - alert.last_sent_at >= min_interval
+        ):
+            alert.triggered = True
+            alert.last_sent_at = now
+            changed.append(alert)
+            matched.append(alert)
+
+    if changed:
+        PriceAlert.objects.bulk_update(changed, ["triggered", "last_sent_at"])
+
+    if matched:
+        LOG.info(f"Price alerts {[a.id for a in matched]} matched for {location.id}")
+        async_task(
+            "spritstat.services.send_price_alerts",
+            [alert.id for alert in matched],
+            min_amount,
+        )
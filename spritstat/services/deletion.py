@@ -0,0 +1,68 @@
+from django.db.models import Q
+import logging
+
+from spritstat.models import Location, Price, Station
+from spritstat.tracing import traced_task
+from users.models import CustomUser
+from user_visit.models import UserVisit
+
+from ..purge import get_deadline, purge
+
+
+LOG = logging.getLogger(__name__)
+
+
+# Deleted users and locations are only hidden by the API. Their data is deleted
+#  here in batches, starting with the rows referencing others, so each delete
+#  only locks few rows and no cascade has to be collected. The purges share a
+#  time limit, once it is reached the remaining data is deleted by the next
+#  run.
+
+
+def _purge_location(location: Location, deadline: float) -> bool:
+    # Returns if the location was deleted.
+    for queryset in (
+        Price.stations.through.objects.filter(price__location=location),
+        Price.objects.filter(location=location),
+    ):
+        if not purge(queryset, raw=True, deadline=deadline).complete:
+            return False
+
+    # The location itself is deleted via the ORM, as this also deletes its
+    #  schedule.
+    location.delete()
+    return True
+
+
+def _purge_user(user: CustomUser, deadline: float) -> bool:
+    # Returns if the user was deleted.
+    for queryset in (
+        Station.users.through.objects.filter(customuser=user),
+        UserVisit.objects.filter(user=user),
+    ):
+        if not purge(queryset, raw=True, deadline=deadline).complete:
+            return False
+
+    # The remaining data of the user (e.g. settings, email addresses) is small
+    #  and deleted via the ORM.
+    user.delete()
+    return True
+
+
+@traced_task
+def purge_deleted() -> None:
+    # Delete the users and locations marked as deleted. The locations of
+    #  deleted users are deleted before the users.
+
+    deadline = get_deadline()
+    for location in Location.all_objects.filter(
+        Q(deleted_at__isnull=False) | Q(user__deleted_at__isnull=False)
+    ).iterator():
+        if not _purge_location(location, deadline):
+            return
+        LOG.info(f"Deleted location {location.id}")
+
+    for user in CustomUser.objects.filter(deleted_at__isnull=False).iterator():
+        if not _purge_user(user, deadline):
+            return
+        LOG.info(f"Deleted user {user.id}")
@@ -1,26 +1,29 @@
 from allauth.account.signals import user_signed_up
 from allauth.account.utils import user_pk_to_url_str
 from allauth.utils import build_absolute_uri
-from datetime import timedelta
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 from django.conf import settings
 from django.contrib.sites.models import Site
-from django.core.mail import EmailMultiAlternatives, EmailMessage
-from django.db.models.signals import pre_delete, post_save
+from django.core.mail import EmailMultiAlternatives, EmailMessage, get_connection
+from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.template import TemplateDoesNotExist
-from django.template.loader import render_to_string
-from django.utils.translation import activate
+from django.template.loader import get_template
+from django.utils.translation import override
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.crypto import salted_hmac
 from django.utils.encoding import force_str
-from django_q.models import Schedule
-from django_q.tasks import schedule
 import logging
-from typing import Union, Dict, Optional
+import time
+from typing import Callable, Union, Dict, List, Optional, Tuple
 
-from spritstat.models import Location
-from users.models import CustomUser
+from spritstat.models import Location, PriceAlert
+from spritstat.tracing import traced_task
+from users.models import CustomUser, Notifications
+from users.services import flush_activity
 
 
 LOG = logging.getLogger(__name__)
@@ -33,33 +36,37 @@ CREATE_LOCATION_REMINDER_TEMPLATE_PREFIX = "spritstat/email/create_location_remi
 LOCATION_REMINDER_DELAY_WEEKS = 4
 LOCATION_REMINDER_TEMPLATE_PREFIX = "spritstat/email/location_reminder"
 
+PRICE_ALERT_TEMPLATE_PREFIX = "spritstat/email/price_alert"
+
+
+@dataclass
+class Notification:
+    template_prefix: str
+    user: CustomUser
+    context: Dict = field(default_factory=dict)
+
 
 @receiver(user_signed_up)
 def schedule_create_location_notification(user: CustomUser, **kwargs) -> None:
     # Schedule a onetime notification after registration for this user.
 
-    user.next_notification = schedule(
-        "spritstat.services.send_create_location_notification",
-        user.id,
-        schedule_type=Schedule.ONCE,
-        next_run=timezone.now() + timedelta(days=CREATE_LOCATION_REMINDER_DELAY_DAYS),
+    user.schedule_notification(
+        Notifications.CREATE_LOCATION_REMINDER,
+        timezone.now() + timedelta(days=CREATE_LOCATION_REMINDER_DELAY_DAYS),
     )
-    user.save()
 
 
-def send_create_location_notification(user_id: int) -> None:
-    # Send the "please add location" notification to the provided user.
-
-    user = CustomUser.objects.get(id=user_id)
+def _get_create_location_notification(user: CustomUser) -> Optional[Notification]:
+    # Get the "please add location" notification for the provided user.
 
     # Skip the notification if the user isn't active anymore.
     if not user.is_active:
         LOG.info(
-            f"Skip sending create location reminder for {user_id} as user is inactive"
+            f"Skip sending create location reminder for {user.id} as user is inactive"
         )
-        return
+        return None
 
-    _send_mail(CREATE_LOCATION_REMINDER_TEMPLATE_PREFIX, user)
+    return Notification(CREATE_LOCATION_REMINDER_TEMPLATE_PREFIX, user)
 
 
 @receiver(post_save)
@@ -81,69 +88,182 @@ def schedule_location_reminder_notification(
     if not user.settings.notifications_active:
         return
 
-    if user.next_notification:
-        user.next_notification.delete()
-
-    next_run = timezone.now() + timedelta(weeks=LOCATION_REMINDER_DELAY_WEEKS)
-    user.next_notification = schedule(
-        "spritstat.services.send_location_reminder_notification",
-        instance.id,
-        schedule_type=Schedule.ONCE,
-        next_run=next_run,
+    user.schedule_notification(
+        Notifications.LOCATION_REMINDER,
+        timezone.now() + timedelta(weeks=LOCATION_REMINDER_DELAY_WEEKS),
     )
-    user.save()
-
-
-@receiver(pre_delete)
-def delete_location_reminder_notification(instance: Location, **kwargs) -> None:
-    if isinstance(instance, Location) and instance.user.next_notification:
-        instance.user.next_notification.delete()
 
 
-def send_location_reminder_notification(location_id: int) -> None:
-    # Send the "have a look at your new location" notification to the user
-    #  owning the provided location.
+def _get_location_reminder_notification(user: CustomUser) -> Optional[Notification]:
+    # Get the "have a look at your new location" notification for the latest
+    #  location of the provided user. The buffered activities have to be
+    #  flushed before.
 
-    user = Location.objects.get(id=location_id).user
+    location = user.locations.order_by("-id").first()
+    if location is None:
+        LOG.info(f"Skip sending location reminder for {user.id} as no location exists")
+        return None
 
     # Skip the notification if the user isn't active anymore.
     if not user.is_active:
         LOG.info(
-            f"Skip sending location reminder for {location_id} as user is inactive"
+            f"Skip sending location reminder for {location.id} as user is inactive"
         )
-        return
+        return None
 
     # Skip the notification if the user was active after the notification was
     #  scheduled
-    datetime_scheduled = timezone.now() - timedelta(weeks=LOCATION_REMINDER_DELAY_WEEKS)
+    datetime_scheduled = user.next_notification_at - timedelta(
+        weeks=LOCATION_REMINDER_DELAY_WEEKS
+    )
     if user.last_activity > datetime_scheduled:
-        LOG.info(f"Skip sending location reminder for {location_id} due to activity")
+        LOG.info(f"Skip sending location reminder for {location.id} due to activity")
+        return None
+
+    return Notification(
+        LOCATION_REMINDER_TEMPLATE_PREFIX, user, {"location_id": location.id}
+    )
+
+
+_NOTIFICATION_GETTERS: Dict[str, Callable[[CustomUser], Optional[Notification]]] = {
+    Notifications.CREATE_LOCATION_REMINDER: _get_create_location_notification,
+    Notifications.LOCATION_REMINDER: _get_location_reminder_notification,
+}
+
+
+@traced_task
+def send_due_notifications() -> None:
+    # Send the notifications of all users whose notification is due in
+    #  batches. Each batch is sent over a single connection and we pause
+    #  between the batches to not exceed the rate limit of the mail server.
+    # The notification of a user is cleared right after it was sent, so the
+    #  remaining notifications are sent by the next run if the time limit is
+    #  reached or sending failed, without sending the others again.
+
+    start = time.perf_counter()
+    now = timezone.now()
+    flush_activity()
+    while True:
+        users = list(
+            CustomUser.objects.filter(next_notification_at__lte=now).order_by(
+                "next_notification_at", "id"
+            )[: settings.NOTIFICATION_BATCH_SIZE]
+        )
+        if not users:
+            break
+
+        notifications = []
+        skipped = []
+        for user in users:
+            notification = _NOTIFICATION_GETTERS[user.next_notification_type](user)
+            if notification:
+                notifications.append(notification)
+            else:
+                skipped.append(user.id)
+
+        _clear_notifications(skipped, now)
+        _send_notifications(
+            notifications,
+            lambda notification: _clear_notifications([notification.user.id], now),
+        )
+        LOG.info(f"Sent {len(notifications)} of {len(users)} due notifications")
+
+        if (
+            len(users) < settings.NOTIFICATION_BATCH_SIZE
+            or time.perf_counter() - start > settings.NOTIFICATION_TIME_LIMIT_SECONDS
+        ):
+            break
+        time.sleep(settings.NOTIFICATION_BATCH_PAUSE_SECONDS)
+
+
+def _clear_notifications(user_ids: List[int], now: datetime) -> None:
+    # Notifications scheduled in the meantime are due in the future and
+    #  therefore kept.
+    if not user_ids:
         return
 
-    _send_mail(LOCATION_REMINDER_TEMPLATE_PREFIX, user, {"location_id": location_id})
+    CustomUser.objects.filter(id__in=user_ids, next_notification_at__lte=now).update(
+        next_notification_type=None, next_notification_at=None
+    )
+
+
+@traced_task
+def send_price_alerts(alert_ids: List[int], min_amount: float) -> None:
+    # Send the notifications of the price alerts that matched the new minimum
+    #  price, see spritstat.services.evaluate_price_alerts.
+
+    alerts = (
+        PriceAlert.objects.filter(
+            id__in=alert_ids,
+            active=True,
+            location__deleted_at__isnull=True,
+            location__user__is_active=True,
+            location__user__settings__notifications_active=True,
+        )
+        .select_related("location__user")
+        .order_by("target_amount")
+    )
+
+    # Only notify once per location if the price dropped below multiple
+    #  targets at once.
+    notifications = {}
+    for alert in alerts:
+        notifications.setdefault(
+            alert.location_id,
+            Notification(
+                PRICE_ALERT_TEMPLATE_PREFIX,
+                alert.location.user,
+                {
+                    "location_id": alert.location_id,
+                    "location_name": alert.location.name,
+                    "target_amount": alert.target_amount,
+                    "min_amount": min_amount,
+                },
+            ),
+        )
 
+    _send_notifications(list(notifications.values()))
 
-def _send_mail(
-    email_template_prefix: str,
-    user: CustomUser,
-    additional_context: Optional[Dict] = None,
+
+def _send_notifications(
+    notifications: List[Notification],
+    on_sent: Optional[Callable[[Notification], None]] = None,
 ) -> None:
-    current_site = Site.objects.get_current()
-    unsubscribe_url = _get_unsubscribe_url(user)
-    context = {
-        "current_site": current_site,
-        "unsubscribe_url": unsubscribe_url,
-        "has_unsubscribe": True,
-    }
-    if additional_context:
-        context.update(additional_context)
+    # Render the notifications grouped by template and locale, so each template
+    #  is only loaded once, and send them over a single connection. Sending
+    #  stops at the first message that fails, on_sent is called after each
+    #  message that was sent.
+    if not notifications:
+        return
 
-    # If the user has a locale set activate it before we render the email.
-    if user.locale:
-        activate(user.locale)
+    current_site = Site.objects.get_current()
+    groups: Dict[Tuple[str, Optional[str]], List[Notification]] = defaultdict(list)
+    for notification in notifications:
+        groups[(notification.template_prefix, notification.user.locale)].append(
+            notification
+        )
 
-    msg = _render_mail(email_template_prefix, user.email, context)
-    msg.send()
+    messages = []
+    for (template_prefix, locale), group in groups.items():
+        # Render the email in the locale of the user if it is set.
+        with override(locale or settings.LANGUAGE_CODE):
+            renderer = _MailRenderer(template_prefix, current_site)
+            for notification in group:
+                context = {
+                    "current_site": current_site,
+                    "unsubscribe_url": _get_unsubscribe_url(notification.user),
+                    "has_unsubscribe": True,
+                }
+                context.update(notification.context)
+                messages.append(
+                    (notification, renderer.render(notification.user.email, context))
+                )
+
+    with get_connection() as connection:
+        for notification, message in messages:
+            connection.send_messages([message])
+            if on_sent:
+                on_sent(notification)
 
 
 def _get_unsubscribe_url(user: CustomUser) -> str:
@@ -155,43 +275,53 @@ def _get_unsubscribe_url(user: CustomUser) -> str:
     return url
 
 
-def _render_mail(
-    template_prefix: str, email: str, context: Dict
-) -> Union[EmailMultiAlternatives, EmailMessage]:
-    to = [email] if isinstance(email, str) else email
-
-    subject = render_to_string(f"{template_prefix}_subject.txt")
-    # remove superfluous line breaks
-    subject = " ".join(subject.splitlines()).strip()
-    subject = _format_email_subject(subject)
-
-    from_email = settings.DEFAULT_FROM_EMAIL
-
-    bodies = {}
-    for ext in ["html", "txt"]:
-        try:
-            template_name = f"{template_prefix}_message.{ext}"
-            bodies[ext] = render_to_string(template_name, context).strip()
-        except TemplateDoesNotExist:
-            if ext == "txt" and not bodies:
-                # We need at least one body
-                raise
-    if "txt" in bodies:
-        msg = EmailMultiAlternatives(subject, bodies["txt"], from_email, to)
-        if "html" in bodies:
-            msg.attach_alternative(bodies["html"], "text/html")
-    else:
-        msg = EmailMessage(subject, bodies["html"], from_email, to)
-        msg.content_subtype = "html"  # Main content is now text/html
-
-    return msg
-
-
-def _format_email_subject(subject: str) -> str:
+class _MailRenderer:
+    # Renders the emails of a template. The templates are only loaded once for
+    #  all emails.
+
+    def __init__(self, template_prefix: str, current_site: Site) -> None:
+        self._current_site = current_site
+        self._subject_template = get_template(f"{template_prefix}_subject.txt")
+
+        self._templates = {}
+        for ext in ["html", "txt"]:
+            try:
+                self._templates[ext] = get_template(f"{template_prefix}_message.{ext}")
+            except TemplateDoesNotExist:
+                if ext == "txt" and not self._templates:
+                    # We need at least one body
+                    raise
+
+    def render(
+        self, email: str, context: Dict
+    ) -> Union[EmailMultiAlternatives, EmailMessage]:
+        to = [email] if isinstance(email, str) else email
+        from_email = settings.DEFAULT_FROM_EMAIL
+
+        subject = self._subject_template.render(context)
+        # remove superfluous line breaks
+        subject = " ".join(subject.splitlines()).strip()
+        subject = _format_email_subject(subject, self._current_site)
+
+        bodies = {
+            ext: template.render(context).strip()
+            for ext, template in self._templates.items()
+        }
+        if "txt" in bodies:
+            msg = EmailMultiAlternatives(subject, bodies["txt"], from_email, to)
+            if "html" in bodies:
+                msg.attach_alternative(bodies["html"], "text/html")
+        else:
+            msg = EmailMessage(subject, bodies["html"], from_email, to)
+            msg.content_subtype = "html"  # Main content is now text/html
+
+        return msg
+
+
+def _format_email_subject(subject: str, current_site: Site) -> str:
     prefix = settings.ACCOUNT_EMAIL_SUBJECT_PREFIX
     if prefix is None:
-        site = Site.objects.get_current()
-        prefix = "[{name}] ".format(name=site.name)
+        prefix = "[{name}] ".format(name=current_site.name)
 
     return prefix + force_str(subject)
 
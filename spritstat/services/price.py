@@ -1,13 +1,19 @@
+from contextlib import contextmanager
 from dataclasses import dataclass
 from decimal import Decimal
 from enum import Enum, unique
 import json
 import logging
 from statistics import mean, median
-from typing import Dict, List, Tuple, Union, Optional
+import time
+from typing import Dict, Iterator, List, Tuple, Union, Optional
 import urllib3
 
 from spritstat import models
+from spritstat.metrics import ECONTROL_REQUEST_DURATION, INGESTION_STAGE_DURATION
+from spritstat.profiling import profiled_task
+from spritstat.tracing import span, traced_task
+from .alert import evaluate_price_alerts
 
 
 _LOG = logging.getLogger(__name__)
@@ -91,6 +97,15 @@ class PriceStatistics:
         )
 
 
+@contextmanager
+def _stage(name: str) -> Iterator[None]:
+    # Measure the duration of a stage of the price ingestion.
+    with INGESTION_STAGE_DURATION.labels(name).time(), span(f"ingestion {name}"):
+        yield
+
+
+@traced_task
+@profiled_task("PROFILING_PRICE_REQUEST_PERCENTAGE")
 def request_location_prices(location_id: int) -> None:
     """
     Request the top prices for the specified location.
@@ -118,12 +133,14 @@ def request_location_prices(location_id: int) -> None:
     if not prices:
         return
 
-    stations, statistics = _calculate_statistics(prices)
+    with _stage("statistics"):
+        stations, statistics = _calculate_statistics(prices)
 
     if not stations:
         raise EControlAPIError(f"Invalid price object received: {prices}")
 
-    _create_price(location, stations, statistics)
+    with _stage("write"):
+        _create_price(location, stations, statistics)
 
 
 def _request_prices(url: str) -> Tuple[Price]:
@@ -135,14 +152,16 @@ def _request_prices(url: str) -> Tuple[Price]:
     :return: tuple of parsed prices
     """
 
-    json_data = _execute_api_request(url)
+    with _stage("fetch"):
+        json_data = _execute_api_request(url)
 
     prices = []
-    for item in json_data:
-        result = _parse_prices(item)
+    with _stage("parse"):
+        for item in json_data:
+            result = _parse_prices(item)
 
-        if result:
-            prices.append(result)
+            if result:
+                prices.append(result)
 
     return tuple(prices)
 
@@ -153,7 +172,17 @@ def _execute_api_request(url: str) -> Dict:
     """
 
     http = urllib3.PoolManager()
-    r = http.request("GET", url)
+    status = "error"
+    start = time.perf_counter()
+    with span("GET E-Control API", {"http.method": "GET", "http.url": url}) as s:
+        try:
+            r = http.request("GET", url)
+            status = str(r.status)
+            s.set_attribute("http.status_code", r.status)
+        finally:
+            ECONTROL_REQUEST_DURATION.labels(status).observe(
+                time.perf_counter() - start
+            )
 
     if r.status != 200:
         json_error = json.loads(r.data.decode("utf-8"))
@@ -271,6 +300,7 @@ def _create_price(
         median_amount=price_statistics.median_amount,
     )
     price.stations.add(*station_objects)
+    evaluate_price_alerts(location, price_statistics.min_amount)
 
 
 def _get_or_create_stations(
@@ -284,20 +314,25 @@ def _get_or_create_stations(
     :return: list of corresponding database objects
     """
 
-    objects = []
-    for s in stations:
-        obj = models.Station.objects.get_or_create(
+    # The stations are loaded, created and added to the user in bulk, so the
+    #  number of queries doesn't depend on the number of stations.
+    objects = models.Station.objects.in_bulk([s.id for s in stations])
+    new_objects = {
+        s.id: models.Station(
             pk=s.id,
-            defaults={
-                "name": s.name,
-                "address": s.address,
-                "postal_code": s.postal_code,
-                "city": s.city,
-                "latitude": s.latitude,
-                "longitude": s.longitude,
-            },
+            name=s.name,
+            address=s.address,
+            postal_code=s.postal_code,
+            city=s.city,
+            latitude=s.latitude,
+            longitude=s.longitude,
         )
-        obj[0].users.add(location.user)
-        objects.append(obj[0])
-
-    return objects
+        for s in stations
+        if s.id not in objects
+    }
+    # Stations created concurrently by another task are kept.
+    models.Station.objects.bulk_create(new_objects.values(), ignore_conflicts=True)
+    objects.update(new_objects)
+    location.user.stations.add(*objects.values())
+
+    return [objects[s.id] for s in stations]
@@ -0,0 +1,75 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection
+from django.db.models import Model
+from django.utils import timezone
+from django_q.models import Failure, Schedule, Success, Task
+import logging
+from typing import Dict, Iterable, Type
+
+from ..metrics import observe_table_size
+from ..purge import get_deadline, purge
+from ..tracing import traced_task
+
+
+LOG = logging.getLogger(__name__)
+
+
+def get_table_sizes(models: Iterable[Type[Model]]) -> Dict[str, Dict[str, int]]:
+    # Get the number of rows and the size in bytes of the tables of the
+    #  provided models. On PostgreSQL the number of rows is the estimate of the
+    #  planner, as counting the rows of large tables is expensive.
+
+    tables = {model._meta.db_table for model in models}
+    if connection.vendor != "postgresql":
+        return {
+            model._meta.db_table: {"rows": model._base_manager.count(), "bytes": 0}
+            for model in models
+        }
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname, reltuples::bigint, pg_total_relation_size(oid) "
+            "FROM pg_class WHERE relkind = 'r' AND relname = ANY(%s)",
+            [list(tables)],
+        )
+        return {
+            table: {"rows": max(rows, 0), "bytes": size}
+            for table, rows, size in cursor.fetchall()
+        }
+
+
+@traced_task
+def compact_task_tables() -> None:
+    # Delete the results of executed tasks after the configured retention
+    #  period and the executed one-off schedules. The purges share the time
+    #  limit, the rows left are deleted by the next run.
+
+    now = timezone.now()
+    deadline = get_deadline()
+    purge(
+        Success.objects.filter(
+            stopped__lt=now - timedelta(days=settings.TASK_SUCCESS_RETENTION_DAYS)
+        ),
+        raw=True,
+        deadline=deadline,
+    )
+    purge(
+        Failure.objects.filter(
+            stopped__lt=now - timedelta(days=settings.TASK_FAILURE_RETENTION_DAYS)
+        ),
+        raw=True,
+        deadline=deadline,
+    )
+    # Executed one-off schedules without repeats are deleted by the scheduler,
+    #  the others are kept with zero repeats. No other rows reference one-off
+    #  schedules, so they can be deleted directly.
+    purge(
+        Schedule.objects.filter(schedule_type=Schedule.ONCE, repeats=0),
+        raw=True,
+        deadline=deadline,
+    )
+
+    for table, size in get_table_sizes([Task, Schedule]).items():
+        LOG.info(f"Table {table}: {size['rows']} rows, {size['bytes']} bytes")
+        observe_table_size(table, size["rows"], size["bytes"])
@@ -1,7 +1,7 @@
 import os
 from pathlib import Path
 
-from .environment import Database, Email, Settings, Frontend
+from .environment import Cache, Database, Email, Settings, Frontend
 
 # General settings
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -57,16 +57,20 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "spritstat.middleware.TracingMiddleware",
+    "spritstat.middleware.QueryBudgetMiddleware",
+    "spritstat.middleware.SlowQueryMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "spritstat.middleware.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
-    "user_visit.middleware.UserVisitMiddleware",
+    "user_statistics.middleware.BufferedUserVisitMiddleware",
     "allauth.account.middleware.AccountMiddleware",
 ]
 
@@ -94,6 +98,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "spritstat.wsgi.application"
 
+# Use the async variants of the price and location views. This should only be
+#  activated if the application is served via ASGI.
+ASYNC_VIEWS = Settings.ASYNC_VIEWS
+
 
 # Database
 DATABASES = {
@@ -107,6 +115,16 @@ DATABASES = {
     }
 }
 
+# Cache
+# A cache shared by all processes (e.g. memcached or redis) is required to
+#  buffer user activity across the web and scheduler processes.
+CACHES = {
+    "default": {
+        "BACKEND": Cache.BACKEND,
+        "LOCATION": Cache.LOCATION,
+    }
+}
+
 # Email
 EMAIL_BACKEND = Email.BACKEND
 EMAIL_HOST = Email.HOST
@@ -153,6 +171,9 @@ CSRF_COOKIE_SAMESITE = "Strict"
 CSRF_COOKIE_HTTPONLY = False
 CSRF_COOKIE_SECURE = Settings.SECURE_COOKIE
 CSRF_TRUSTED_ORIGINS = [f"https://{DOMAIN}"] if Settings.SECURE_COOKIE else []
+# Use "django.contrib.sessions.backends.cached_db" to read sessions from the
+#  cache, which should be shared by all processes in this case.
+SESSION_ENGINE = Settings.SESSION_ENGINE
 SESSION_COOKIE_AGE = 2419200  # 4 weeks
 SESSION_COOKIE_SAMESITE = "Strict"
 SESSION_COOKIE_HTTPONLY = True
@@ -194,6 +215,88 @@ REST_AUTH = {
 # Maximum number of locations a user is allowed to create
 LOCATION_LIMIT = 10
 
+# Number of days the results of successful and failed tasks are kept
+TASK_SUCCESS_RETENTION_DAYS = 7
+TASK_FAILURE_RETENTION_DAYS = 30
+
+# Minimum time in seconds between two recorded activities of a user
+LAST_ACTIVITY_GRANULARITY = 15 * 60
+
+# Number of notifications sent over one mail server connection, the pause in
+#  seconds between two batches and the time after which no further batch is
+#  started. The time limit has to stay below the timeout of the scheduler.
+NOTIFICATION_BATCH_SIZE = 50
+NOTIFICATION_BATCH_PAUSE_SECONDS = 1
+NOTIFICATION_TIME_LIMIT_SECONDS = 3
+
+# Time in seconds after which a purge of a scheduler task doesn't start a
+#  further batch, the remaining rows are deleted by the next run. The time
+#  limit has to stay below the timeout of the scheduler.
+PURGE_TIME_LIMIT_SECONDS = 3
+
+# Maximum number of price alerts per location
+PRICE_ALERT_LIMIT = 5
+
+# Amount the minimum price has to rise above the target amount of a sent price
+#  alert before it can be sent again, and the minimum time in seconds between
+#  two notifications of the same alert.
+PRICE_ALERT_HYSTERESIS = 0.02
+PRICE_ALERT_MIN_INTERVAL = 24 * 60 * 60
+
+# Maximum rate of password validation requests per session. The frontend
+#  debounces the requests by 200ms.
+PASSWORD_VALIDATION_THROTTLE_RATE = "10/s"
+
+# Maximum number of queries and database time in milliseconds of a request by
+#  URL name, the default applies to all other views. Requests exceeding their
+#  budget are logged and the tests of the endpoints fail if they exceed the
+#  number of queries. The queries include loading the session and the user.
+QUERY_BUDGETS = {
+    "default": {"queries": 10, "db_time_ms": 250},
+    "locations": {"queries": 3},
+    "location_detail": {"queries": 4},
+    "prices_history": {"queries": 6},
+    "prices_hour": {"queries": 5},
+    "prices_day_of_week": {"queries": 5},
+    "prices_day_of_month": {"queries": 5},
+    "prices_station_frequency": {"queries": 5},
+    "price_alerts": {"queries": 5},
+    "stations": {"queries": 3},
+}
+
+# Bearer token the metrics endpoint requires. If no token is set, the metrics
+#  are only served to clients on the same host in debug mode.
+METRICS_TOKEN = Settings.METRICS_TOKEN
+
+# Exporter of the traces, either "console" or the path of a file the spans are
+#  appended to. Tracing is disabled if no exporter is set.
+TRACING_EXPORTER = Settings.TRACING_EXPORTER
+
+# Interval in seconds at which the stack of a profiled request or task is
+#  sampled, the maximum size in bytes of all stored profiles and the percentage
+#  of price requests of the scheduler that are profiled.
+PROFILING_INTERVAL = 0.005
+PROFILING_STORAGE_LIMIT = 50 * 1024 * 1024
+PROFILING_PRICE_REQUEST_PERCENTAGE = Settings.PROFILING_PRICE_REQUEST_PERCENTAGE
+
+# Path of the file the queries that take longer than the threshold are logged
+#  to, the queries aren't logged if no path is set. The file is rotated once it
+#  exceeds the maximum size, the given number of rotated files is kept.
+SLOW_QUERY_LOG = Settings.SLOW_QUERY_LOG
+SLOW_QUERY_THRESHOLD_MS = Settings.SLOW_QUERY_THRESHOLD_MS
+SLOW_QUERY_LOG_MAX_BYTES = 10 * 1024 * 1024
+SLOW_QUERY_LOG_BACKUP_COUNT = 3
+# Log the SQL and the parameters of the slow queries to be able to explain
+#  them, except for queries of the tables with the given prefixes, which
+#  contain personal data, passwords and sessions.
+SLOW_QUERY_LOG_PARAMS = Settings.SLOW_QUERY_LOG_PARAMS
+SLOW_QUERY_LOG_EXCLUDED_TABLES = (
+    "users_",
+    "django_session",
+    "account_",
+    "socialaccount_",
+)
+
 
 # Scheduler configuration
 Q_CLUSTER = {
@@ -203,6 +306,11 @@ Q_CLUSTER = {
     "max_attempts": 3,
     "catch_up": False,
     "orm": "default",
+    # The successful tasks are deleted after their retention period by the
+    #  compact_task_tables task. The save limit bounds the table in case the
+    #  task doesn't keep up, django-q counts the successful tasks on every save
+    #  to enforce it.
+    "save_limit": 10000,
 }
 
 
@@ -0,0 +1,257 @@
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils import timezone
+from django_q.signals import pre_execute
+import hashlib
+import json
+import logging
+from logging.handlers import RotatingFileHandler
+import os
+import re
+from statistics import mean, quantiles
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+# Opt-in log of the queries that take longer than SLOW_QUERY_THRESHOLD_MS, for
+#  databases without pg_stat_statements. Every slow query is appended as one
+#  JSON object per line to SLOW_QUERY_LOG together with its fingerprint, the
+#  view or task that executed it and its duration. The file is rotated by size,
+#  the slowqueries command reports the queries of all rotated files.
+# The rotation isn't coordinated between the processes, so a few queries might
+#  be lost while the file is rotated.
+# Only the fingerprint of a query is logged, as its parameters can contain
+#  personal data. If SLOW_QUERY_LOG_PARAMS is set, the SQL and the parameters
+#  are logged as well, so the slowqueries command can explain the query, except
+#  for queries of the tables in SLOW_QUERY_LOG_EXCLUDED_TABLES (users,
+#  sessions and accounts).
+
+_source: ContextVar[str] = ContextVar("slow_query_source", default="")
+_logger = logging.getLogger(__name__)
+_logger.propagate = False
+_handler: Optional[RotatingFileHandler] = None
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDERS = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)")
+_ROWS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Normalize the SQL, so queries which only differ by their parameters have
+    the same fingerprint. Literals are replaced by placeholders and lists of
+    placeholders, e.g. of IN clauses or inserted rows, are collapsed.
+
+    :param sql: SQL of the query
+    :return: normalized SQL
+    """
+
+    sql = _STRING.sub("%s", sql)
+    sql = _NUMBER.sub("%s", sql)
+    sql = _PLACEHOLDERS.sub("(...)", sql)
+    sql = _ROWS.sub("(...), ...", sql)
+
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def fingerprint_id(normalized_sql: str) -> str:
+    # Short ID to refer to a fingerprint in the report.
+    return hashlib.md5(normalized_sql.encode()).hexdigest()[:8]
+
+
+def set_source(source: str):
+    # Set the view or task the following queries of this context are
+    #  attributed to, the token resets the source.
+    return _source.set(source)
+
+
+def reset_source(token) -> None:
+    _source.reset(token)
+
+
+def is_enabled() -> bool:
+    return _handler is not None
+
+
+def configure(path: Optional[str] = None) -> None:
+    """
+    Enable the log of slow queries if a path is configured.
+
+    :param path: path of the log file, defaults to SLOW_QUERY_LOG
+    """
+
+    global _handler
+
+    path = path or settings.SLOW_QUERY_LOG
+    if not path:
+        return
+
+    disable()
+    # The file is opened on the first slow query, so it isn't shared by the
+    #  processes forked from the process which loaded the application.
+    _handler = RotatingFileHandler(
+        path,
+        maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+        backupCount=settings.SLOW_QUERY_LOG_BACKUP_COUNT,
+        delay=True,
+    )
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    _logger.addHandler(_handler)
+    _logger.setLevel(logging.INFO)
+    for connection in connections.all(initialized_only=True):
+        _install(connection)
+
+
+def disable() -> None:
+    global _handler
+
+    if not _handler:
+        return
+
+    for connection in connections.all(initialized_only=True):
+        if _log_query in connection.execute_wrappers:
+            connection.execute_wrappers.remove(_log_query)
+    _logger.removeHandler(_handler)
+    _handler.close()
+    _handler = None
+
+
+def _install(connection) -> None:
+    # The wrapper stays installed if the connection is reopened.
+    if _log_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_log_query)
+
+
+@receiver(connection_created)
+def install_query_logger(sender, connection, **kwargs) -> None:
+    if _handler:
+        _install(connection)
+
+
+@receiver(pre_execute)
+def set_task_source(sender: str, task: Dict, **kwargs) -> None:
+    # The tasks are executed one after another by the worker process, so the
+    #  source is valid until the next task is executed.
+    if _handler:
+        _source.set(f"task {task['func']}")
+
+
+def is_excluded(sql: str) -> bool:
+    # Whether the query uses one of the tables whose parameters aren't logged,
+    #  the table names are quoted in the queries of the ORM.
+    prefixes = "|".join(
+        re.escape(prefix) for prefix in settings.SLOW_QUERY_LOG_EXCLUDED_TABLES
+    )
+    return re.search(rf'(?<!\w)"?(?:{prefixes})', sql) is not None
+
+
+def _log_query(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        if _handler and duration_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+            query = {
+                "time": timezone.now().isoformat(),
+                "database": context["connection"].alias,
+                "source": _source.get(),
+                "duration_ms": round(duration_ms, 3),
+                "fingerprint": fingerprint(sql),
+                "many": many,
+            }
+            if settings.SLOW_QUERY_LOG_PARAMS and not is_excluded(sql):
+                query["sql"] = sql
+                query["params"] = None if many else params
+            _logger.info(json.dumps(query, default=str))
+
+
+def read_log(path: str) -> Iterator[Dict]:
+    """
+    Read the slow queries of the log and its rotated files, lines that can't
+    be parsed (e.g. a line that was written while the file was rotated) are
+    skipped.
+
+    :param path: path of the log file
+    :return: logged queries, the oldest first
+    """
+
+    paths = [
+        f"{path}.{index}"
+        for index in range(settings.SLOW_QUERY_LOG_BACKUP_COUNT, 0, -1)
+        if os.path.exists(f"{path}.{index}")
+    ]
+    if os.path.exists(path):
+        paths.append(path)
+
+    for log_path in paths:
+        with open(log_path) as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+@dataclass
+class QueryStatistics:
+    fingerprint: str
+    durations_ms: List[float] = field(default_factory=list)
+    sources: Counter = field(default_factory=Counter)
+    # The slowest execution, which is used to explain the query
+    slowest: Optional[Dict] = None
+
+    @property
+    def id(self) -> str:
+        return fingerprint_id(self.fingerprint)
+
+    @property
+    def count(self) -> int:
+        return len(self.durations_ms)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(self.durations_ms)
+
+    @property
+    def mean_ms(self) -> float:
+        return mean(self.durations_ms)
+
+    @property
+    def p95_ms(self) -> float:
+        if len(self.durations_ms) == 1:
+            return self.durations_ms[0]
+
+        return quantiles(self.durations_ms, n=100, method="inclusive")[94]
+
+    @property
+    def max_ms(self) -> float:
+        return max(self.durations_ms)
+
+
+def aggregate(queries: Iterable[Dict]) -> List[QueryStatistics]:
+    """
+    Aggregate the logged queries by fingerprint.
+
+    :param queries: logged queries
+    :return: statistics of each fingerprint, in no particular order
+    """
+
+    statistics: Dict[str, QueryStatistics] = {}
+    for query in queries:
+        entry = statistics.setdefault(
+            query["fingerprint"], QueryStatistics(query["fingerprint"])
+        )
+        entry.durations_ms.append(query["duration_ms"])
+        entry.sources[query["source"] or "-"] += 1
+        if not entry.slowest or query["duration_ms"] > entry.slowest["duration_ms"]:
+            entry.slowest = query
+
+    return list(statistics.values())
@@ -0,0 +1,105 @@
+from django.test import RequestFactory, SimpleTestCase, override_settings
+import gzip
+import os
+import tempfile
+from unittest.mock import Mock
+
+from spritstat.assets import AssetNotFoundError, CachedAsset
+
+
+class TestCachedAsset(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+        file = tempfile.NamedTemporaryFile(delete=False)
+        file.write(b"test content")
+        file.close()
+        self.path = file.name
+        self.addCleanup(os.remove, self.path)
+
+        self.load = Mock(side_effect=self._read)
+        self.asset = CachedAsset("text/plain", self.load, lambda: [self.path])
+
+    def _read(self) -> bytes:
+        with open(self.path, "rb") as file:
+            return file.read()
+
+    def _write(self, content: bytes) -> None:
+        stat = os.stat(self.path)
+        with open(self.path, "wb") as file:
+            file.write(content)
+        # Ensure that the modification time changes
+        os.utime(self.path, (stat.st_atime, stat.st_mtime + 1))
+
+    def test_loaded_once(self):
+        for _ in range(3):
+            response = self.asset.response(self.factory.get("/"))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, b"test content")
+            self.assertEqual(response["Content-Type"], "text/plain")
+            self.assertNotIn("Content-Encoding", response)
+
+        self.load.assert_called_once()
+
+    def test_gzip(self):
+        response = self.asset.response(
+            self.factory.get("/", HTTP_ACCEPT_ENCODING="gzip, deflate")
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), b"test content")
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_encoding_rejected(self):
+        response = self.asset.response(
+            self.factory.get("/", HTTP_ACCEPT_ENCODING="gzip;q=0, identity")
+        )
+        self.assertEqual(response.content, b"test content")
+        self.assertNotIn("Content-Encoding", response)
+
+    def test_not_modified(self):
+        response = self.asset.response(self.factory.get("/"))
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('"'))
+
+        response = self.asset.response(self.factory.get("/", HTTP_IF_NONE_MATCH=etag))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        # The ETag of a compressed variant matches as well
+        gzip_etag = self.asset.response(
+            self.factory.get("/", HTTP_ACCEPT_ENCODING="gzip")
+        )["ETag"]
+        self.assertNotEqual(gzip_etag, etag)
+        response = self.asset.response(
+            self.factory.get("/", HTTP_IF_NONE_MATCH=gzip_etag)
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_mismatch(self):
+        response = self.asset.response(self.factory.get("/", HTTP_IF_NONE_MATCH='"x"'))
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(DEBUG=False)
+    def test_no_reload_in_production(self):
+        self.asset.response(self.factory.get("/"))
+        self._write(b"changed")
+
+        response = self.asset.response(self.factory.get("/"))
+        self.assertEqual(response.content, b"test content")
+
+    @override_settings(DEBUG=True)
+    def test_reload_in_debug(self):
+        response = self.asset.response(self.factory.get("/"))
+        etag = response["ETag"]
+        self._write(b"changed")
+
+        response = self.asset.response(self.factory.get("/"))
+        self.assertEqual(response.content, b"changed")
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(self.load.call_count, 2)
+
+    def test_not_found(self):
+        asset = CachedAsset("text/plain", Mock(side_effect=AssetNotFoundError), list)
+        with self.assertRaises(AssetNotFoundError):
+            asset.response(self.factory.get("/"))
@@ -0,0 +1,121 @@
+from asgiref.sync import async_to_sync
+from datetime import timedelta
+from django.contrib.auth.models import AnonymousUser
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+import json
+from rest_framework import status
+from rest_framework.test import APITestCase
+from unittest.mock import patch
+
+from spritstat import async_views
+from spritstat.models import DateRange, Price
+from users.models import CustomUser
+
+
+class TestAsyncViews(APITestCase):
+    # The async views have to provide the same responses as the sync views.
+
+    fixtures = [
+        "user.json",
+        "location.json",
+        "test_station.json",
+        "test_price.json",
+    ]
+    email: str
+    location_id: int
+    user: CustomUser
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.email = "test2@test.at"
+        cls.location_id = 2
+        cls.user = CustomUser.objects.get(email=cls.email)
+        cls.price_views = {
+            "prices_history": async_views.PriceHistory,
+            "prices_hour": async_views.PriceHour,
+            "prices_day_of_week": async_views.PriceDayOfWeek,
+            "prices_day_of_month": async_views.PriceDayOfMonth,
+            "prices_station_frequency": async_views.PriceStationFrequency,
+        }
+
+    def setUp(self):
+        self.factory = AsyncRequestFactory()
+
+        if not self.id().endswith("_not_logged_in"):
+            self.client.login(username=self.email, password="test")
+
+    def _get(self, view, url: str, user=None, **kwargs):
+        request = self.factory.get(url)
+        request.user = user or self.user
+
+        return async_to_sync(view.as_view())(request, **kwargs)
+
+    def _assert_same_response(self, view, url: str, **kwargs):
+        expected = self.client.get(url)
+        response = self._get(view, url, **kwargs)
+
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(json.loads(response.content), json.loads(expected.content))
+
+    def test_not_logged_in(self):
+        for name, view in self.price_views.items():
+            with self.subTest(name=name):
+                url = reverse(name, args=[self.location_id])
+                response = self._get(
+                    view, url, user=AnonymousUser(), location_id=self.location_id
+                )
+                self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_prices(self):
+        mock_now = Price.objects.filter(
+            location=self.location_id
+        ).last().datetime + timedelta(days=1)
+        with patch("spritstat.models.datetime") as mock_datetime:
+            mock_datetime.now.return_value = mock_now
+            for name, view in self.price_views.items():
+                for range_ in [""] + [
+                    f"?date_range={entry.value}" for entry in DateRange
+                ]:
+                    with self.subTest(name=name, range=range_):
+                        url = f"{reverse(name, args=[self.location_id])}{range_}"
+                        self._assert_same_response(
+                            view, url, location_id=self.location_id
+                        )
+
+    def test_station_frequency_top_n(self):
+        for top_n in ["1", "0"]:
+            with self.subTest(top_n=top_n):
+                url = reverse("prices_station_frequency", args=[self.location_id])
+                self._assert_same_response(
+                    async_views.PriceStationFrequency,
+                    f"{url}?top_n={top_n}",
+                    location_id=self.location_id,
+                )
+
+    def test_location_doesnt_exist(self):
+        for name, view in self.price_views.items():
+            with self.subTest(name=name):
+                self._assert_same_response(
+                    view, reverse(name, args=[10]), location_id=10
+                )
+
+    def test_location_of_other_user(self):
+        for name, view in self.price_views.items():
+            with self.subTest(name=name):
+                self._assert_same_response(view, reverse(name, args=[1]), location_id=1)
+
+    def test_locations(self):
+        url = reverse("locations")
+        for include in ["", "?include=latest", "?include=latest,trend"]:
+            with self.subTest(include=include):
+                self._assert_same_response(async_views.LocationList, f"{url}{include}")
+
+    def test_post(self):
+        url = reverse("prices_history", args=[self.location_id])
+        request = self.factory.post(url)
+        request.user = self.user
+        response = async_to_sync(async_views.PriceHistory.as_view())(
+            request, location_id=self.location_id
+        )
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -0,0 +1,79 @@
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from io import StringIO
+import json
+import os
+import tempfile
+
+from spritstat.benchmark import BENCHMARKS, compare
+from spritstat.models import Price
+
+
+def _result(p50: float, queries: int, peak: float) -> dict:
+    return {
+        "iterations": 1,
+        "latency_ms": {"p50": p50},
+        "queries": queries,
+        "peak_allocation_kb": peak,
+    }
+
+
+class TestBenchmark(TestCase):
+    fixtures = ["user.json", "location.json", "station.json", "price.json"]
+
+    def test_compare(self):
+        baseline = {"a": _result(10, 5, 100), "b": _result(10, 5, 100)}
+
+        self.assertListEqual(
+            compare(baseline, {"a": _result(11.9, 5, 119), "c": _result(1, 1, 1)}, 0.2),
+            [],
+        )
+        self.assertListEqual(
+            compare(
+                baseline, {"a": _result(12.1, 5, 100), "b": _result(10, 6, 121)}, 0.2
+            ),
+            [
+                "a: median latency 12.1ms > 10.0ms",
+                "b: 6 queries > 5",
+                "b: peak allocation 121kB > 100kB",
+            ],
+        )
+
+    def test_command(self):
+        price_count = Price.objects.count()
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.json")
+            call_command(
+                "benchmark",
+                "--iterations=2",
+                "--warmup=0",
+                "--location=1",
+                f"--output={output}",
+                stdout=StringIO(),
+            )
+            with open(output) as f:
+                results = json.load(f)
+
+            self.assertEqual(results["location"], 1)
+            self.assertListEqual(list(results["benchmarks"]), list(BENCHMARKS))
+            for result in results["benchmarks"].values():
+                self.assertEqual(result["iterations"], 2)
+                self.assertGreater(result["queries"], 0)
+            # The ingestion benchmark doesn't change the dataset
+            self.assertEqual(Price.objects.count(), price_count)
+
+            # Compare to a baseline without tolerance for more queries
+            results["benchmarks"]["PriceHour"]["queries"] -= 1
+            with open(output, "w") as f:
+                json.dump(results, f)
+            with self.assertRaisesRegex(CommandError, "PriceHour: \\d+ queries"):
+                call_command(
+                    "benchmark",
+                    "--iterations=1",
+                    "--location=1",
+                    "--only=PriceHour",
+                    "--threshold=1000",
+                    f"--baseline={output}",
+                    stdout=StringIO(),
+                )
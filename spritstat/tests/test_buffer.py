@@ -0,0 +1,72 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from unittest.mock import patch
+
+from spritstat.buffer import CacheBuffer
+
+
+class TestCacheBuffer(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.buffer = CacheBuffer("test")
+        self.flushed = []
+
+    def test_flush(self):
+        for value in range(3):
+            self.buffer.append(value)
+
+        self.buffer.flush(self.flushed.append)
+        self.buffer.flush(self.flushed.append)
+        self.assertListEqual(self.flushed, [[0, 1, 2]])
+
+    def test_flush_during_append(self):
+        # The buffer is flushed after an append incremented the slot counter,
+        #  but before it set the slot. The value is flushed by the next flush.
+        incr = cache.incr
+
+        def incr_and_flush(*args, **kwargs):
+            slot = incr(*args, **kwargs)
+            self.buffer.flush(self.flushed.append)
+            return slot
+
+        self.buffer.append(0)
+        with patch.object(cache, "incr", side_effect=incr_and_flush):
+            self.buffer.append(1)
+        self.buffer.append(2)
+        self.assertListEqual(self.flushed, [[0]])
+
+        self.buffer.flush(self.flushed.append)
+        self.assertListEqual(self.flushed, [[0], [1, 2]])
+
+    def test_missing_slot(self):
+        # A slot that is still missing on the next flush is skipped, e.g. if the
+        #  appending process failed.
+        self.buffer.append(0)
+        cache.incr("test:last_slot")
+        self.buffer.append(2)
+
+        self.buffer.flush(self.flushed.append)
+        self.assertListEqual(self.flushed, [[0]])
+        self.buffer.flush(self.flushed.append)
+        self.assertListEqual(self.flushed, [[0], [2]])
+        self.buffer.flush(self.flushed.append)
+        self.assertListEqual(self.flushed, [[0], [2]])
+
+    def test_counter_reset(self):
+        # The slot counter was evicted, but the flushed slot wasn't, so the
+        #  counter starts below it. The value appended before the eviction is
+        #  lost, as its slot is reused.
+        for value in range(3):
+            self.buffer.append(value)
+        self.buffer.flush(self.flushed.append)
+
+        self.buffer.append(3)
+        cache.delete("test:last_slot")
+        self.buffer.append(4)
+        self.buffer.append(5)
+
+        self.buffer.flush(self.flushed.append)
+        self.assertListEqual(self.flushed, [[0, 1, 2], [4, 5]])
+        self.buffer.append(6)
+        self.buffer.flush(self.flushed.append)
+        self.assertListEqual(self.flushed, [[0, 1, 2], [4, 5], [6]])
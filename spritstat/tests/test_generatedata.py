@@ -0,0 +1,84 @@
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from io import StringIO
+from typing import List
+
+from spritstat.management.commands.generatedata import EMAIL_DOMAIN
+from spritstat.models import Location, Price, Settings, Station
+from users.models import CustomUser
+
+
+class TestGenerateData(TestCase):
+    @staticmethod
+    def generate(seed: int = 1) -> None:
+        call_command(
+            "generatedata",
+            "--users=5",
+            "--months=1",
+            "--stations=30",
+            f"--seed={seed}",
+            "--end=2024-06-01T12:00",
+            stdout=StringIO(),
+        )
+
+    @staticmethod
+    def prices() -> List:
+        return list(
+            Price.objects.order_by("location__user__email", "datetime").values_list(
+                "datetime", "min_amount", "max_amount", "stations__name"
+            )
+        )
+
+    def test_generate(self):
+        self.generate()
+
+        users = CustomUser.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}")
+        self.assertEqual(users.count(), 5)
+        self.assertEqual(Settings.objects.filter(user__in=users).count(), 5)
+        self.assertEqual(Station.objects.count(), 30)
+        locations = Location.objects.filter(user__in=users)
+        self.assertGreaterEqual(locations.count(), 5)
+        for location in locations:
+            prices = Price.objects.filter(location=location)
+            self.assertTrue(prices.exists())
+            self.assertEqual(
+                prices.latest("datetime").datetime.date().isoformat(), "2024-06-01"
+            )
+            # Every price has the cheapest station assigned
+            self.assertFalse(prices.filter(stations__isnull=True).exists())
+            # Stations are shared by the user
+            self.assertTrue(
+                set(prices.values_list("stations", flat=True)).issubset(
+                    location.user.stations.values_list("id", flat=True)
+                )
+            )
+
+        # New prices don't conflict with the generated ids
+        Price.objects.create(
+            location=locations.first(),
+            min_amount=1,
+            max_amount=1,
+            average_amount=1,
+            median_amount=1,
+        )
+
+    def test_deterministic(self):
+        self.generate()
+        prices = self.prices()
+
+        CustomUser.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").delete()
+        Station.objects.all().delete()
+        self.generate()
+        self.assertEqual(self.prices(), prices)
+
+        CustomUser.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").delete()
+        Station.objects.all().delete()
+        self.generate(seed=2)
+        self.assertNotEqual(self.prices(), prices)
+
+    def test_existing_dataset(self):
+        self.generate()
+
+        with self.assertRaisesRegex(CommandError, "exist already"):
+            self.generate()
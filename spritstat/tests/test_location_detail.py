@@ -4,10 +4,12 @@ from django_q.tasks import Schedule
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from spritstat import services
 from spritstat.models import Location
+from spritstat.tests.utils import QueryBudgetTestMixin
 
 
-class TestLocationDetail(APITestCase):
+class TestLocationDetail(QueryBudgetTestMixin, APITestCase):
     fixtures = ["user.json", "location.json"]
 
     def setUp(self):
@@ -26,7 +28,10 @@ class TestLocationDetail(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
         db_entry_dict = Location.objects.get(id=location_id).__dict__
-        [db_entry_dict.pop(key) for key in ["_state", "user_id", "schedule_id"]]
+        [
+            db_entry_dict.pop(key)
+            for key in ["_state", "user_id", "schedule_id", "deleted_at"]
+        ]
         for key in ["latitude", "longitude"]:
             if db_entry_dict[key] is not None:
                 db_entry_dict[key] = str(db_entry_dict[key])
@@ -42,6 +47,14 @@ class TestLocationDetail(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_query_budget(self):
+        url = reverse("location_detail", args=[2])
+        # The first request records the activity and the visit of the user.
+        self.client.get(url)
+        with self.assertQueryBudget("location_detail"):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
 
 class TestLocationDelete(APITestCase):
     fixtures = ["user.json", "location.json"]
@@ -71,6 +84,11 @@ class TestLocationDelete(APITestCase):
         ):
             Schedule.objects.get(id=schedul_id)
 
+        # The location and its prices are deleted in the background.
+        self.assertTrue(Location.all_objects.filter(id=location_id).exists())
+        services.purge_deleted()
+        self.assertFalse(Location.all_objects.filter(id=location_id).exists())
+
     def test_location_doesnt_exist(self):
         url = reverse("location_detail", args=[10])
         response = self.client.delete(url)
@@ -1,14 +1,19 @@
 from copy import deepcopy
+from datetime import timedelta
 from django.conf import settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from django.db import transaction
+from django.db import connection, transaction
 from django.db.utils import DataError, IntegrityError
 from django_q.tasks import Schedule
 from rest_framework import status
 from rest_framework.test import APITestCase
 import re
+from typing import Dict
+from unittest.mock import patch
 
-from spritstat.models import Location
+from spritstat.models import Location, Price
+from spritstat.tests.utils import QueryBudgetTestMixin
 from users.models import CustomUser
 
 
@@ -257,7 +262,7 @@ class TestLocationCreate(APITestCase):
                 self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 
-class TestLocationList(APITestCase):
+class TestLocationList(QueryBudgetTestMixin, APITestCase):
     fixtures = ["user.json", "settings.json", "location.json"]
     url: str
 
@@ -299,6 +304,113 @@ class TestLocationList(APITestCase):
                     db_entry_dict[key] = str(db_entry_dict[key])
             self.assertDictEqual(response_entry, db_entry_dict)
 
+    def test_query_budget(self):
+        self.client.login(username="test2@test.at", password="test")
+        # The first request records the activity and the visit of the user.
+        self.client.get(self.url)
+        with self.assertQueryBudget("locations"):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class TestLocationListInclude(APITestCase):
+    fixtures = [
+        "user.json",
+        "settings.json",
+        "location.json",
+        "test_station.json",
+        "test_price.json",
+    ]
+    url: str
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.url = reverse("locations")
+        # The prices stopped being requested three days before the request.
+        cls.now = Price.objects.filter(location=2).last().datetime + timedelta(days=3)
+
+    def setUp(self):
+        self.client.login(username="test2@test.at", password="test")
+
+    def assertContainsValues(self, data: Dict, values: Dict) -> None:
+        self.assertDictEqual({key: data[key] for key in values}, values)
+
+    def _get(self, include: str):
+        with patch("django.utils.timezone.now", return_value=self.now):
+            return self.client.get(f"{self.url}?include={include}")
+
+    def test_latest(self):
+        response = self._get("latest")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        data = {entry["id"]: entry for entry in response.data}
+        self.assertContainsValues(
+            data[2],
+            {
+                "latest_price_datetime": "2022-01-10T12:00:00Z",
+                "latest_price_min_amount": 1.0,
+                "cheapest_station_id": 2,
+                "cheapest_station_name": "BP",
+            },
+        )
+        self.assertNotIn("price_change_24h", data[2])
+
+        # No prices exist for this location
+        self.assertContainsValues(
+            data[3],
+            {
+                "latest_price_datetime": None,
+                "latest_price_min_amount": None,
+                "cheapest_station_id": None,
+                "cheapest_station_name": None,
+            },
+        )
+
+    def test_trend(self):
+        response = self._get("latest,trend")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        data = {entry["id"]: entry for entry in response.data}
+        # The previous price 24 hours and 7 days before the latest price is
+        #  entry 4
+        self.assertContainsValues(
+            data[2],
+            {
+                "latest_price_min_amount": 1.0,
+                "price_change_24h": -1.0,
+                "price_change_7d": -1.0,
+            },
+        )
+        self.assertContainsValues(
+            data[3], {"price_change_24h": None, "price_change_7d": None}
+        )
+
+    def test_trend_only(self):
+        response = self._get("trend")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        data = {entry["id"]: entry for entry in response.data}
+        self.assertEqual(data[2]["price_change_24h"], -1.0)
+        self.assertNotIn("latest_price_min_amount", data[2])
+
+    def test_number_of_queries(self):
+        # The price data must not require any additional queries.
+
+        # The first request also records the user visit.
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as plain_context:
+            self.client.get(self.url)
+        with CaptureQueriesContext(connection) as include_context:
+            self._get("latest,trend")
+
+        self.assertEqual(
+            len(include_context.captured_queries), len(plain_context.captured_queries)
+        )
+
+    def test_invalid_include(self):
+        response = self._get("latest,invalid")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class TestLocationOther(APITestCase):
     fixtures = ["user.json", "location.json"]
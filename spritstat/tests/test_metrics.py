@@ -0,0 +1,165 @@
+from datetime import timedelta
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django_q.signals import pre_execute
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.test import APITestCase
+from unittest.mock import patch
+from urllib3 import PoolManager
+
+from spritstat.services import request_location_prices
+from spritstat.tests.test_services import MockAPIResponse, MockAPIResponseEntry
+from users.password_validation import ZxcvbnValidator
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestMetrics(APITestCase):
+    fixtures = ["user.json", "test_services.json"]
+    url: str
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.url = reverse("metrics")
+
+    @override_settings(DEBUG=True)
+    def test_local(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(b"spritstat_http_request_duration_seconds", response.content)
+
+    @override_settings(DEBUG=True)
+    def test_remote(self):
+        response = self.client.get(self.url, REMOTE_ADDR="192.0.2.1")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(DEBUG=True)
+    def test_proxied(self):
+        # A request forwarded by a reverse proxy on the same host
+        response = self.client.get(self.url, HTTP_X_FORWARDED_FOR="192.0.2.1")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_no_token(self):
+        # Without a token the metrics aren't served in production
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(METRICS_TOKEN="token")
+    def test_token(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.get(
+            self.url, REMOTE_ADDR="192.0.2.1", HTTP_AUTHORIZATION="Bearer token"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_request(self):
+        labels = {"view": "locations", "method": "GET", "status": "4xx"}
+        count = _sample("spritstat_http_request_duration_seconds_count", **labels)
+        queries = _sample("spritstat_http_request_queries_count", view="locations")
+
+        self.client.get(reverse("locations"))
+
+        self.assertEqual(
+            _sample("spritstat_http_request_duration_seconds_count", **labels),
+            count + 1,
+        )
+        self.assertEqual(
+            _sample("spritstat_http_request_queries_count", view="locations"),
+            queries + 1,
+        )
+
+    def test_cache(self):
+        hits = _sample(
+            "spritstat_cache_requests_total", cache="password_validation", result="hit"
+        )
+        misses = _sample(
+            "spritstat_cache_requests_total", cache="password_validation", result="miss"
+        )
+
+        validator = ZxcvbnValidator()
+        validator.custom_validate("metrics test password")
+        validator.custom_validate("metrics test password")
+
+        self.assertEqual(
+            _sample(
+                "spritstat_cache_requests_total",
+                cache="password_validation",
+                result="hit",
+            ),
+            hits + 1,
+        )
+        self.assertEqual(
+            _sample(
+                "spritstat_cache_requests_total",
+                cache="password_validation",
+                result="miss",
+            ),
+            misses + 1,
+        )
+
+    def test_ingestion(self):
+        stages = ("fetch", "parse", "statistics", "write")
+        counts = {
+            stage: _sample(
+                "spritstat_ingestion_stage_duration_seconds_count", stage=stage
+            )
+            for stage in stages
+        }
+        requests = _sample(
+            "spritstat_econtrol_request_duration_seconds_count", status="200"
+        )
+
+        response = MockAPIResponse(
+            200,
+            [
+                MockAPIResponseEntry(
+                    id=1000,
+                    name="Station",
+                    address="Address",
+                    postal_code="PLZ",
+                    city="City",
+                    latitude=0.5,
+                    longitude=0.6,
+                    fuel_type="DIE",
+                    price=1.5,
+                )
+            ],
+        )
+        with patch.object(PoolManager, "request", return_value=response.as_mock()):
+            request_location_prices(1)
+
+        for stage in stages:
+            self.assertEqual(
+                _sample(
+                    "spritstat_ingestion_stage_duration_seconds_count", stage=stage
+                ),
+                counts[stage] + 1,
+            )
+        self.assertEqual(
+            _sample("spritstat_econtrol_request_duration_seconds_count", status="200"),
+            requests + 1,
+        )
+
+    def test_task_queue_lag(self):
+        func = "spritstat.services.request_location_prices"
+        count = _sample("spritstat_task_queue_lag_seconds_count", func=func)
+        lag = _sample("spritstat_task_queue_lag_seconds_sum", func=func)
+
+        pre_execute.send(
+            sender="django_q",
+            func=request_location_prices,
+            task={"func": func, "started": timezone.now() - timedelta(seconds=10)},
+        )
+
+        self.assertEqual(
+            _sample("spritstat_task_queue_lag_seconds_count", func=func), count + 1
+        )
+        self.assertGreaterEqual(
+            _sample("spritstat_task_queue_lag_seconds_sum", func=func), lag + 10
+        )
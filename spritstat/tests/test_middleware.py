@@ -0,0 +1,62 @@
+from asgiref.sync import SyncToAsync
+from django.core.handlers.base import BaseHandler
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from unittest.mock import patch
+
+
+class TestQueryBudgetMiddleware(APITestCase):
+    fixtures = ["user.json", "location.json", "station.json"]
+    url: str
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.url = reverse("locations")
+
+    def setUp(self):
+        self.client.login(username="test2@test.at", password="test")
+        self.async_client.login(username="test2@test.at", password="test")
+        # The first request records the activity and the visit of the user.
+        self.client.get(self.url)
+
+    def test_server_timing(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^db;dur=[\d.]+;desc="\d+ queries", serialize;dur=[\d.]+, '
+            r"total;dur=[\d.]+$",
+        )
+
+    async def test_server_timing_async(self):
+        # The queries of a sync view are executed in a thread, but counted by
+        #  the middleware executed in the event loop.
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="[1-9]\d* ')
+
+    def test_async_capable(self):
+        # The async views are only executed without a thread if all
+        #  middlewares support async requests, otherwise Django executes the
+        #  middlewares in a thread.
+        handler = BaseHandler()
+        handler.load_middleware(is_async=True)
+        self.assertNotIsInstance(handler._middleware_chain, SyncToAsync)
+
+    def test_within_budget(self):
+        with patch("spritstat.middleware.LOG") as mock_log:
+            self.client.get(self.url)
+        mock_log.warning.assert_not_called()
+
+    @override_settings(
+        QUERY_BUDGETS={
+            "default": {"queries": 10, "db_time_ms": 250},
+            "locations": {"queries": 0},
+        }
+    )
+    def test_exceeded_budget(self):
+        with self.assertLogs("spritstat.middleware", "WARNING") as logs:
+            self.client.get(self.url)
+        self.assertIn("(locations) exceeded its query budget", logs.output[0])
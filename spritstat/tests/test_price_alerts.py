@@ -0,0 +1,129 @@
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from spritstat.models import Location, PriceAlert
+from spritstat.tests.utils import QueryBudgetTestMixin
+
+
+class TestPriceAlertList(QueryBudgetTestMixin, APITestCase):
+    fixtures = ["user.json", "settings.json", "location.json"]
+    email: str
+    location: Location
+    url: str
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.email = "test2@test.at"
+        cls.location = Location.objects.get(pk=2)
+        cls.url = reverse("price_alerts", args=[cls.location.id])
+        PriceAlert.objects.create(location=cls.location, target_amount=1.5)
+        PriceAlert.objects.create(location_id=3, target_amount=1.6)
+
+    def setUp(self):
+        if not self.id().endswith("_not_logged_in"):
+            self.client.login(username=self.email, password="test")
+
+    def test_not_logged_in(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_list(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["location"], self.location.id)
+        self.assertEqual(response.data[0]["target_amount"], 1.5)
+
+    def test_list_other_user(self):
+        response = self.client.get(reverse("price_alerts", args=[1]))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_create(self):
+        response = self.client.post(
+            self.url, {"target_amount": 1.4, "triggered": True, "location": 1}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        alert = PriceAlert.objects.get(id=response.data["id"])
+        # Read only fields are ignored
+        self.assertEqual(alert.location, self.location)
+        self.assertFalse(alert.triggered)
+        self.assertEqual(alert.target_amount, 1.4)
+        self.assertTrue(alert.active)
+
+    def test_create_invalid_amount(self):
+        response = self.client.post(self.url, {"target_amount": -1})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(PRICE_ALERT_LIMIT=1)
+    def test_create_limit(self):
+        response = self.client.post(self.url, {"target_amount": 1.4})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_other_user(self):
+        response = self.client.post(
+            reverse("price_alerts", args=[1]), {"target_amount": 1.4}
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(PriceAlert.objects.filter(location_id=1).exists())
+
+    def test_query_budget(self):
+        # The first request records the activity and the visit of the user.
+        self.client.get(self.url)
+        with self.assertQueryBudget("price_alerts"):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class TestPriceAlertDetail(APITestCase):
+    fixtures = ["user.json", "settings.json", "location.json"]
+    alert: PriceAlert
+    email: str
+    url: str
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.email = "test2@test.at"
+        cls.alert = PriceAlert.objects.create(
+            location_id=2, target_amount=1.5, triggered=True
+        )
+        cls.url = reverse("price_alert_detail", args=[cls.alert.id])
+
+    def setUp(self):
+        if not self.id().endswith("_not_logged_in"):
+            self.client.login(username=self.email, password="test")
+
+    def test_not_logged_in(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_other_user(self):
+        self.client.login(username="tom@test.at", password="test")
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_update_target_amount(self):
+        # Changing the target amount rearms the alert
+        response = self.client.patch(self.url, {"target_amount": 1.4})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.alert.refresh_from_db()
+        self.assertEqual(self.alert.target_amount, 1.4)
+        self.assertFalse(self.alert.triggered)
+
+    def test_deactivate(self):
+        response = self.client.patch(self.url, {"active": False})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.alert.refresh_from_db()
+        self.assertFalse(self.alert.active)
+        self.assertTrue(self.alert.triggered)
+
+    def test_delete(self):
+        response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(PriceAlert.objects.filter(id=self.alert.id).exists())
+
+    def test_deleted_location(self):
+        Location.objects.filter(id=2).soft_delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -1,13 +1,15 @@
 from datetime import timedelta
+from decimal import Decimal
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from unittest.mock import patch
 
 from spritstat.models import DateRange, Price
+from spritstat.tests.utils import QueryBudgetTestMixin
 
 
-class TestPriceHistory(APITestCase):
+class TestPriceHistory(QueryBudgetTestMixin, APITestCase):
     fixtures = [
         "user.json",
         "location.json",
@@ -101,8 +103,15 @@ class TestPriceHistory(APITestCase):
         response = self.client.delete(self.url)
         self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
 
+    def test_query_budget(self):
+        # The first request records the activity and the visit of the user.
+        self.client.get(self.url)
+        with self.assertQueryBudget("prices_history"):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
 
-class TestPriceHour(APITestCase):
+class TestPriceHour(QueryBudgetTestMixin, APITestCase):
     fixtures = [
         "user.json",
         "location.json",
@@ -203,8 +212,15 @@ class TestPriceHour(APITestCase):
         response = self.client.delete(self.url)
         self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
 
+    def test_query_budget(self):
+        # The first request records the activity and the visit of the user.
+        self.client.get(self.url)
+        with self.assertQueryBudget("prices_hour"):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
 
-class TestPriceDayOfWeek(APITestCase):
+class TestPriceDayOfWeek(QueryBudgetTestMixin, APITestCase):
     fixtures = [
         "user.json",
         "location.json",
@@ -304,8 +320,15 @@ class TestPriceDayOfWeek(APITestCase):
         response = self.client.delete(self.url)
         self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
 
+    def test_query_budget(self):
+        # The first request records the activity and the visit of the user.
+        self.client.get(self.url)
+        with self.assertQueryBudget("prices_day_of_week"):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
 
-class TestPriceDayOfMonth(APITestCase):
+class TestPriceDayOfMonth(QueryBudgetTestMixin, APITestCase):
     fixtures = [
         "user.json",
         "location.json",
@@ -411,8 +434,15 @@ class TestPriceDayOfMonth(APITestCase):
         response = self.client.delete(self.url)
         self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
 
+    def test_query_budget(self):
+        # The first request records the activity and the visit of the user.
+        self.client.get(self.url)
+        with self.assertQueryBudget("prices_day_of_month"):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
 
-class TestPriceStationFrequency(APITestCase):
+class TestPriceStationFrequency(QueryBudgetTestMixin, APITestCase):
     fixtures = [
         "user.json",
         "location.json",
@@ -425,6 +455,24 @@ class TestPriceStationFrequency(APITestCase):
     def setUpTestData(cls):
         cls.location_id = 2
         cls.url = reverse("prices_station_frequency", args=[cls.location_id])
+        cls.station_2 = {
+            "station_id": 2,
+            "name": "BP",
+            "address": "Handelskai 90",
+            "postal_code": "1200",
+            "city": "Wien",
+            "latitude": Decimal("48.2430922"),
+            "longitude": Decimal("16.3843336"),
+        }
+        cls.station_3 = {
+            "station_id": 3,
+            "name": "Disk",
+            "address": "Franzensbrückenstrasse 15",
+            "postal_code": "1020",
+            "city": "Wien",
+            "latitude": Decimal("48.2146367"),
+            "longitude": Decimal("16.3916044"),
+        }
 
     def setUp(self):
         if not self.id().endswith("_not_logged_in"):
@@ -444,9 +492,25 @@ class TestPriceStationFrequency(APITestCase):
         # Compare with the calculated amounts
         self.assertListEqual(
             response.data,
-            [{"station_id": 2, "frequency": 1}, {"station_id": 3, "frequency": 0.6}],
+            [
+                {**self.station_2, "frequency": 1},
+                {**self.station_3, "frequency": 0.6},
+            ],
         )
 
+    def test_top_n(self):
+        # Ensure that only the most frequent stations are returned.
+
+        response = self.client.get(f"{self.url}?top_n=1")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual(response.data, [{**self.station_2, "frequency": 1}])
+
+    def test_top_n_invalid(self):
+        for top_n in ["0", "-1", "abc"]:
+            with self.subTest(top_n=top_n):
+                response = self.client.get(f"{self.url}?top_n={top_n}")
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_date_ranges(self):
         # Test if the correct values are calculated for each date range.
 
@@ -459,20 +523,20 @@ class TestPriceStationFrequency(APITestCase):
                 [entry.value for entry in DateRange],
                 [
                     [  # One week back contains entry 5
-                        {"station_id": 2, "frequency": 1},
-                        {"station_id": 3, "frequency": 1},
+                        {**self.station_2, "frequency": 1},
+                        {**self.station_3, "frequency": 1},
                     ],
                     [  # One month back contains entries 4 & 5
-                        {"station_id": 2, "frequency": 1},
-                        {"station_id": 3, "frequency": 1},
+                        {**self.station_2, "frequency": 1},
+                        {**self.station_3, "frequency": 1},
                     ],
                     [  # Three months back contains entries 3-5
-                        {"station_id": 2, "frequency": 1},
-                        {"station_id": 3, "frequency": 1},
+                        {**self.station_2, "frequency": 1},
+                        {**self.station_3, "frequency": 1},
                     ],
                     [  # Six months back contains entries 2-5
-                        {"station_id": 2, "frequency": 1},
-                        {"station_id": 3, "frequency": 0.75},
+                        {**self.station_2, "frequency": 1},
+                        {**self.station_3, "frequency": 0.75},
                     ],
                 ],
             ):
@@ -506,3 +570,10 @@ class TestPriceStationFrequency(APITestCase):
     def test_delete(self):
         response = self.client.delete(self.url)
         self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_query_budget(self):
+        # The first request records the activity and the visit of the user.
+        self.client.get(self.url)
+        with self.assertQueryBudget("prices_station_frequency"):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
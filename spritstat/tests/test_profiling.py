@@ -0,0 +1,110 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+import time
+
+from spritstat.models import Profile, ProfileKind
+from spritstat.profiling import Sampler, profile, profiled_task
+
+
+def _busy(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestProfiling(TestCase):
+    fixtures = ["user.json"]
+
+    def test_sampler(self):
+        with Sampler(0.001) as sampler:
+            _busy(0.05)
+
+        self.assertGreater(sampler.samples, 0)
+        self.assertGreaterEqual(sampler.duration, 0.05)
+        for line in sampler.collapsed().splitlines():
+            with self.subTest(line=line):
+                self.assertRegex(line, r"^[^;]+(;[^;]+)* \d+$")
+        self.assertIn("_busy (spritstat/tests/test_profiling.py:", sampler.collapsed())
+
+    @override_settings(PROFILING_STORAGE_LIMIT=100)
+    def test_storage_limit(self):
+        for name in ("first", "second", "third"):
+            with profile(ProfileKind.TASK, name) as sampler:
+                pass
+            # The limit can't be exceeded by the empty profiles
+            Profile.objects.filter(id=sampler.profile.id).update(size=40)
+
+        with profile(ProfileKind.TASK, "fourth"):
+            pass
+
+        self.assertListEqual(
+            list(Profile.objects.values_list("name", flat=True)),
+            ["fourth", "third", "second"],
+        )
+
+    def test_profiled_task(self):
+        @profiled_task("PROFILING_PRICE_REQUEST_PERCENTAGE")
+        def task(location_id: int) -> int:
+            return location_id
+
+        with override_settings(PROFILING_PRICE_REQUEST_PERCENTAGE=0):
+            self.assertEqual(task(1), 1)
+        self.assertFalse(Profile.objects.exists())
+
+        with override_settings(PROFILING_PRICE_REQUEST_PERCENTAGE=100):
+            self.assertEqual(task(2), 2)
+        self.assertEqual(Profile.objects.get().name, "task(2)")
+
+
+class TestProfilingMiddleware(APITestCase):
+    fixtures = ["user.json"]
+    url: str
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.url = reverse("locations")
+
+    def setUp(self):
+        self.async_client.login(username="admin@test.at", password="test")
+
+    def test_staff(self):
+        self.client.login(username="admin@test.at", password="test")
+
+        response = self.client.get(self.url, HTTP_X_PROFILE="1")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        profile = Profile.objects.get(id=response["X-Profile-Id"])
+        self.assertEqual(profile.kind, ProfileKind.REQUEST)
+        self.assertEqual(profile.name, f"GET {self.url}")
+        self.assertEqual(profile.user.email, "admin@test.at")
+
+        response = self.client.get(self.url, {"profile": ""})
+        self.assertIn("X-Profile-Id", response)
+
+        response = self.client.get(self.url)
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(Profile.objects.count(), 2)
+
+        response = self.client.get(
+            reverse("admin:spritstat_profile_download", args=[profile.id])
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content.decode(), profile.data)
+
+    async def test_staff_async(self):
+        response = await self.async_client.get(self.url, headers={"X-Profile": "1"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        profile = await Profile.objects.select_related("user").aget(
+            id=response["X-Profile-Id"]
+        )
+        self.assertEqual(profile.name, f"GET {self.url}")
+        self.assertEqual(profile.user.email, "admin@test.at")
+
+    def test_not_staff(self):
+        self.client.login(username="test2@test.at", password="test")
+
+        response = self.client.get(self.url, HTTP_X_PROFILE="1")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertFalse(Profile.objects.exists())
@@ -0,0 +1,123 @@
+from django.contrib.sessions.models import Session
+from django.test import TestCase
+from django.utils import timezone
+from django_q.models import Failure, Success, Task
+from itertools import count
+from prometheus_client import REGISTRY
+from unittest.mock import patch
+
+from spritstat.models import Location
+from spritstat.purge import purge
+
+
+class TestPurge(TestCase):
+    fixtures = ["user.json", "location.json"]
+
+    @staticmethod
+    def create_sessions(count: int) -> None:
+        Session.objects.bulk_create(
+            [
+                Session(
+                    session_key=f"session_{index:03}",
+                    session_data="",
+                    expire_date=timezone.now(),
+                )
+                for index in range(count)
+            ]
+        )
+
+    def test_batches(self):
+        self.create_sessions(10)
+
+        with patch("time.sleep") as mock_sleep:
+            result = purge(
+                Session.objects.exclude(session_key="session_005"),
+                raw=True,
+                batch_size=4,
+                pause=1,
+            )
+
+        self.assertEqual(result.model, "sessions.Session")
+        self.assertEqual(result.deleted, 9)
+        self.assertEqual(result.batches, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+        self.assertListEqual(
+            list(Session.objects.values_list("session_key", flat=True)),
+            ["session_005"],
+        )
+
+    def test_deadline(self):
+        # No further batch is started after the deadline, the next purge
+        #  continues with the remaining rows.
+        self.create_sessions(10)
+        deleted_before = (
+            REGISTRY.get_sample_value(
+                "spritstat_purged_rows_total", {"model": "sessions.Session"}
+            )
+            or 0
+        )
+
+        # Every call of the clock advances it by one second.
+        with patch("time.sleep"), patch("time.perf_counter", side_effect=count()):
+            result = purge(Session.objects.all(), raw=True, batch_size=4, deadline=3)
+
+        self.assertEqual(result.deleted, 8)
+        self.assertEqual(result.batches, 2)
+        self.assertFalse(result.complete)
+        self.assertEqual(Session.objects.count(), 2)
+        # The rows are counted per batch.
+        self.assertEqual(
+            REGISTRY.get_sample_value(
+                "spritstat_purged_rows_total", {"model": "sessions.Session"}
+            ),
+            deleted_before + 8,
+        )
+
+        with patch("time.sleep"), patch("time.perf_counter", side_effect=count()):
+            result = purge(Session.objects.all(), raw=True, batch_size=4, deadline=3)
+
+        self.assertEqual(result.deleted, 2)
+        self.assertTrue(result.complete)
+        self.assertFalse(Session.objects.exists())
+
+    def test_empty(self):
+        with self.assertNumQueries(1):
+            result = purge(Session.objects.all(), raw=True)
+
+        self.assertEqual(result.deleted, 0)
+        self.assertEqual(result.batches, 0)
+
+    def test_full_batch(self):
+        # An additional query is required to determine that no rows are left.
+        self.create_sessions(4)
+        with patch("time.sleep"), self.assertNumQueries(3):
+            result = purge(Session.objects.all(), raw=True, batch_size=4)
+
+        self.assertEqual(result.deleted, 4)
+        self.assertEqual(result.batches, 1)
+
+    def test_not_raw(self):
+        # Related objects are deleted and signals are sent.
+        count = Location.objects.count()
+        with patch("time.sleep"):
+            result = purge(Location.objects.filter(user_id=200), batch_size=1)
+
+        self.assertEqual(result.deleted, count - Location.objects.count())
+        self.assertGreater(result.deleted, 0)
+        self.assertFalse(Location.objects.filter(user_id=200).exists())
+
+    def test_proxy_model(self):
+        for index, success in enumerate([True, False, True]):
+            Task.objects.create(
+                id=f"task_{index}",
+                name=f"task_{index}",
+                func="func",
+                started=timezone.now(),
+                stopped=timezone.now(),
+                success=success,
+            )
+
+        result = purge(Success.objects.all(), raw=True)
+        self.assertEqual(result.model, "django_q.Success")
+        self.assertEqual(result.deleted, 2)
+        self.assertEqual(Failure.objects.count(), 1)
@@ -0,0 +1,219 @@
+from datetime import datetime
+from difflib import unified_diff
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import SimpleTestCase, TestCase
+from io import StringIO
+import os
+from typing import Dict
+from unittest import skipUnless
+from unittest.mock import patch
+
+from spritstat.models import Location, Price, Station
+from spritstat.query_plans import (
+    DATE_RANGES,
+    QUERYSETS,
+    explain,
+    nested_loop_sequential_scans,
+    queryset,
+    render,
+    scans,
+    sequential_scan_cost,
+    sequential_scans,
+)
+
+# The rendered plans are stored in this directory. If a plan changed, the test
+#  fails with the diff to the stored plan. Set UPDATE_QUERY_PLANS to store the
+#  current plans instead.
+PLAN_DIRECTORY = os.path.join(os.path.dirname(__file__), "query_plans")
+
+# The dataset ends at a fixed date and the date ranges are computed relative to
+#  it, so the plans don't depend on the date and time the tests are executed.
+END = datetime(2023, 6, 1)
+
+# Maximum estimated cost of the plans relative to the cost of reading the
+#  tables they use sequentially
+MAX_RELATIVE_COST = {
+    "PriceHistory": 0.25,
+    "PriceHour": 0.25,
+    "PriceDayOfWeek": 0.25,
+    "PriceDayOfMonth": 0.25,
+    "PriceStationFrequency": 1.0,
+    "PriceStationFrequencyTopN": 1.0,
+}
+
+
+class TestPlanHelpers(SimpleTestCase):
+    plan = {
+        "Node Type": "Aggregate",
+        "Strategy": "Sorted",
+        "Plans": [
+            {
+                "Node Type": "Nested Loop",
+                "Join Type": "Inner",
+                "Plans": [
+                    {
+                        "Node Type": "Index Scan",
+                        "Relation Name": "spritstat_price",
+                        "Index Name": "spritstat_p_locatio_idx",
+                    },
+                    {
+                        "Node Type": "Materialize",
+                        "Plans": [
+                            {
+                                "Node Type": "Seq Scan",
+                                "Relation Name": "spritstat_price_stations",
+                            }
+                        ],
+                    },
+                ],
+            },
+            {
+                "Node Type": "Seq Scan",
+                "Relation Name": "spritstat_station",
+                "Subplan Name": "SubPlan 1",
+            },
+        ],
+    }
+
+    def test_scans(self):
+        self.assertSetEqual(
+            sequential_scans(self.plan),
+            {"spritstat_price_stations", "spritstat_station"},
+        )
+        self.assertSetEqual(
+            nested_loop_sequential_scans(self.plan), {"spritstat_price_stations"}
+        )
+
+    def test_render(self):
+        self.assertEqual(
+            render(self.plan),
+            "Aggregate (Sorted)\n"
+            "  Nested Loop (Inner)\n"
+            "    Index Scan on spritstat_price using spritstat_p_locatio_idx\n"
+            "    Materialize\n"
+            "      Seq Scan on spritstat_price_stations\n"
+            "  Seq Scan on spritstat_station [SubPlan 1]",
+        )
+
+
+@skipUnless(
+    connection.vendor == "postgresql", "Query plans are only checked on PostgreSQL"
+)
+class TestQueryPlans(TestCase):
+    location: Location
+    price_table = Price._meta.db_table
+    station_table = Price.stations.through._meta.db_table
+    costs: Dict[str, float]
+
+    @classmethod
+    def setUpTestData(cls):
+        # The rows inserted and rolled back by previous tests are still in the
+        #  files of the tables and the planner scales its estimates by their
+        #  size. The tables are truncated, which replaces their files and is
+        #  rolled back after the tests as well.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "TRUNCATE {}".format(
+                    ", ".join(
+                        model._meta.db_table
+                        for model in (
+                            Price.stations.through,
+                            Station.users.through,
+                            Price,
+                            Station,
+                        )
+                    )
+                )
+            )
+
+        # The location with the most prices has about 1% of the prices, so the
+        #  planner has to use the indexes.
+        call_command(
+            "generatedata",
+            "--users=50",
+            "--months=3",
+            "--stations=300",
+            "--seed=0",
+            f"--end={END.isoformat()}",
+            stdout=StringIO(),
+        )
+        # The statistics are computed from all rows instead of a random sample
+        #  and the stations are analyzed as well, so the plans don't change
+        #  between executions.
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL default_statistics_target = 10000")
+            for model in (Price, Price.stations.through, Station):
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+        cls.location = (
+            Location.objects.annotate(num_prices=Count("prices"))
+            .order_by("-num_prices", "id")
+            .first()
+        )
+        price_cost = sequential_scan_cost(cls.price_table)
+        cls.costs = {
+            name: price_cost
+            + (
+                sequential_scan_cost(cls.station_table)
+                if name.startswith("PriceStationFrequency")
+                else 0
+            )
+            for name in QUERYSETS
+        }
+
+    @patch("spritstat.models.datetime")
+    def test_plans(self, mock_datetime):
+        mock_datetime.now.return_value = END
+        for name in QUERYSETS:
+            for date_range in DATE_RANGES:
+                with self.subTest(name=name, date_range=date_range):
+                    plan = explain(queryset(name, self.location, date_range))
+                    self._compare(
+                        f"{name}_{date_range.value if date_range else 'all'}", plan
+                    )
+
+                    # The prices of the location are read using an index
+                    self.assertIn(
+                        self.price_table, {relation for relation, _ in scans(plan)}
+                    )
+                    self.assertNotIn(self.price_table, sequential_scans(plan))
+                    # The stations of the prices aren't read for each price
+                    self.assertNotIn(
+                        self.station_table, nested_loop_sequential_scans(plan)
+                    )
+                    self.assertLessEqual(
+                        plan["Total Cost"],
+                        MAX_RELATIVE_COST[name] * self.costs[name],
+                    )
+
+    def _compare(self, name: str, plan: Dict) -> None:
+        rendered = render(plan) + "\n"
+        path = os.path.join(PLAN_DIRECTORY, f"{name}.txt")
+        if os.getenv("UPDATE_QUERY_PLANS"):
+            os.makedirs(PLAN_DIRECTORY, exist_ok=True)
+            with open(path, "w") as f:
+                f.write(rendered)
+            return
+
+        if not os.path.exists(path):
+            self.fail(
+                f"No plan stored for {name}, execute the tests with "
+                f"UPDATE_QUERY_PLANS=1 to store it:\n{rendered}"
+            )
+
+        with open(path) as f:
+            stored = f.read()
+        if rendered != stored:
+            diff = "".join(
+                unified_diff(
+                    stored.splitlines(keepends=True),
+                    rendered.splitlines(keepends=True),
+                    fromfile=f"{name}.txt",
+                    tofile=f"{name} (current)",
+                )
+            )
+            self.fail(
+                f"The plan of {name} changed, execute the tests with "
+                f"UPDATE_QUERY_PLANS=1 to accept it:\n{diff}"
+            )
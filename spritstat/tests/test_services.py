@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from decimal import Decimal
 
 from allauth.account.signals import user_signed_up
 from django.conf import settings
@@ -7,20 +8,26 @@ from django.contrib import auth
 from django.contrib.sessions.backends.db import SessionStore
 from django.contrib.sessions.models import Session
 from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import connection
 from django.db.models.signals import post_save, pre_delete
 from django.http import HttpRequest
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from itertools import count
 import json
+from smtplib import SMTPException
 from statistics import mean, median
 from typing import List, Dict, Optional
 from unittest.mock import MagicMock, patch
 
 from django.utils.translation import activate
-from django_q.models import Schedule
+from django_q.models import Schedule, Task
 from urllib3 import PoolManager
 
-from spritstat.models import Location, Price, Station
+from spritstat.metrics import generate_metrics
+from spritstat.models import Location, Price, PriceAlert, Station
 from spritstat import services
 from spritstat.services.notification import (
     CREATE_LOCATION_REMINDER_DELAY_DAYS,
@@ -28,7 +35,7 @@ from spritstat.services.notification import (
     schedule_create_location_notification,
     schedule_location_reminder_notification,
 )
-from users.models import CustomUser
+from users.models import CustomUser, Notifications
 
 
 @dataclass
@@ -455,6 +462,36 @@ class TestRequestLocationPrices(TestCase):
         self.assertEqual(Station.objects.count(), check_station_count)
         self.assertEqual(Price.objects.count(), check_price_count)
 
+    def test_create_price__number_of_queries(self):
+        # The number of queries doesn't depend on the number of stations.
+        location = Location.objects.get(pk=1)
+        stations = [
+            services.price._Station(
+                id=station_id,
+                name=f"Station {station_id}",
+                address="",
+                postal_code="1010",
+                city="Wien",
+                latitude=Decimal("48.2083537"),
+                longitude=Decimal("16.3725042"),
+            )
+            for station_id in (1, 5000, 5001, 5002, 5003, 5004)
+        ]
+        statistics = self.default_test_price["price_statistics"]
+
+        with CaptureQueriesContext(connection) as few_stations:
+            services.price._create_price(location, stations[:2], statistics)
+        with CaptureQueriesContext(connection) as many_stations:
+            services.price._create_price(location, stations, statistics)
+        self.assertLessEqual(len(many_stations), len(few_stations))
+
+        price = Price.objects.last()
+        self.assertEqual(price.stations.count(), len(stations))
+        self.assertEqual(
+            location.user.stations.filter(id__in=[s.id for s in stations]).count(),
+            len(stations),
+        )
+
 
 class TestClearExpiredSessions(TestCase):
     fixtures = ["user.json"]
@@ -492,6 +529,157 @@ class TestClearExpiredSessions(TestCase):
             services.clear_expired_sessions()
         self.assertEqual(Session.objects.count(), 0)
 
+    def test_clear_sessions_batched(self):
+        for _ in range(5):
+            self.create_session(1)
+        self.create_session(settings.SESSION_COOKIE_AGE)
+
+        mock_now = timezone.now() + timedelta(seconds=settings.SESSION_COOKIE_AGE // 2)
+        with patch("django.utils.timezone.now", return_value=mock_now), patch(
+            "spritstat.purge.PURGE_BATCH_SIZE", 2
+        ):
+            # Three batches of at most two sessions, each selecting the keys and
+            #  deleting the sessions.
+            with self.assertNumQueries(3 * 2):
+                services.clear_expired_sessions()
+        self.assertEqual(Session.objects.count(), 1)
+
+
+class TestCompactTaskTables(TestCase):
+    fixtures = ["user.json"]
+
+    def test_task_results(self):
+        now = timezone.now()
+        for index, (success, age) in enumerate(
+            [(True, 1), (True, 8), (False, 8), (False, 31)]
+        ):
+            Task.objects.create(
+                id=f"task_{index}",
+                name=f"task_{index}",
+                func="func",
+                started=now - timedelta(days=age),
+                stopped=now - timedelta(days=age),
+                success=success,
+            )
+
+        with self.settings(TASK_SUCCESS_RETENTION_DAYS=7):
+            services.compact_task_tables()
+        self.assertListEqual(
+            list(Task.objects.order_by("id").values_list("id", flat=True)),
+            ["task_0", "task_2"],
+        )
+
+        # No rows are deleted once the time limit is reached, they are deleted
+        #  by the next run.
+        with self.settings(TASK_FAILURE_RETENTION_DAYS=7, PURGE_TIME_LIMIT_SECONDS=-1):
+            services.compact_task_tables()
+        self.assertEqual(Task.objects.count(), 2)
+
+        with self.settings(TASK_FAILURE_RETENTION_DAYS=7):
+            services.compact_task_tables()
+        self.assertListEqual(
+            list(Task.objects.order_by("id").values_list("id", flat=True)),
+            ["task_0"],
+        )
+
+    def test_table_size_metrics(self):
+        Task.objects.create(
+            id="task",
+            name="task",
+            func="func",
+            started=timezone.now(),
+            stopped=timezone.now(),
+            success=True,
+        )
+
+        services.compact_task_tables()
+        output = generate_metrics().decode()
+        self.assertIn('spritstat_table_rows{table="django_q_task"}', output)
+        self.assertIn('spritstat_table_size_bytes{table="django_q_schedule"}', output)
+
+    def test_schedules(self):
+        executed = Schedule.objects.create(
+            func="func", schedule_type=Schedule.ONCE, repeats=0
+        )
+        Schedule.objects.create(func="func", schedule_type=Schedule.ONCE)
+        Schedule.objects.create(func="func", schedule_type=Schedule.DAILY, repeats=0)
+        count = Schedule.objects.count()
+
+        services.compact_task_tables()
+        self.assertEqual(Schedule.objects.count(), count - 1)
+        self.assertFalse(Schedule.objects.filter(id=executed.id).exists())
+
+
+class TestPurgeDeleted(TestCase):
+    fixtures = [
+        "user.json",
+        "settings.json",
+        "location.json",
+        "test_station.json",
+        "test_price.json",
+    ]
+
+    def test_location(self):
+        location = Location.objects.filter(prices__isnull=False).first()
+        other_count = Price.objects.exclude(location=location).count()
+        Location.objects.filter(id=location.id).soft_delete()
+        self.assertFalse(Location.objects.filter(id=location.id).exists())
+        self.assertFalse(location.user.locations.filter(id=location.id).exists())
+        self.assertTrue(Price.objects.filter(location=location).exists())
+
+        services.purge_deleted()
+        self.assertFalse(Location.all_objects.filter(id=location.id).exists())
+        self.assertEqual(Price.objects.count(), other_count)
+        self.assertFalse(
+            Price.stations.through.objects.filter(price__location=location).exists()
+        )
+
+    def test_user(self):
+        user = Location.objects.filter(prices__isnull=False).first().user
+        self.assertTrue(user.stations.exists())
+        station_count = Station.objects.count()
+        location_ids = list(user.locations.values_list("id", flat=True))
+
+        user.soft_delete()
+        self.assertFalse(Location.objects.filter(id__in=location_ids).exists())
+        self.assertFalse(
+            Schedule.objects.filter(location__id__in=location_ids).exists()
+        )
+
+        services.purge_deleted()
+        self.assertFalse(CustomUser.objects.filter(id=user.id).exists())
+        self.assertFalse(Location.all_objects.filter(id__in=location_ids).exists())
+        self.assertFalse(Price.objects.filter(location__id__in=location_ids).exists())
+        self.assertFalse(Station.users.through.objects.filter(customuser=user).exists())
+        # Stations are shared, so they are kept.
+        self.assertEqual(Station.objects.count(), station_count)
+
+    @patch("time.sleep")
+    @patch("spritstat.purge.PURGE_BATCH_SIZE", 1)
+    def test_time_limit(self, sleep_mock):
+        # Once the time limit is reached, the next run continues the purge.
+        user = Location.objects.filter(prices__isnull=False).first().user
+        location_ids = list(user.locations.values_list("id", flat=True))
+        user.soft_delete()
+
+        # Every call of the clock advances it by one second.
+        runs = 0
+        with self.settings(PURGE_TIME_LIMIT_SECONDS=10), patch(
+            "time.perf_counter", side_effect=count()
+        ):
+            while CustomUser.objects.filter(id=user.id).exists() and runs < 100:
+                services.purge_deleted()
+                runs += 1
+                if runs == 1:
+                    self.assertTrue(
+                        Price.objects.filter(location__id__in=location_ids).exists()
+                    )
+
+        self.assertGreater(runs, 2)
+        self.assertFalse(CustomUser.objects.filter(id=user.id).exists())
+        self.assertFalse(Location.all_objects.filter(id__in=location_ids).exists())
+        self.assertFalse(Price.objects.filter(location__id__in=location_ids).exists())
+
 
 class TestNotifications(TestCase):
     fixtures = ["user.json", "settings.json", "location.json"]
@@ -504,6 +692,17 @@ class TestNotifications(TestCase):
         # Activate default translation before each test as this obviously doesn't
         #  happen automatically
         activate(settings.LANGUAGE_CODE)
+        # Only send the notifications scheduled by the tests
+        CustomUser.objects.update(
+            next_notification_type=None, next_notification_at=None
+        )
+
+    def _send_notification(self, user: CustomUser, notification_type: str):
+        # Make the notification of the user due and send it.
+        user.schedule_notification(
+            notification_type, timezone.now() - timedelta(minutes=1)
+        )
+        services.send_due_notifications()
 
     def test_schedule_create_location_notification(self):
         mock_now = datetime.strptime("2022-02-02T22:53+0000", "%Y-%m-%dT%H:%M%z")
@@ -512,21 +711,17 @@ class TestNotifications(TestCase):
         with patch("spritstat.services.notification.timezone", new=datetime_mock):
             user_signed_up.send(self.__class__, request=HttpRequest(), user=self.user)
         self.user.refresh_from_db()
-        next_notification = self.user.next_notification
         self.assertEqual(
-            next_notification.func,
-            "spritstat.services.send_create_location_notification",
+            self.user.next_notification_type, Notifications.CREATE_LOCATION_REMINDER
         )
-        self.assertEqual(eval(next_notification.args)[0], self.user.id)
-        self.assertEqual(next_notification.schedule_type, Schedule.ONCE)
         self.assertEqual(
-            next_notification.next_run,
+            self.user.next_notification_at,
             mock_now + timedelta(days=CREATE_LOCATION_REMINDER_DELAY_DAYS),
         )
 
     def test_send_create_location_notification_default_locale(self):
         # Test if notification is sent with the default locale (German)
-        services.send_create_location_notification(self.user.id)
+        self._send_notification(self.user, Notifications.CREATE_LOCATION_REMINDER)
         message = mail.outbox[0]
         self.assertEqual(message.to[0], self.user.email)
         self.assertEqual(message.from_email, settings.DEFAULT_FROM_EMAIL)
@@ -540,7 +735,7 @@ class TestNotifications(TestCase):
         #  German
         self.user.locale = "de"
         self.user.save()
-        services.send_create_location_notification(self.user.id)
+        self._send_notification(self.user, Notifications.CREATE_LOCATION_REMINDER)
         message = mail.outbox[0]
         self.assertEqual(
             message.subject, "[SPRITSTAT] Du hast noch keinen Ort angelegt"
@@ -551,7 +746,7 @@ class TestNotifications(TestCase):
         #  English
         self.user.locale = "en"
         self.user.save()
-        services.send_create_location_notification(self.user.id)
+        self._send_notification(self.user, Notifications.CREATE_LOCATION_REMINDER)
         message = mail.outbox[0]
         self.assertEqual(
             message.subject, "[SPRITSTAT] You haven't created a location yet"
@@ -561,8 +756,11 @@ class TestNotifications(TestCase):
         # Test if notification is not sent if the user is inactive
         self.user.is_active = False
         self.user.save()
-        services.send_create_location_notification(self.user.id)
+        self._send_notification(self.user, Notifications.CREATE_LOCATION_REMINDER)
         self.assertEqual(len(mail.outbox), 0)
+        # The skipped notification is cleared nevertheless
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.next_notification_at)
 
     def test_schedule_location_reminder_notification(self):
         location = self.user.locations.last()
@@ -573,54 +771,68 @@ class TestNotifications(TestCase):
         with patch("spritstat.services.notification.timezone", new=datetime_mock):
             post_save.send(Location, instance=location, created=True, raw=False)
         self.user.refresh_from_db()
-        next_notification = self.user.next_notification
         self.assertEqual(
-            next_notification.func,
-            "spritstat.services.send_location_reminder_notification",
+            self.user.next_notification_type, Notifications.LOCATION_REMINDER
         )
-        self.assertEqual(eval(next_notification.args)[0], location.id)
-        self.assertEqual(next_notification.schedule_type, Schedule.ONCE)
         self.assertEqual(
-            next_notification.next_run,
+            self.user.next_notification_at,
             mock_now + timedelta(weeks=LOCATION_REMINDER_DELAY_WEEKS),
         )
 
         # Test if save signal is called with created=False
-        check_next_notification_id = next_notification.id
+        next_notification_at = self.user.next_notification_at
         post_save.send(Location, instance=location, created=False, raw=False)
         self.user.refresh_from_db()
-        self.assertEqual(self.user.next_notification_id, check_next_notification_id)
+        self.assertEqual(self.user.next_notification_at, next_notification_at)
 
         # Test if save signal is called with raw=True
-        check_next_notification_id = next_notification.id
-        post_save.send(Location, instance=location, created=False, raw=False)
+        post_save.send(Location, instance=location, created=True, raw=True)
         self.user.refresh_from_db()
-        self.assertEqual(self.user.next_notification_id, check_next_notification_id)
+        self.assertEqual(self.user.next_notification_at, next_notification_at)
 
         # Ensure that no notification is created if the user has notifications
         #  disabled.
         location.refresh_from_db()
         self.user.settings.notifications_active = False
         self.user.settings.save()
-        self.user.next_notification.delete()
+        self.user.cancel_notification()
         post_save.send(Location, instance=location, created=True, raw=False)
         self.user.refresh_from_db()
-        self.assertIsNone(self.user.next_notification_id)
+        self.assertIsNone(self.user.next_notification_type)
+        self.assertIsNone(self.user.next_notification_at)
+
+    def test_schedule_location_reminder_notification_no_schedule(self):
+        # Scheduling a notification doesn't create a scheduler task.
+        count = Schedule.objects.count()
+        location = self.user.locations.last()
+        with self.assertNumQueries(2):
+            post_save.send(Location, instance=location, created=True, raw=False)
+        self.assertEqual(Schedule.objects.count(), count)
 
-    def test_delete_location_reminder_notification(self):
+    def test_cancel_location_reminder_notification(self):
+        # Deleting a location cancels the location reminder.
         location = self.user.locations.last()
-        pre_delete.send(Location, instance=location)
+        post_save.send(Location, instance=location, created=True, raw=False)
+        Location.objects.filter(id=location.id).soft_delete()
         self.user.refresh_from_db()
-        self.assertIsNone(self.user.next_notification_id)
+        self.assertIsNone(self.user.next_notification_type)
+        self.assertIsNone(self.user.next_notification_at)
 
-        # Test if no notification is scheduled
-        location.refresh_from_db()
-        pre_delete.send(Location, instance=location)
+        # Other notifications are kept.
+        user = CustomUser.objects.get(pk=400)
+        user.schedule_notification(
+            Notifications.CREATE_LOCATION_REMINDER, timezone.now()
+        )
+        user.locations.all().soft_delete()
+        user.refresh_from_db()
+        self.assertEqual(
+            user.next_notification_type, Notifications.CREATE_LOCATION_REMINDER
+        )
 
     def test_send_location_reminder_notification_default_locale(self):
         # Test if notification is sent with the default locale (German)
-        location = self.user.locations.last()
-        services.send_location_reminder_notification(location.id)
+        location = self.user.locations.order_by("id").last()
+        self._send_notification(self.user, Notifications.LOCATION_REMINDER)
         message = mail.outbox[0]
         self.assertEqual(message.to[0], location.user.email)
         self.assertEqual(message.from_email, settings.DEFAULT_FROM_EMAIL)
@@ -629,12 +841,14 @@ class TestNotifications(TestCase):
             message.subject,
             "[SPRITSTAT] Schau mal wieder vorbei, es gibt schon einiges zu sehen",
         )
+        # The notification refers to the latest location of the user
+        self.assertIn(f"/location-details/{location.id}/", message.body)
 
     def test_send_location_reminder_notification_locale_de(self):
         # Test if notification is sent correctly if the locale is explicitly set to
         #  German
-        location = CustomUser.objects.get(locale="de").locations.last()
-        services.send_location_reminder_notification(location.id)
+        user = CustomUser.objects.get(locale="de")
+        self._send_notification(user, Notifications.LOCATION_REMINDER)
         message = mail.outbox[0]
         self.assertEqual(
             message.subject,
@@ -644,8 +858,8 @@ class TestNotifications(TestCase):
     def test_send_location_reminder_notification_locale_en(self):
         # Test if notification is sent correctly if the locale is explicitly set to
         #  English
-        location = CustomUser.objects.get(locale="en").locations.last()
-        services.send_location_reminder_notification(location.id)
+        user = CustomUser.objects.get(locale="en")
+        self._send_notification(user, Notifications.LOCATION_REMINDER)
         message = mail.outbox[0]
         self.assertEqual(
             message.subject, "[SPRITSTAT] Have a look, there's already something to see"
@@ -658,6 +872,205 @@ class TestNotifications(TestCase):
             weeks=LOCATION_REMINDER_DELAY_WEEKS - 1
         )
         self.user.save()
-        location = self.user.locations.last()
-        services.send_location_reminder_notification(location.id)
+        self._send_notification(self.user, Notifications.LOCATION_REMINDER)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_send_location_reminder_notification_no_location(self):
+        self.user.locations.all().soft_delete()
+        self._send_notification(self.user, Notifications.LOCATION_REMINDER)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_send_due_notifications(self):
+        past = timezone.now() - timedelta(minutes=1)
+        users = list(CustomUser.objects.filter(is_active=True).order_by("id"))
+        for user in users:
+            user.schedule_notification(Notifications.CREATE_LOCATION_REMINDER, past)
+        pending = CustomUser.objects.get(locale="en")
+        pending.schedule_notification(
+            Notifications.LOCATION_REMINDER, timezone.now() + timedelta(days=1)
+        )
+        users.remove(pending)
+
+        with patch(
+            "spritstat.services.notification.get_connection",
+            wraps=services.notification.get_connection,
+        ) as get_connection_mock:
+            services.send_due_notifications()
+
+        # All due notifications are sent over a single connection.
+        get_connection_mock.assert_called_once()
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            sorted(user.email for user in users),
+        )
+        # Each message has the unsubscribe link of its own user.
+        for message in mail.outbox:
+            user = CustomUser.objects.get(email=message.to[0])
+            self.assertIn(services.Token(user).value, message.body)
+
+        # Only the sent notifications are cleared.
+        self.assertFalse(
+            CustomUser.objects.filter(
+                id__in=[user.id for user in users], next_notification_at__isnull=False
+            ).exists()
+        )
+        pending.refresh_from_db()
+        self.assertEqual(
+            pending.next_notification_type, Notifications.LOCATION_REMINDER
+        )
+
+    def test_send_due_notifications_failure(self):
+        past = timezone.now() - timedelta(minutes=1)
+        users = list(CustomUser.objects.filter(is_active=True).order_by("id")[:3])
+        for user in users:
+            user.schedule_notification(Notifications.CREATE_LOCATION_REMINDER, past)
+
+        # The mail server fails while the second message is sent.
+        send_messages = EmailBackend.send_messages
+        calls = count()
+
+        def fail_second(backend, messages):
+            if next(calls) == 1:
+                raise SMTPException("Connection lost")
+            return send_messages(backend, messages)
+
+        with patch.object(EmailBackend, "send_messages", fail_second):
+            with self.assertRaises(SMTPException):
+                services.send_due_notifications()
+        self.assertEqual(len(mail.outbox), 1)
+        sent = mail.outbox[0].to[0]
+
+        # The next run only sends the notifications that weren't sent.
+        mail.outbox.clear()
+        services.send_due_notifications()
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertNotIn(sent, [message.to[0] for message in mail.outbox])
+        self.assertFalse(
+            CustomUser.objects.filter(next_notification_at__isnull=False).exists()
+        )
+
+    @patch("spritstat.services.notification.time.sleep")
+    def test_send_due_notifications_batched(self, sleep_mock):
+        past = timezone.now() - timedelta(minutes=1)
+        users = CustomUser.objects.filter(is_active=True)[:3]
+        for user in users:
+            user.schedule_notification(Notifications.CREATE_LOCATION_REMINDER, past)
+
+        with self.settings(NOTIFICATION_BATCH_SIZE=2):
+            services.send_due_notifications()
+        self.assertEqual(len(mail.outbox), 3)
+        sleep_mock.assert_called_once_with(settings.NOTIFICATION_BATCH_PAUSE_SECONDS)
+
+        # No further batch is started after the time limit is reached.
+        mail.outbox.clear()
+        for user in users:
+            user.schedule_notification(Notifications.CREATE_LOCATION_REMINDER, past)
+        with self.settings(
+            NOTIFICATION_BATCH_SIZE=2, NOTIFICATION_TIME_LIMIT_SECONDS=0
+        ):
+            services.send_due_notifications()
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(
+            CustomUser.objects.filter(next_notification_at__isnull=False).count(), 1
+        )
+
+
+@patch("spritstat.services.alert.async_task")
+class TestPriceAlerts(TestCase):
+    fixtures = ["user.json", "settings.json", "location.json"]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location = Location.objects.get(pk=2)
+
+    def setUp(self):
+        activate(settings.LANGUAGE_CODE)
+
+    def test_no_alerts(self, async_task_mock):
+        # Locations without alerts only cost a single query
+        with self.assertNumQueries(1):
+            services.evaluate_price_alerts(self.location, 1.0)
+        async_task_mock.assert_not_called()
+
+    def test_create_price(self, async_task_mock):
+        alert = PriceAlert.objects.create(location=self.location, target_amount=1.5)
+        services.price._create_price(
+            self.location, [], MockPriceStatistics(1.4, 1.6, 1.5, 1.5)
+        )
+        async_task_mock.assert_called_once_with(
+            "spritstat.services.send_price_alerts", [alert.id], 1.4
+        )
+
+    def test_hysteresis(self, async_task_mock):
+        alert = PriceAlert.objects.create(location=self.location, target_amount=1.5)
+        inactive = PriceAlert.objects.create(
+            location=self.location, target_amount=1.5, active=False
+        )
+
+        services.evaluate_price_alerts(self.location, 1.5)
+        async_task_mock.assert_called_once_with(
+            "spritstat.services.send_price_alerts", [alert.id], 1.5
+        )
+        alert.refresh_from_db()
+        self.assertTrue(alert.triggered)
+        self.assertIsNotNone(alert.last_sent_at)
+        inactive.refresh_from_db()
+        self.assertFalse(inactive.triggered)
+
+        # The alert isn't sent again while the price stays around the target
+        #  amount.
+        async_task_mock.reset_mock()
+        services.evaluate_price_alerts(self.location, 1.45)
+        services.evaluate_price_alerts(self.location, 1.51)
+        services.evaluate_price_alerts(self.location, 1.49)
+        async_task_mock.assert_not_called()
+
+        # The alert is rearmed once the price rose above the hysteresis.
+        services.evaluate_price_alerts(
+            self.location, 1.5 + settings.PRICE_ALERT_HYSTERESIS + 0.01
+        )
+        alert.refresh_from_db()
+        self.assertFalse(alert.triggered)
+        async_task_mock.assert_not_called()
+
+    def test_rate_limit(self, async_task_mock):
+        last_sent_at = timezone.now() - timedelta(hours=1)
+        alert = PriceAlert.objects.create(
+            location=self.location, target_amount=1.5, last_sent_at=last_sent_at
+        )
+        services.evaluate_price_alerts(self.location, 1.4)
+        async_task_mock.assert_not_called()
+        alert.refresh_from_db()
+        self.assertFalse(alert.triggered)
+        self.assertEqual(alert.last_sent_at, last_sent_at)
+
+        # The alert is sent once the interval passed.
+        alert.last_sent_at = timezone.now() - timedelta(
+            seconds=settings.PRICE_ALERT_MIN_INTERVAL
+        )
+        alert.save()
+        services.evaluate_price_alerts(self.location, 1.4)
+        async_task_mock.assert_called_once()
+
+    def test_send_price_alerts(self, async_task_mock):
+        alerts = [
+            PriceAlert.objects.create(location=self.location, target_amount=amount)
+            for amount in (1.6, 1.5)
+        ]
+        other = PriceAlert.objects.create(location_id=1, target_amount=1.5)
+        services.send_price_alerts([a.id for a in alerts] + [other.id], 1.4)
+
+        # One notification per location for the lowest target amount.
+        self.assertEqual(len(mail.outbox), 2)
+        message = next(m for m in mail.outbox if m.to[0] == self.location.user.email)
+        self.assertIn(self.location.name, message.subject)
+        self.assertIn("1.400", message.body)
+        self.assertIn("1.500", message.body)
+        self.assertIn(f"/location-details/{self.location.id}/", message.body)
+
+    def test_send_price_alerts_notifications_inactive(self, async_task_mock):
+        alert = PriceAlert.objects.create(location=self.location, target_amount=1.5)
+        self.location.user.settings.notifications_active = False
+        self.location.user.settings.save()
+        services.send_price_alerts([alert.id], 1.4)
         self.assertEqual(len(mail.outbox), 0)
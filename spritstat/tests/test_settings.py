@@ -74,7 +74,7 @@ class TestSettings(APITestCase):
         self.assertDictEqual(response.data, test_payload)
         self.assertDictEqual(response.data["intro"], self.intro_settings_as_dict())
         self.assertEqual(response.data["notifications_active"], False)
-        self.assertIsNone(self.user.next_notification_id)
+        self.assertIsNone(self.user.next_notification_at)
 
     def test_set_partial_intro_settings(self):
         # Test if we can set the one of the intro settings using patch
@@ -109,13 +109,13 @@ class TestSettings(APITestCase):
         response = self.client.patch(self.url, {"notifications_active": False})
         self.user.refresh_from_db()
         self.assertDictEqual(response.data, test_payload)
-        self.assertIsNone(self.user.next_notification_id)
+        self.assertIsNone(self.user.next_notification_at)
 
     def test_activate_notifications_without_schedule(self):
         # Check if disabling notifications succeeds if currently no notification
         #  is scheduled.
 
-        self.user.next_notification.delete()
+        self.user.cancel_notification()
         response = self.client.patch(self.url, {"notifications_active": True})
         self.assertTrue(response.data["notifications_active"])
 
@@ -149,7 +149,7 @@ class TestUnsubscribe(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         settings = Settings.objects.get(user=self.user)
         self.assertEqual(settings.notifications_active, False)
-        self.assertIsNone(self.user.next_notification)
+        self.assertIsNone(self.user.next_notification_at)
 
     def test_different_user_logged_in(self):
         # Test with a different user logged in, as it must not matter which user
@@ -164,7 +164,7 @@ class TestUnsubscribe(APITestCase):
         user_2.refresh_from_db()
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Settings.objects.get(user=user_2).notifications_active, False)
-        self.assertIsNone(user_2.next_notification)
+        self.assertIsNone(user_2.next_notification_at)
 
     def test_no_notification_scheduled(self):
         # Make sure that unsubscribe doesn't fail if no notification is scheduled.
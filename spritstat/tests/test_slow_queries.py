@@ -0,0 +1,155 @@
+from django.core.management import call_command
+from django.test import AsyncClient, SimpleTestCase, override_settings
+from django.urls import reverse
+from django_q.signals import pre_execute
+from io import StringIO
+import json
+import os
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+import tempfile
+
+from spritstat import services, slow_queries
+
+
+class TestFingerprint(SimpleTestCase):
+    def test_fingerprint(self):
+        self.assertEqual(
+            slow_queries.fingerprint(
+                'SELECT "a"."id" FROM "a" WHERE "a"."id" IN (%s, %s, %s)\n'
+                '  AND "a"."name" = \'O\'\'Brien\' AND "a"."t2" > 1.5 LIMIT 21'
+            ),
+            'SELECT "a"."id" FROM "a" WHERE "a"."id" IN (...) '
+            'AND "a"."name" = %s AND "a"."t2" > %s LIMIT %s',
+        )
+        self.assertEqual(
+            slow_queries.fingerprint('INSERT INTO "a" VALUES (%s, %s), (%s, %s)'),
+            'INSERT INTO "a" VALUES (...), ...',
+        )
+
+
+@override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+class TestSlowQueries(APITestCase):
+    fixtures = [
+        "user.json",
+        "settings.json",
+        "location.json",
+        "test_station.json",
+        "test_price.json",
+    ]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "slow_queries.log")
+        slow_queries.configure(self.path)
+        self.addCleanup(slow_queries.disable)
+        # The middleware is only loaded by clients created after the log has
+        #  been enabled.
+        self.client = APIClient()
+        self.client.login(username="test2@test.at", password="test")
+        self.async_client = AsyncClient()
+        self.async_client.login(username="test2@test.at", password="test")
+
+    def test_request(self):
+        response = self.client.get(reverse("prices_hour", kwargs={"location_id": 2}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        queries = list(slow_queries.read_log(self.path))
+        sources = {query["source"] for query in queries}
+        self.assertIn("GET prices_hour", sources)
+        # The session is loaded before the view is resolved
+        self.assertIn("GET /api/v1/sprit/2/prices/hour/", sources)
+        self.assertTrue(
+            all(query["fingerprint"] and query["duration_ms"] >= 0 for query in queries)
+        )
+        # The parameters aren't logged by default
+        self.assertFalse(any("sql" in query or "params" in query for query in queries))
+
+    @override_settings(SLOW_QUERY_LOG_PARAMS=True)
+    def test_request_params(self):
+        self.client.get(reverse("prices_hour", kwargs={"location_id": 2}))
+
+        queries = list(slow_queries.read_log(self.path))
+        logged = [query for query in queries if "params" in query]
+        self.assertTrue(logged)
+        self.assertTrue(all('"spritstat_' in query["sql"] for query in logged), logged)
+        # The parameters of the session and user queries aren't logged
+        excluded = [query for query in queries if "params" not in query]
+        self.assertTrue(
+            any('"django_session"' in query["fingerprint"] for query in excluded)
+        )
+        self.assertTrue(
+            any('"users_customuser"' in query["fingerprint"] for query in excluded)
+        )
+
+    async def test_request_async(self):
+        response = await self.async_client.get(
+            reverse("prices_hour", kwargs={"location_id": 2})
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        sources = {query["source"] for query in slow_queries.read_log(self.path)}
+        self.assertIn("GET prices_hour", sources)
+
+    def test_task(self):
+        # The signal is sent like by the cluster, which can't execute the task
+        #  itself, as it closes the database connection of the test.
+        self.addCleanup(slow_queries.reset_source, slow_queries.set_source(""))
+        pre_execute.send(
+            sender="django_q",
+            func=services.compact_task_tables,
+            task={"func": "spritstat.services.compact_task_tables"},
+        )
+        services.compact_task_tables()
+
+        sources = {query["source"] for query in slow_queries.read_log(self.path)}
+        self.assertIn("task spritstat.services.compact_task_tables", sources)
+
+    def test_command(self):
+        for _ in range(3):
+            self.client.get(reverse("prices_hour", kwargs={"location_id": 2}))
+        # Lines written while the log was rotated are skipped
+        with open(self.path, "a") as f:
+            f.write('{"incomplete\n')
+        with open(f"{self.path}.1", "w") as f:
+            f.write(
+                json.dumps(
+                    {
+                        "time": "2023-01-01T00:00:00+00:00",
+                        "database": "default",
+                        "source": "task spritstat.services.request_location_prices",
+                        "duration_ms": 100000.0,
+                        "fingerprint": 'SELECT * FROM "spritstat_price"',
+                        "sql": 'SELECT * FROM "spritstat_price" WHERE "id" > %s',
+                        "params": [1],
+                        "many": False,
+                    }
+                )
+                + "\n"
+            )
+
+        out = StringIO()
+        call_command("slowqueries", "--log", self.path, "-n", "3", stdout=out)
+        output = out.getvalue()
+        self.assertIn(
+            " 1. [%s] 1 calls, total 100000.0ms"
+            % slow_queries.fingerprint_id('SELECT * FROM "spritstat_price"'),
+            output,
+        )
+        self.assertIn(
+            "sources: task spritstat.services.request_location_prices (1)", output
+        )
+        self.assertIn(" 3. ", output)
+        self.assertNotIn(" 4. ", output)
+        # The plan of the slowest query
+        self.assertIn("spritstat_price", output.split("Plan of")[1])
+
+        out = StringIO()
+        call_command("slowqueries", "--log", self.path, "--explain", "2", stdout=out)
+        # The parameters of the queries of the requests weren't logged
+        self.assertIn("The parameters of the query weren't logged", out.getvalue())
+
+        out = StringIO()
+        call_command("slowqueries", "--log", self.path, "--sort", "p95", stdout=out)
+        self.assertIn(" 1. [", out.getvalue())
@@ -3,10 +3,11 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 
 from spritstat.models import Station
+from spritstat.tests.utils import QueryBudgetTestMixin
 from users.models import CustomUser
 
 
-class TestStations(APITestCase):
+class TestStations(QueryBudgetTestMixin, APITestCase):
     fixtures = [
         "user.json",
         "location.json",
@@ -58,3 +59,10 @@ class TestStations(APITestCase):
     def test_delete(self):
         response = self.client.delete(self.url)
         self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_query_budget(self):
+        # The first request records the activity and the visit of the user.
+        self.client.get(self.url)
+        with self.assertQueryBudget("stations"):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
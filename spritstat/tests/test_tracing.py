@@ -0,0 +1,132 @@
+from django.urls import reverse
+from django_q.signals import pre_enqueue, pre_execute
+from rest_framework import status
+from django.test import AsyncClient
+from rest_framework.test import APIClient, APITestCase
+from unittest import skipUnless
+
+from spritstat import services, tracing
+from spritstat.models import Location
+
+if tracing.trace:
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+
+
+@skipUnless(tracing.trace, "Tracing requires the opentelemetry-sdk package")
+class TestTracing(APITestCase):
+    fixtures = [
+        "user.json",
+        "settings.json",
+        "location.json",
+        "test_station.json",
+        "test_price.json",
+    ]
+
+    def setUp(self):
+        self.exporter = InMemorySpanExporter()
+        tracing.configure(self.exporter)
+        # The tracing middleware is only loaded by clients created after
+        #  tracing has been enabled.
+        self.client = APIClient()
+        self.client.login(username="test2@test.at", password="test")
+        self.async_client = AsyncClient()
+        self.async_client.login(username="test2@test.at", password="test")
+
+    def tearDown(self):
+        tracing.disable()
+
+    def _get_spans(self):
+        tracing.disable()
+
+        return {span.name: span for span in self.exporter.get_finished_spans()}
+
+    def test_request(self):
+        response = self.client.get(
+            reverse("prices_hour", kwargs={"location_id": 2}),
+            HTTP_TRACEPARENT="00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        spans = self._get_spans()
+        request_span = spans["GET prices_hour"]
+        self.assertEqual(
+            request_span.context.trace_id, 0x0AF7651916CD43DD8448EB211C80319C
+        )
+        self.assertEqual(request_span.attributes["http.status_code"], 200)
+        location_span = spans["UserLocationMixin._get_user_location"]
+        self.assertEqual(location_span.parent.span_id, request_span.context.span_id)
+        serialize_span = spans["serialize PriceHourSerializer"]
+        self.assertEqual(serialize_span.parent.span_id, request_span.context.span_id)
+        # The aggregation is executed while serializing
+        self.assertTrue(
+            any(
+                span.parent.span_id == serialize_span.context.span_id
+                and span.attributes["db.statement"].startswith("SELECT")
+                for span in self.exporter.get_finished_spans()
+                if span.name == "SELECT"
+            )
+        )
+
+    async def test_request_async(self):
+        response = await self.async_client.get(
+            reverse("prices_hour", kwargs={"location_id": 2})
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        spans = self._get_spans()
+        request_span = spans["GET prices_hour"]
+        self.assertEqual(request_span.attributes["http.status_code"], 200)
+        # The queries executed in the thread of the sync view are traced
+        self.assertTrue(
+            any(
+                span.parent.span_id
+                == spans["serialize PriceHourSerializer"].context.span_id
+                for span in self.exporter.get_finished_spans()
+                if span.name == "SELECT"
+            )
+        )
+
+    def test_schedule(self):
+        response = self.client.post(
+            reverse("locations"),
+            {
+                "type": 1,
+                "name": "Test",
+                "address": "Address",
+                "latitude": 48.1,
+                "longitude": 16.1,
+                "fuel_type": "DIE",
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        spans = self._get_spans()
+        schedule = Location.objects.get(id=response.data["id"]).schedule
+        trace_id = f"{spans['POST locations'].context.trace_id:032x}"
+        self.assertIn(trace_id, schedule.kwargs)
+
+    def test_task(self):
+        link = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+        task = {
+            "func": "spritstat.services.compact_task_tables",
+            "args": (),
+            "kwargs": {tracing.TRACE_CONTEXT_KWARG: {"traceparent": link}},
+        }
+        # The signals are sent like by the cluster, which can't execute the
+        #  task itself, as it closes the database connection of the test.
+        with tracing.span("parent") as parent:
+            pre_enqueue.send(sender="django_q", task=task)
+        self.assertDictEqual(task["kwargs"], {})
+        pre_execute.send(
+            sender="django_q", func=services.compact_task_tables, task=task
+        )
+        services.compact_task_tables(*task["args"], **task["kwargs"])
+
+        spans = self._get_spans()
+        task_span = spans["task compact_task_tables"]
+        self.assertEqual(task_span.parent.span_id, parent.context.span_id)
+        self.assertEqual(
+            task_span.links[0].context.trace_id, 0x0AF7651916CD43DD8448EB211C80319C
+        )
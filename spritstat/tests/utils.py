@@ -0,0 +1,22 @@
+from contextlib import contextmanager
+from typing import Iterator
+
+from spritstat.middleware import QueryTimer, get_query_budget
+
+
+class QueryBudgetTestMixin:
+    @contextmanager
+    def assertQueryBudget(self, name: str) -> Iterator[QueryTimer]:
+        # Fail if the requests within the context execute more queries than
+        #  the budget of the URL name in QUERY_BUDGETS.
+        budget = get_query_budget(name)
+        timer = QueryTimer()
+        with timer.track():
+            yield timer
+
+        self.assertLessEqual(
+            timer.count,
+            budget["queries"],
+            f"{name} executed {timer.count} queries, but its budget is "
+            f"{budget['queries']}",
+        )
@@ -0,0 +1,335 @@
+from asgiref.sync import sync_to_async
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.dispatch import receiver
+from django.http import HttpRequest, HttpResponse
+from django_q.signals import pre_enqueue, pre_execute
+import functools
+import inspect
+from typing import AsyncIterator, Callable, Dict, Iterator, Optional, Tuple
+
+try:
+    from opentelemetry import propagate, trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+        SpanExporter,
+    )
+except ImportError:
+    trace = None
+
+
+# Optional tracing of the requests, the ORM queries, the serialization, the
+#  E-Control requests and the scheduler tasks using OpenTelemetry. Tracing is
+#  activated by setting TRACING_EXPORTER, which requires the opentelemetry-sdk
+#  package. The spans are written to stdout or as one JSON object per line to
+#  a file, so no collector is required.
+# The trace context of a request or task is passed to the tasks it enqueues. A
+#  schedule stores the trace context it was created in and every execution of
+#  the schedule links to it, so e.g. the price requests of a location can be
+#  followed back to the creation of the location.
+
+TRACE_CONTEXT_KWARG = "trace_context"
+
+_provider = None
+_tracer = None
+# Trace context and link of the task that is executed next by this process
+_task_context: Optional[Tuple[Dict, Optional[Dict]]] = None
+_query_spans_active: ContextVar[bool] = ContextVar("query_spans_active", default=False)
+
+
+class _NullSpan:
+    # Replacement for the span if tracing isn't enabled.
+    def set_attribute(self, key: str, value) -> None:
+        pass
+
+    def update_name(self, name: str) -> None:
+        pass
+
+
+def configure(exporter: Optional["SpanExporter"] = None) -> None:
+    """
+    Enable tracing if an exporter is configured.
+
+    :param exporter: exporter the spans are written to, defaults to the
+        exporter configured by TRACING_EXPORTER
+    """
+
+    global _provider, _tracer
+
+    if exporter is None:
+        if not settings.TRACING_EXPORTER:
+            return
+        if trace is None:
+            raise ImproperlyConfigured("Tracing requires the opentelemetry-sdk package")
+
+        if settings.TRACING_EXPORTER == "console":
+            exporter = ConsoleSpanExporter()
+        else:
+            # The processes append to the same file, each span is written as a
+            #  single line.
+            exporter = ConsoleSpanExporter(
+                out=open(settings.TRACING_EXPORTER, "a", buffering=1),
+                formatter=lambda span: span.to_json(indent=None) + "\n",
+            )
+
+    # The span processor exports the spans in a background thread, which is
+    #  restarted in forked processes.
+    _provider = TracerProvider(resource=Resource.create({"service.name": "spritstat"}))
+    _provider.add_span_processor(BatchSpanProcessor(exporter))
+    _tracer = _provider.get_tracer(__name__)
+    _instrument_serializers()
+
+
+def disable() -> None:
+    # Export the remaining spans and disable tracing.
+    global _provider, _tracer
+
+    if _provider:
+        _provider.force_flush()
+        _provider.shutdown()
+    _provider = None
+    _tracer = None
+
+
+def is_enabled() -> bool:
+    return _tracer is not None
+
+
+@contextmanager
+def span(name: str, attributes: Optional[Dict] = None, **kwargs) -> Iterator:
+    # Span which is the current span while the context is active.
+    if not _tracer:
+        yield _NullSpan()
+        return
+
+    with _tracer.start_as_current_span(name, attributes=attributes, **kwargs) as s:
+        yield s
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    # Decorator that executes the function in a span, the function name is used
+    #  as span name by default.
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _query_span(execute, sql, params, many, context):
+    connection = context["connection"]
+    with _tracer.start_as_current_span(
+        sql.split(None, 1)[0].upper() if sql else "query",
+        kind=trace.SpanKind.CLIENT,
+        attributes={
+            "db.system": connection.vendor,
+            "db.name": str(connection.settings_dict["NAME"]),
+            "db.statement": sql,
+        },
+    ):
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def query_spans() -> Iterator[None]:
+    # Create a span for each query of all connections of this thread, unless
+    #  this is already done by an outer context.
+    if not _tracer or _query_spans_active.get():
+        yield
+        return
+
+    token = _query_spans_active.set(True)
+    try:
+        with _wrap_queries():
+            yield
+    finally:
+        _query_spans_active.reset(token)
+
+
+@asynccontextmanager
+async def async_query_spans() -> AsyncIterator[None]:
+    # Like query_spans for async code, whose queries are executed by the thread
+    #  of its sync code, see asgiref.sync.sync_to_async.
+    if not _tracer or _query_spans_active.get():
+        yield
+        return
+
+    token = _query_spans_active.set(True)
+    try:
+        stack = await sync_to_async(_wrap_queries)()
+        try:
+            yield
+        finally:
+            await sync_to_async(stack.close)()
+    finally:
+        _query_spans_active.reset(token)
+
+
+def _wrap_queries() -> ExitStack:
+    # Install the query span wrapper in all connections of this thread until
+    #  the returned stack is closed.
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(_query_span))
+
+    return stack
+
+
+def _server_span(request: HttpRequest):
+    # Span of a request, which continues the trace of the client if provided.
+    return span(
+        request.method,
+        {"http.method": request.method, "http.target": request.path},
+        context=propagate.extract(request.headers),
+        kind=trace.SpanKind.SERVER,
+    )
+
+
+@contextmanager
+def request_span(request: HttpRequest) -> Iterator:
+    with _server_span(request) as s, query_spans():
+        yield s
+
+
+@asynccontextmanager
+async def async_request_span(request: HttpRequest) -> AsyncIterator:
+    with _server_span(request) as s:
+        async with async_query_spans():
+            yield s
+
+
+def set_view(server_span: "trace.Span", request: HttpRequest) -> None:
+    # The route is only known after the URL has been resolved.
+    if request.resolver_match and request.resolver_match.url_name:
+        server_span.update_name(f"{request.method} {request.resolver_match.url_name}")
+        server_span.set_attribute("http.route", request.resolver_match.route)
+
+
+def set_response(server_span: "trace.Span", response: HttpResponse) -> None:
+    server_span.set_attribute("http.status_code", response.status_code)
+    if response.status_code >= 500:
+        server_span.set_status(trace.StatusCode.ERROR)
+
+
+def schedule_kwargs() -> Dict[str, Dict[str, str]]:
+    # Keyword arguments that store the current trace context with a schedule.
+    if not _tracer:
+        return {}
+
+    carrier = {}
+    propagate.inject(carrier)
+
+    return {TRACE_CONTEXT_KWARG: carrier} if carrier else {}
+
+
+@receiver(pre_enqueue)
+def inject_task_context(sender: str, task: Dict, **kwargs) -> None:
+    # The trace context of a schedule is passed as keyword argument, it is
+    #  removed even if tracing is disabled, so the function doesn't receive it.
+    link = task["kwargs"].pop(TRACE_CONTEXT_KWARG, None)
+    if not _tracer:
+        return
+
+    if link:
+        task["trace_link"] = link
+    carrier = {}
+    propagate.inject(carrier)
+    if carrier:
+        task["trace_context"] = carrier
+
+
+@receiver(pre_execute)
+def extract_task_context(sender: str, task: Dict, **kwargs) -> None:
+    global _task_context
+
+    if _tracer:
+        _task_context = (task.get("trace_context", {}), task.get("trace_link"))
+
+
+def traced_task(func: Callable) -> Callable:
+    # Decorator for the functions executed by the scheduler, the span continues
+    #  the trace of the request or task which enqueued the task. It is required
+    #  in addition to the signals, as the scheduler doesn't signal the end of
+    #  the execution in the process executing the task.
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        global _task_context
+
+        if not _tracer:
+            return func(*args, **kwargs)
+
+        # If the function isn't executed by the scheduler, the span is a child
+        #  of the current span.
+        parent_context = None
+        links = []
+        if _task_context:
+            carrier, link = _task_context
+            _task_context = None
+            parent_context = propagate.extract(carrier)
+            if link:
+                links.append(
+                    trace.Link(
+                        trace.get_current_span(
+                            propagate.extract(link)
+                        ).get_span_context()
+                    )
+                )
+
+        with span(
+            f"task {func.__name__}",
+            {"task.args": repr(args)},
+            context=parent_context,
+            kind=trace.SpanKind.CONSUMER,
+            links=links,
+        ), query_spans():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+_serializers_instrumented = False
+
+
+def _instrument_serializers() -> None:
+    # DRF has no hooks for the serialization, so the data property of all
+    #  serializers is wrapped in a span. The queries of list views are executed
+    #  while the data is serialized, so they are children of this span.
+    global _serializers_instrumented
+
+    if _serializers_instrumented:
+        return
+
+    from rest_framework.serializers import BaseSerializer, ListSerializer
+
+    data = BaseSerializer.data
+
+    def _data(self):
+        serializer = self.child if isinstance(self, ListSerializer) else self
+        with span(f"serialize {type(serializer).__name__}"):
+            return data.fget(self)
+
+    BaseSerializer.data = property(_data)
+    _serializers_instrumented = True
@@ -1,7 +1,12 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include, re_path
 
-from . import views
+from . import async_views, views
+
+
+# Serve the price and location list views asynchronously if activated
+api_views = async_views if settings.ASYNC_VIEWS else views
 
 
 urlpatterns = [
@@ -9,38 +14,49 @@ urlpatterns = [
     path("manifest.json", views.manifest),
     path("service-worker.js", views.service_worker),
     path("offline.html", views.offline),
+    path("metrics", views.metrics, name="metrics"),
     path("admin/", admin.site.urls),
     path("api/v1/users/", include("users.urls")),
     path("api/v1/sprit/settings/", views.Settings.as_view(), name="settings"),
-    path("api/v1/sprit/", views.LocationList.as_view(), name="locations"),
+    path("api/v1/sprit/", api_views.LocationList.as_view(), name="locations"),
     path(
         "api/v1/sprit/<int:pk>/", views.LocationDetail.as_view(), name="location_detail"
     ),
     path(
         "api/v1/sprit/<int:location_id>/prices/",
-        views.PriceHistory.as_view(),
+        api_views.PriceHistory.as_view(),
         name="prices_history",
     ),
     path(
         "api/v1/sprit/<int:location_id>/prices/hour/",
-        views.PriceHour.as_view(),
+        api_views.PriceHour.as_view(),
         name="prices_hour",
     ),
     path(
         "api/v1/sprit/<int:location_id>/prices/day_of_week/",
-        views.PriceDayOfWeek.as_view(),
+        api_views.PriceDayOfWeek.as_view(),
         name="prices_day_of_week",
     ),
     path(
         "api/v1/sprit/<int:location_id>/prices/day_of_month/",
-        views.PriceDayOfMonth.as_view(),
+        api_views.PriceDayOfMonth.as_view(),
         name="prices_day_of_month",
     ),
     path(
         "api/v1/sprit/<int:location_id>/prices/station_frequency/",
-        views.PriceStationFrequency.as_view(),
+        api_views.PriceStationFrequency.as_view(),
         name="prices_station_frequency",
     ),
+    path(
+        "api/v1/sprit/<int:location_id>/alerts/",
+        views.PriceAlertList.as_view(),
+        name="price_alerts",
+    ),
+    path(
+        "api/v1/sprit/alerts/<int:pk>/",
+        views.PriceAlertDetail.as_view(),
+        name="price_alert_detail",
+    ),
     path(
         "api/v1/sprit/station/",
         views.StationList.as_view(),
@@ -1,59 +1,140 @@
 from abc import ABC, abstractmethod
 from django.conf import settings
 from django.contrib.staticfiles.finders import find
-from django.db.models import Count, QuerySet, F, FloatField
-from django.db.models.functions import Cast
-from django.http import HttpResponse, HttpResponseServerError
+from django.db.models import QuerySet
+from django.http import HttpResponse, HttpResponseNotFound, HttpResponseServerError
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.loader import get_template, render_to_string
 from django_q.tasks import schedule, Schedule
+from prometheus_client import CONTENT_TYPE_LATEST
 from rest_framework import generics, status
 from rest_framework import permissions
+from rest_framework.exceptions import ValidationError
 from rest_framework.serializers import Serializer
 from rest_framework.views import APIView, Response
-from typing import Union
+from typing import Dict, List, Optional, Set, Union
 
 from . import models
 from . import serializers
+from .assets import AssetNotFoundError, CachedAsset
+from .metrics import generate_metrics, is_authorized_scraper
 from .permissions import IsOwner
 from .serializers import PriceStationFrequencySerializer, UnsubscribeSerializer
+from .tracing import schedule_kwargs, traced
 
 
 SERVICE_WORKER_FILENAME = "service-worker.js"
 
 
+def parse_include(value: Optional[str]) -> Set[str]:
+    # Parse the comma separated price data include options of the location
+    #  list.
+    if not value:
+        return set()
+
+    include = set(value.split(","))
+    invalid = include - serializers.LOCATION_INCLUDE_FIELDS.keys()
+    if invalid:
+        raise ValidationError(
+            {"include": [f"Invalid value: {','.join(sorted(invalid))}"]}
+        )
+
+    return include
+
+
+def parse_top_n(value: Optional[str]) -> Optional[int]:
+    # Parse the number of entries that should be returned at most.
+    if value is None:
+        return None
+
+    try:
+        top_n = int(value)
+    except ValueError:
+        top_n = 0
+
+    if top_n < 1:
+        raise ValidationError({"top_n": ["Must be a positive integer"]})
+
+    return top_n
+
+
+def _render_template(template_name: str, context: Optional[Dict] = None) -> bytes:
+    return render_to_string(template_name, context).encode()
+
+
+def _template_sources(template_name: str) -> List[str]:
+    # The templates depend on the webpack manifest, so it has to be checked
+    #  for changes as well.
+    sources = [get_template(template_name).origin.name]
+    manifest_path = find(settings.MANIFEST_LOADER["manifest_file"])
+    if manifest_path:
+        sources.append(manifest_path)
+
+    return sources
+
+
+def _load_service_worker() -> bytes:
+    service_worker_path = find(SERVICE_WORKER_FILENAME)
+
+    if not service_worker_path:
+        raise AssetNotFoundError(SERVICE_WORKER_FILENAME)
+
+    with open(service_worker_path, "rb") as file:
+        return file.read()
+
+
+INDEX_ASSET = CachedAsset(
+    "text/html; charset=utf-8",
+    lambda: _render_template(
+        "index.html", {"google_maps_api_key": settings.GOOGLE_MAPS_API_KEY}
+    ),
+    lambda: _template_sources("index.html"),
+)
+MANIFEST_ASSET = CachedAsset(
+    "application/json",
+    lambda: _render_template("manifest.json"),
+    lambda: _template_sources("manifest.json"),
+)
+SERVICE_WORKER_ASSET = CachedAsset(
+    "application/javascript",
+    _load_service_worker,
+    lambda: [path for path in [find(SERVICE_WORKER_FILENAME)] if path],
+)
+
+
 def index(request):
-    return render(
-        request,
-        "index.html",
-        context={"google_maps_api_key": settings.GOOGLE_MAPS_API_KEY},
-    )
+    # The index is served for all frontend paths, so it is cached in memory.
+    return INDEX_ASSET.response(request)
 
 
 def manifest(request):
     # We need to provide the webmanifest file from the root path as
     #  otherwise it wouldn't work.
 
-    return render(request, "manifest.json")
+    return MANIFEST_ASSET.response(request)
 
 
 def service_worker(request):
     # We need to provide the service-worker.js file from the root path as
     #  otherwise it wouldn't have the correct scope.
 
-    service_worker_path = find(SERVICE_WORKER_FILENAME)
-
-    if not service_worker_path:
+    try:
+        return SERVICE_WORKER_ASSET.response(request)
+    except AssetNotFoundError:
         return HttpResponseServerError("Service worker not found")
 
-    return HttpResponse(
-        open(service_worker_path).read(), content_type="application/javascript"
-    )
-
 
 def offline(request):
     return render(request, "offline.html")
 
 
+def metrics(request):
+    if not is_authorized_scraper(request):
+        return HttpResponseNotFound()
+
+    return HttpResponse(generate_metrics(), content_type=CONTENT_TYPE_LATEST)
+
+
 class Settings(generics.RetrieveUpdateAPIView):
     queryset = models.Settings.objects.all()
     serializer_class = serializers.SettingsSerializer
@@ -96,9 +177,38 @@ class LocationList(generics.ListCreateAPIView):
     serializer_class = serializers.LocationSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwner]
 
+    def _get_include(self) -> Set[str]:
+        # The price data can only be included when listing the locations.
+        if self.request.method != "GET":
+            return set()
+
+        return parse_include(self.request.query_params.get("include"))
+
     def get_queryset(self):
         # We only list the objects of the current user
-        return models.Location.objects.filter(user=self.request.user.id)
+        queryset = models.Location.objects.filter(user=self.request.user.id)
+
+        # The price data is annotated, so the number of queries doesn't depend
+        #  on the number of locations.
+        include = self._get_include()
+        if include:
+            queryset = queryset.with_latest_price()
+        if "trend" in include:
+            queryset = queryset.with_price_trend()
+
+        return queryset
+
+    def get_serializer_class(self):
+        if self._get_include():
+            return serializers.LocationPriceSerializer
+
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["include"] = self._get_include()
+
+        return context
 
     def perform_create(self, serializer):
         # Add the current user to the created database object
@@ -117,6 +227,7 @@ class LocationList(generics.ListCreateAPIView):
             "spritstat.services.request_location_prices",
             location_id,
             schedule_type=Schedule.HOURLY,
+            **schedule_kwargs(),
         )
         location_object = models.Location.objects.get(pk=location_id)
         location_object.schedule = schedule_object
@@ -134,6 +245,11 @@ class LocationDetail(generics.RetrieveDestroyAPIView):
     serializer_class = serializers.LocationSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwner]
 
+    def perform_destroy(self, instance):
+        # Deleting the prices of a location takes a while, so it is done in
+        #  the background.
+        models.Location.objects.filter(id=instance.id).soft_delete()
+
 
 class StationList(generics.ListAPIView):
     serializer_class = serializers.StationSerializer
@@ -145,6 +261,7 @@ class StationList(generics.ListAPIView):
 
 
 class UserLocationMixin(APIView):
+    @traced()
     def _get_user_location(self) -> models.Location:
         location_id = self.kwargs["location_id"]
         location = get_object_or_404(models.Location, id=location_id)
@@ -159,6 +276,35 @@ class UserLocationMixin(APIView):
         return location
 
 
+class PriceAlertList(UserLocationMixin, generics.ListCreateAPIView):
+    serializer_class = serializers.PriceAlertSerializer
+    permission_classes = [permissions.IsAuthenticated, IsOwner]
+
+    def get_queryset(self):
+        location = self._get_user_location()
+
+        return models.PriceAlert.objects.filter(location=location).order_by("id")
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # The location is required to check the alert limit
+        if self.request.method == "POST":
+            context["location"] = self._get_user_location()
+
+        return context
+
+    def perform_create(self, serializer):
+        serializer.save(location=serializer.context["location"])
+
+
+class PriceAlertDetail(generics.RetrieveUpdateDestroyAPIView):
+    queryset = models.PriceAlert.objects.filter(
+        location__deleted_at__isnull=True
+    ).select_related("location__user")
+    serializer_class = serializers.PriceAlertSerializer
+    permission_classes = [permissions.IsAuthenticated, IsOwner]
+
+
 class DateRangeMixin(APIView):
     def _get_date_range(self) -> str:
         return self.request.query_params.get("date_range")
@@ -187,7 +333,8 @@ class PriceHistory(AbstractPriceList):
     serializer_class = serializers.PriceHistorySerializer
 
     def _process_data(self, data: QuerySet[models.Price]) -> QuerySet[models.Price]:
-        return data
+        # Prefetch the stations, so they aren't queried for each price.
+        return data.prefetch_related("stations")
 
 
 class PriceHour(AbstractPriceList):
@@ -221,15 +368,16 @@ class PriceStationFrequency(UserLocationMixin, DateRangeMixin, generics.ListAPIV
     permission_classes = [permissions.IsAuthenticated, IsOwner]
     serializer_class = PriceStationFrequencySerializer
 
+    def _get_top_n(self) -> Optional[int]:
+        return parse_top_n(self.request.query_params.get("top_n"))
+
     def get_queryset(self) -> QuerySet:
         location = self._get_user_location()
         date_range = self._get_date_range()
+        top_n = self._get_top_n()
 
-        prices = models.Price.objects.filter(location=location).date_range(date_range)
-        count = prices.count()
         return (
-            models.Price.stations.through.objects.filter(price__in=prices)
-            .values("station_id")
-            .alias(count=Count("station_id"))
-            .annotate(frequency=Cast(F("count"), output_field=FloatField()) / count)
+            models.Price.objects.filter(location=location)
+            .date_range(date_range)
+            .station_frequency(top_n)
         )
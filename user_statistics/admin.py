@@ -8,6 +8,11 @@ class DailyActiveUsersAdmin(admin.ModelAdmin):
     fields = ("date", "count", "fraction")
 
 
+@admin.register(models.WeeklyActiveUsers)
+class WeeklyActiveUsersAdmin(admin.ModelAdmin):
+    fields = ("date", "count", "fraction")
+
+
 @admin.register(models.MonthlyActiveUsers)
 class MonthlyActiveUsersAdmin(admin.ModelAdmin):
     fields = ("date", "count", "fraction")
@@ -0,0 +1,40 @@
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from user_statistics.services import PERIODS, calculate_active_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalculates the daily, weekly and monthly active users for all "
+        "periods between the provided days"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "start", type=date.fromisoformat, help="First day (YYYY-MM-DD)"
+        )
+        parser.add_argument(
+            "end",
+            type=date.fromisoformat,
+            nargs="?",
+            help="Last day (YYYY-MM-DD), defaults to yesterday",
+        )
+        parser.add_argument(
+            "-p",
+            "--period",
+            choices=PERIODS.keys(),
+            action="append",
+            help="Period to calculate, defaults to all periods",
+        )
+
+    def handle(self, *args, **options):
+        start = options["start"]
+        end = options["end"] or timezone.localdate() - timedelta(days=1)
+        if end < start:
+            raise CommandError("The last day has to be after the first day")
+
+        for name in options["period"] or PERIODS.keys():
+            calculate_active_users(PERIODS[name], start, end, update=True)
+            self.stdout.write(f"Calculated {name} active users")
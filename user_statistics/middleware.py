@@ -0,0 +1,88 @@
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from datetime import datetime, time, timedelta
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
+import typing
+from user_visit.middleware import save_user_visit
+from user_visit.models import UserVisit
+from user_visit.settings import RECORDING_BYPASS, RECORDING_DISABLED
+
+from spritstat.buffer import CacheBuffer
+from spritstat.metrics import observe_cache
+from spritstat.middleware import AsyncCapableMiddleware
+
+
+# Replacement for the user visit middleware of django-user-visit, which writes
+#  the visit to the database on the request path. Visits are only recorded
+#  once per user and day and are buffered in the cache. The buffer is flushed
+#  to the database in bulk by a periodic task.
+
+CACHE_KEY_RECORDED = "user_statistics:visit:recorded:{user_id}:{date}"
+
+visit_buffer = CacheBuffer("user_statistics:visit")
+
+
+def _seconds_until_end_of_day(now: datetime) -> int:
+    end_of_day = datetime.combine(
+        now.date() + timedelta(days=1), time(), tzinfo=now.tzinfo
+    )
+
+    return max(int((end_of_day - now).total_seconds()), 1)
+
+
+class BufferedUserVisitMiddleware(AsyncCapableMiddleware):
+    def __init__(self, get_response: typing.Callable) -> None:
+        if RECORDING_DISABLED:
+            raise MiddlewareNotUsed("UserVisit recording has been disabled")
+        super().__init__(get_response)
+
+    def __call__(self, request: HttpRequest) -> typing.Optional[HttpResponse]:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        self._record_visit(request)
+
+        return self.get_response(request)
+
+    async def __acall__(self, request: HttpRequest) -> typing.Optional[HttpResponse]:
+        # The user is loaded lazily from the session and the visit might be
+        #  written directly, both require database queries.
+        await sync_to_async(self._record_visit)(request)
+
+        return await self.get_response(request)
+
+    @staticmethod
+    def _record_visit(request: HttpRequest) -> None:
+        if not request.user.is_authenticated or RECORDING_BYPASS(request):
+            return
+
+        now = timezone.now()
+        recorded = not cache.add(
+            CACHE_KEY_RECORDED.format(user_id=request.user.id, date=now.date()),
+            True,
+            timeout=_seconds_until_end_of_day(now),
+        )
+        observe_cache("visit_recorded", recorded)
+        if recorded:
+            return
+
+        user_visit = UserVisit.objects.build(request, now)
+        if not visit_buffer.is_shared():
+            # The cache is local to this process, so write the visit directly.
+            if not UserVisit.objects.filter(hash=user_visit.hash).exists():
+                save_user_visit(user_visit)
+            return
+
+        visit_buffer.append(
+            {
+                "user_id": user_visit.user.id,
+                "timestamp": user_visit.timestamp,
+                "session_key": user_visit.session_key,
+                "remote_addr": user_visit.remote_addr,
+                "ua_string": user_visit.ua_string,
+                "context": user_visit.context,
+                "hash": user_visit.hash,
+            }
+        )
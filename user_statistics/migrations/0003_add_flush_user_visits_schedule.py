@@ -0,0 +1,22 @@
+# Generated by Django 4.2.8 on 2026-10-19 13:05
+from django.db import migrations
+
+
+def add_flush_user_visits_schedule(apps, schema_editor):
+    Schedule = apps.get_model("django_q", "schedule")
+
+    # Write the buffered user visits to the database every 5 minutes.
+    Schedule.objects.create(
+        func="user_statistics.services.flush_user_visits",
+        schedule_type="I",
+        minutes=5,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_q", "0014_schedule_cluster"),
+        ("user_statistics", "0002_alter_dailyactiveusers_date_and_more"),
+    ]
+
+    operations = [migrations.RunPython(add_flush_user_visits_schedule)]
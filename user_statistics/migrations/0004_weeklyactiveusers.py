@@ -0,0 +1,47 @@
+# Generated by Django 4.2.8 on 2026-10-19 12:48
+from dateutil.relativedelta import relativedelta, MO
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def add_weekly_active_users_schedule(apps, schema_editor):
+    Schedule = apps.get_model("django_q", "schedule")
+    now = timezone.now()
+
+    # Create schedule for calculating the weekly active users.
+    # We schedule it on the next Monday at 3 o'clock.
+    Schedule.objects.create(
+        func="user_statistics.services.calculate_weekly_active_users",
+        schedule_type="W",
+        next_run=(
+            timezone.datetime(year=now.year, month=now.month, day=now.day, hour=3)
+            + relativedelta(days=1, weekday=MO)
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_q", "0014_schedule_cluster"),
+        ("user_visit", "0003_uservisit_context"),
+        ("user_statistics", "0003_add_flush_user_visits_schedule"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WeeklyActiveUsers",
+            fields=[
+                ("date", models.DateField(primary_key=True, serialize=False)),
+                ("count", models.PositiveIntegerField()),
+                ("fraction", models.DecimalField(decimal_places=2, max_digits=3)),
+            ],
+        ),
+        # The active users are calculated for timestamp ranges of the user
+        #  visits, which aren't indexed by django-user-visit.
+        migrations.RunSQL(
+            "CREATE INDEX user_visit_uservisit_timestamp_idx "
+            "ON user_visit_uservisit (timestamp)",
+            "DROP INDEX user_visit_uservisit_timestamp_idx",
+        ),
+        migrations.RunPython(add_weekly_active_users_schedule),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.8 on 2026-10-19 12:50
+from dateutil.relativedelta import relativedelta
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def add_visit_sketches_schedule(apps, schema_editor):
+    Schedule = apps.get_model("django_q", "schedule")
+    now = timezone.now()
+
+    # Create schedule for creating the visit sketches of the previous day.
+    # We schedule it on the next day at 3 o'clock.
+    Schedule.objects.create(
+        func="user_statistics.services.create_daily_visit_sketches",
+        schedule_type="D",
+        next_run=(
+            timezone.datetime(year=now.year, month=now.month, day=now.day, hour=3)
+            + relativedelta(days=1)
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_q", "0014_schedule_cluster"),
+        ("user_statistics", "0004_weeklyactiveusers"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyVisitSketch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("cohort", models.DateField()),
+                ("sketch", models.BinaryField()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="dailyvisitsketch",
+            constraint=models.UniqueConstraint(
+                fields=("date", "cohort"),
+                name="user_statistics_dailyvisitsketch_unique",
+            ),
+        ),
+        migrations.RunPython(add_visit_sketches_schedule),
+    ]
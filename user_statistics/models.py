@@ -10,7 +10,29 @@ class DailyActiveUsers(models.Model):
     fraction = models.DecimalField(max_digits=3, decimal_places=2)
 
 
+class WeeklyActiveUsers(models.Model):
+    date = models.DateField(primary_key=True)
+    count = models.PositiveIntegerField()
+    fraction = models.DecimalField(max_digits=3, decimal_places=2)
+
+
 class MonthlyActiveUsers(models.Model):
     date = models.DateField(primary_key=True)
     count = models.PositiveIntegerField()
     fraction = models.DecimalField(max_digits=3, decimal_places=2)
+
+
+class DailyVisitSketch(models.Model):
+    # HyperLogLog sketch of the users that visited on a day, separated by the
+    #  month in which the users registered (cohort).
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "cohort"], name="%(app_label)s_%(class)s_unique"
+            )
+        ]
+
+    date = models.DateField()
+    cohort = models.DateField()
+    sketch = models.BinaryField()
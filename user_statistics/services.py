@@ -1,62 +1,293 @@
-from datetime import date, datetime
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
 from dateutil.relativedelta import relativedelta
+from django.db import models
+from django.db.models import Count, Func, Q
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
 from django.utils import timezone
+from typing import Callable, Dict, List, Optional, Tuple, Type
 from user_visit.models import UserVisit
 
+from spritstat.purge import get_deadline, purge
+from spritstat.tracing import traced_task
 from users.models import CustomUser
 
-from .models import DailyActiveUsers, MonthlyActiveUsers
+from .hyperloglog import HyperLogLog
+from .middleware import visit_buffer
+from .models import (
+    DailyActiveUsers,
+    DailyVisitSketch,
+    MonthlyActiveUsers,
+    WeeklyActiveUsers,
+)
 
+FLUSH_BATCH_SIZE = 500
+
+
+@dataclass(frozen=True)
+class Period:
+    model: Type[models.Model]
+    trunc: Type[Func]
+    # Returns the first day of the period containing the provided day.
+    get_start: Callable[[date], date]
+    length: relativedelta
 
-def calculate_daily_active_users() -> None:
-    # Get the daily users for the previous day.
 
+PERIODS = {
+    "daily": Period(
+        DailyActiveUsers, TruncDate, lambda day: day, relativedelta(days=1)
+    ),
+    "weekly": Period(
+        WeeklyActiveUsers,
+        TruncWeek,
+        lambda day: day - timedelta(days=day.weekday()),
+        relativedelta(weeks=1),
+    ),
+    "monthly": Period(
+        MonthlyActiveUsers,
+        TruncMonth,
+        lambda day: day.replace(day=1),
+        relativedelta(months=1),
+    ),
+}
+
+
+def _get_today() -> date:
     now = timezone.now()
-    target_date = now - relativedelta(days=1)
-    count_users = CustomUser.objects.count()
-    count_users_day = (
-        UserVisit.objects.filter(
-            timestamp__year=target_date.year,
-            timestamp__month=target_date.month,
-            timestamp__day=target_date.day,
+    if timezone.is_aware(now):
+        return timezone.localdate(now)
+
+    return now.date()
+
+
+def _get_start_datetime(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time()))
+
+
+def calculate_active_users(
+    period: Period, start: date, end: date, update: bool = False
+) -> None:
+    """
+    Calculate the active users for all periods between the provided days.
+
+    The visits are filtered by timestamp range and grouped by period, so the
+    calculation requires a single query independent of the number of periods.
+
+    :param period: period to calculate the active users for
+    :param start: day in the first period
+    :param end: day in the last period
+    :param update: update the active users if they have already been
+        calculated, otherwise an IntegrityError is raised
+    """
+
+    flush_user_visits()
+
+    period_starts = []
+    period_start = period.get_start(start)
+    while period_start <= end:
+        period_starts.append(period_start)
+        period_start += period.length
+    if not period_starts:
+        return
+
+    counts = {
+        entry["period"]: entry["count"]
+        for entry in UserVisit.objects.filter(
+            timestamp__gte=_get_start_datetime(period_starts[0]),
+            timestamp__lt=_get_start_datetime(period_starts[-1] + period.length),
         )
-        .distinct("user")
-        .count()
-    )
-    DailyActiveUsers.objects.create(
-        date=target_date,
-        count=count_users_day,
-        fraction=float(count_users_day) / count_users,
+        .annotate(period=period.trunc("timestamp", output_field=models.DateField()))
+        .values("period")
+        .annotate(count=Count("user", distinct=True))
+        .order_by("period")
+    }
+    # The fraction is relative to the users that registered until the end of
+    #  the period and haven't been deleted.
+    count_users = CustomUser.objects.filter(deleted_at__isnull=True).aggregate(
+        **{
+            str(index): Count(
+                "id",
+                filter=Q(
+                    date_joined__lt=_get_start_datetime(period_start + period.length)
+                ),
+            )
+            for index, period_start in enumerate(period_starts)
+        }
     )
 
+    # The date of the entry is the last day of the period.
+    entries = []
+    for index, period_start in enumerate(period_starts):
+        count = counts.get(period_start, 0)
+        total = count_users[str(index)]
+        entries.append(
+            period.model(
+                date=period_start + period.length - relativedelta(days=1),
+                count=count,
+                fraction=float(count) / total if total else 0,
+            )
+        )
+
+    if update:
+        period.model.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=["date"],
+            update_fields=["count", "fraction"],
+        )
+    else:
+        period.model.objects.bulk_create(entries)
+
+
+def _calculate_previous_period(period: Period) -> None:
+    previous_start = period.get_start(_get_today()) - period.length
+    calculate_active_users(period, previous_start, previous_start)
+
+
+@traced_task
+def calculate_daily_active_users() -> None:
+    # Get the daily users for the previous day.
+    _calculate_previous_period(PERIODS["daily"])
+
 
+@traced_task
+def calculate_weekly_active_users() -> None:
+    # Get the weekly users for the last week.
+    # The date will be the last day of the week (Sunday).
+    _calculate_previous_period(PERIODS["weekly"])
+
+
+@traced_task
 def calculate_monthly_active_users() -> None:
     # Get the daily users for the last month.
     # The date will be the last day of the month.
+    _calculate_previous_period(PERIODS["monthly"])
 
-    now = timezone.now()
-    target_date = date(year=now.year, month=now.month, day=1) - relativedelta(days=1)
-    count_users = CustomUser.objects.count()
-    count_users_month = (
+
+def create_visit_sketches(start: date, end: date) -> None:
+    """
+    Create the visit sketches for all days between the provided days. Existing
+    sketches are replaced.
+
+    :param start: first day
+    :param end: last day
+    """
+
+    flush_user_visits()
+
+    sketches: Dict[Tuple[date, date], HyperLogLog] = {}
+    for entry in (
         UserVisit.objects.filter(
-            timestamp__year=target_date.year, timestamp__month=target_date.month
+            timestamp__gte=_get_start_datetime(start),
+            timestamp__lt=_get_start_datetime(end + timedelta(days=1)),
         )
-        .distinct("user")
-        .count()
-    )
-    MonthlyActiveUsers.objects.create(
-        date=target_date,
-        count=count_users_month,
-        fraction=float(count_users_month) / count_users,
+        .annotate(
+            day=TruncDate("timestamp"),
+            cohort=TruncMonth("user__date_joined", output_field=models.DateField()),
+        )
+        .values("day", "cohort", "user_id")
+        .distinct()
+        .iterator()
+    ):
+        sketches.setdefault((entry["day"], entry["cohort"]), HyperLogLog()).add(
+            entry["user_id"]
+        )
+
+    DailyVisitSketch.objects.bulk_create(
+        [
+            DailyVisitSketch(date=day, cohort=cohort, sketch=sketch.to_bytes())
+            for (day, cohort), sketch in sketches.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["date", "cohort"],
+        update_fields=["sketch"],
     )
 
 
+@traced_task
+def create_daily_visit_sketches() -> None:
+    # Create the visit sketches for the previous day.
+
+    yesterday = _get_today() - timedelta(days=1)
+    create_visit_sketches(yesterday, yesterday)
+
+
+def count_distinct_users(start: date, end: date, cohort: Optional[date] = None) -> int:
+    """
+    Estimate the number of distinct users that visited between the provided
+    days by merging the visit sketches of the days.
+
+    :param start: first day
+    :param end: last day
+    :param cohort: only count the users that registered in the month starting
+        at this day
+    """
+
+    queryset = DailyVisitSketch.objects.filter(date__gte=start, date__lte=end)
+    if cohort:
+        queryset = queryset.filter(cohort=cohort)
+
+    return HyperLogLog.merged(
+        HyperLogLog(bytes(sketch))
+        for sketch in queryset.values_list("sketch", flat=True)
+    ).count()
+
+
+@traced_task
 def delete_past_user_visits() -> None:
     # Delete all user visits of previous months to comply with the principle of
-    #  data economy.
+    #  data economy. The visits of the week containing the first day of the
+    #  month are kept until the weekly users have been calculated.
+    # The visits are kept as sketches, so the distinct users can still be
+    #  estimated for any window.
+    # If the time limit of the purge is reached, the remaining visits are
+    #  deleted by the next run. Days that already have sketches are skipped
+    #  then, as a part of their visits might have been deleted already.
 
-    now = timezone.now()
-    end_datetime = datetime(
-        year=now.year, month=now.month, day=1, hour=0, minute=0, second=0
+    end = PERIODS["weekly"].get_start(_get_today().replace(day=1))
+    first_visit = UserVisit.objects.filter(
+        timestamp__lt=_get_start_datetime(end)
+    ).aggregate(first=models.Min("timestamp"))["first"]
+    if first_visit:
+        sketched = set(
+            DailyVisitSketch.objects.filter(
+                date__gte=timezone.localdate(first_visit), date__lt=end
+            ).values_list("date", flat=True)
+        )
+        day = timezone.localdate(first_visit)
+        while day < end:
+            if day in sketched:
+                day += timedelta(days=1)
+                continue
+
+            # Create the sketches of consecutive days without sketches at once.
+            last = day
+            while last + timedelta(days=1) < end and (
+                last + timedelta(days=1) not in sketched
+            ):
+                last += timedelta(days=1)
+            create_visit_sketches(day, last)
+            day = last + timedelta(days=1)
+
+    # Nothing references the visits, so they can be deleted directly.
+    purge(
+        UserVisit.objects.filter(timestamp__lt=_get_start_datetime(end)),
+        raw=True,
+        deadline=get_deadline(),
     )
-    UserVisit.objects.filter(timestamp__lt=end_datetime).delete()
+
+
+def _write_user_visits(values: List[Dict]) -> None:
+    # The visits have already been deduplicated when they were recorded, but
+    #  might still exist if they have been flushed before.
+    UserVisit.objects.bulk_create(
+        [UserVisit(**value) for value in values],
+        batch_size=FLUSH_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+@traced_task
+def flush_user_visits() -> None:
+    # Write the buffered user visits to the database.
+    visit_buffer.flush(_write_user_visits)
@@ -0,0 +1,50 @@
+from django.test import SimpleTestCase
+
+from user_statistics.hyperloglog import HyperLogLog, NUM_REGISTERS
+
+
+class TestHyperLogLog(SimpleTestCase):
+    def test_empty(self):
+        self.assertEqual(HyperLogLog().count(), 0)
+
+    def test_small(self):
+        sketch = HyperLogLog()
+        for value in [1, 2, 3, 2, 1]:
+            sketch.add(value)
+        self.assertEqual(sketch.count(), 3)
+
+    def test_large(self):
+        for count in [1000, 10000, 100000]:
+            with self.subTest(count=count):
+                sketch = HyperLogLog()
+                for value in range(count):
+                    sketch.add(value)
+                self.assertAlmostEqual(sketch.count(), count, delta=count * 0.05)
+
+    def test_merge(self):
+        first = HyperLogLog()
+        second = HyperLogLog()
+        union = HyperLogLog()
+        for value in range(5000):
+            first.add(value)
+            union.add(value)
+        for value in range(2500, 7500):
+            second.add(value)
+            union.add(value)
+
+        merged = HyperLogLog.merged([first, second])
+        self.assertEqual(merged.to_bytes(), union.to_bytes())
+        self.assertEqual(merged.count(), union.count())
+
+    def test_serialization(self):
+        sketch = HyperLogLog()
+        for value in range(100):
+            sketch.add(value)
+
+        data = sketch.to_bytes()
+        self.assertEqual(len(data), NUM_REGISTERS)
+        self.assertEqual(HyperLogLog(data).count(), sketch.count())
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog(b"\x00" * 10)
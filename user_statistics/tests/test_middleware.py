@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from unittest.mock import patch
+
+from user_visit.models import UserVisit
+
+from user_statistics.services import flush_user_visits
+
+
+class TestBufferedUserVisitMiddleware(APITestCase):
+    fixtures = ["user.json"]
+    url: str
+    email: str
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.url = reverse("account_session")
+        cls.email = "test2@test.at"
+
+    def setUp(self):
+        cache.clear()
+
+        if not self.id().endswith("_not_logged_in"):
+            self.client.login(username=self.email, password="test")
+            self.async_client.login(username=self.email, password="test")
+
+    def _post(self, now: datetime):
+        with patch("django.utils.timezone.now", return_value=now):
+            response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_direct(self):
+        # The visit is written directly if the cache isn't shared.
+        now = datetime(2022, 4, 18, 10, 0, tzinfo=dt_timezone.utc)
+        self._post(now)
+        self._post(now + timedelta(hours=1))
+        self.assertEqual(UserVisit.objects.count(), 1)
+
+        self._post(now + timedelta(days=1))
+        self.assertEqual(UserVisit.objects.count(), 2)
+
+    async def test_direct_async(self):
+        response = await self.async_client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(await UserVisit.objects.acount(), 1)
+
+    @patch("spritstat.buffer.CacheBuffer.is_shared", return_value=True)
+    def test_buffered(self, _):
+        now = datetime(2022, 4, 18, 10, 0, tzinfo=dt_timezone.utc)
+        self._post(now)
+        self._post(now + timedelta(hours=1))
+        self._post(now + timedelta(days=1))
+        self.assertEqual(UserVisit.objects.count(), 0)
+
+        flush_user_visits()
+        self.assertListEqual(
+            list(
+                UserVisit.objects.order_by("timestamp").values_list(
+                    "user__email", "timestamp"
+                )
+            ),
+            [(self.email, now), (self.email, now + timedelta(days=1))],
+        )
+
+        # Flushing again doesn't create any visits.
+        flush_user_visits()
+        self.assertEqual(UserVisit.objects.count(), 2)
+
+    @patch("spritstat.buffer.CacheBuffer.is_shared", return_value=True)
+    def test_buffered_not_logged_in(self, _):
+        self.client.post(self.url)
+        flush_user_visits()
+        self.assertEqual(UserVisit.objects.count(), 0)
@@ -1,3 +1,4 @@
+from django.core.management import call_command
 from django.db.utils import IntegrityError
 from django.test import TestCase
 from django.utils import timezone
@@ -6,12 +7,22 @@ from unittest.mock import patch
 
 from user_visit.models import UserVisit
 
-from user_statistics.models import DailyActiveUsers, MonthlyActiveUsers
+from user_statistics.models import (
+    DailyActiveUsers,
+    DailyVisitSketch,
+    MonthlyActiveUsers,
+    WeeklyActiveUsers,
+)
 from user_statistics.services import (
     calculate_daily_active_users,
     calculate_monthly_active_users,
+    calculate_weekly_active_users,
+    count_distinct_users,
+    create_daily_visit_sketches,
+    create_visit_sketches,
     delete_past_user_visits,
 )
+from users.models import CustomUser
 
 
 class TestDailyActiveUsers(TestCase):
@@ -99,6 +110,72 @@ class TestDailyActiveUsers(TestCase):
             with self.assertRaises(IntegrityError):
                 calculate_daily_active_users()
 
+    def test_deleted_users(self):
+        # Deleted users that haven't been purged yet aren't counted.
+        now = timezone.datetime(2022, 4, 19, 10, 0)
+        for user in CustomUser.objects.filter(pk__in=[100, 300]):
+            user.soft_delete()
+        UserVisit.objects.create(
+            user_id=200,
+            timestamp=timezone.datetime(2022, 4, 18, 10, 0),
+            session_key="session_1",
+            hash="hash_1",
+        )
+
+        with patch("django.utils.timezone.now", return_value=now):
+            calculate_daily_active_users()
+
+        entry = DailyActiveUsers.objects.last()
+        self.assertEqual(entry.count, 1)
+        self.assertEqual(entry.fraction, 0.5)
+
+
+class TestWeeklyActiveUsers(TestCase):
+    fixtures = ["user.json"]
+
+    def test_multiple_visits_of_different_users(self):
+        # Tuesday after the week from 2022-04-11 to 2022-04-17
+        now = timezone.datetime(2022, 4, 19, 10, 0)
+        UserVisit.objects.create(
+            user_id=100,
+            timestamp=timezone.datetime(2022, 4, 10, 23, 59),
+            session_key="session_1",
+            hash="hash_1",
+        )
+        UserVisit.objects.create(
+            user_id=200,
+            timestamp=timezone.datetime(2022, 4, 11),
+            session_key="session_2",
+            hash="hash_2",
+        )
+        UserVisit.objects.create(
+            user_id=200,
+            timestamp=timezone.datetime(2022, 4, 13, 12, 10),
+            session_key="session_3",
+            hash="hash_3",
+        )
+        UserVisit.objects.create(
+            user_id=300,
+            timestamp=timezone.datetime(2022, 4, 17, 23, 59),
+            session_key="session_4",
+            hash="hash_4",
+        )
+        UserVisit.objects.create(
+            user_id=400,
+            timestamp=timezone.datetime(2022, 4, 18),
+            session_key="session_5",
+            hash="hash_5",
+        )
+        with patch("django.utils.timezone.now", return_value=now):
+            calculate_weekly_active_users()
+
+        self.assertEqual(WeeklyActiveUsers.objects.count(), 1)
+
+        entry = WeeklyActiveUsers.objects.last()
+        self.assertEqual(entry.date, timezone.datetime(2022, 4, 17).date())
+        self.assertEqual(entry.count, 2)
+        self.assertEqual(entry.fraction, 0.5)
+
 
 class TestMonthlyActiveUsers(TestCase):
     fixtures = ["user.json"]
@@ -205,6 +282,200 @@ class TestMonthlyActiveUsers(TestCase):
                 calculate_monthly_active_users()
 
 
+class TestCalculateActiveUsersCommand(TestCase):
+    fixtures = ["user.json"]
+
+    def setUp(self):
+        for index, (user_id, timestamp) in enumerate(
+            [
+                (100, timezone.datetime(2022, 3, 31, 23)),
+                (200, timezone.datetime(2022, 4, 1)),
+                (200, timezone.datetime(2022, 4, 1, 10)),
+                (300, timezone.datetime(2022, 4, 3)),
+                (200, timezone.datetime(2022, 4, 4)),
+            ]
+        ):
+            UserVisit.objects.create(
+                user_id=user_id,
+                timestamp=timestamp,
+                session_key=f"session_{index}",
+                hash=f"hash_{index}",
+            )
+
+    def test_daily(self):
+        # Flushing the visits, the grouped visit and user counts and the insert
+        with self.assertNumQueries(3):
+            call_command(
+                "calculateactiveusers", "2022-03-31", "2022-04-04", "-p", "daily"
+            )
+
+        self.assertListEqual(
+            list(DailyActiveUsers.objects.order_by("date").values_list("count")),
+            [(1,), (1,), (0,), (1,), (1,)],
+        )
+        self.assertEqual(WeeklyActiveUsers.objects.count(), 0)
+        self.assertEqual(MonthlyActiveUsers.objects.count(), 0)
+
+    def test_all_periods(self):
+        call_command("calculateactiveusers", "2022-03-31", "2022-04-04")
+
+        self.assertEqual(DailyActiveUsers.objects.count(), 5)
+        self.assertListEqual(
+            list(
+                WeeklyActiveUsers.objects.order_by("date").values_list("date", "count")
+            ),
+            [
+                (timezone.datetime(2022, 4, 3).date(), 3),
+                (timezone.datetime(2022, 4, 10).date(), 1),
+            ],
+        )
+        self.assertListEqual(
+            list(
+                MonthlyActiveUsers.objects.order_by("date").values_list("date", "count")
+            ),
+            [
+                (timezone.datetime(2022, 3, 31).date(), 1),
+                (timezone.datetime(2022, 4, 30).date(), 2),
+            ],
+        )
+
+    def test_recalculate(self):
+        # Existing entries are updated.
+        MonthlyActiveUsers.objects.create(
+            date=timezone.datetime(2022, 4, 30).date(), count=10, fraction=1
+        )
+        call_command(
+            "calculateactiveusers", "2022-04-01", "2022-04-30", "-p", "monthly"
+        )
+
+        entry = MonthlyActiveUsers.objects.get()
+        self.assertEqual(entry.count, 2)
+        self.assertEqual(entry.fraction, 0.5)
+
+
+class TestVisitSketches(TestCase):
+    fixtures = ["user.json"]
+
+    def setUp(self):
+        # User 100 registered in October, the others in December and January
+        for index, (user_id, timestamp) in enumerate(
+            [
+                (100, timezone.datetime(2022, 4, 1)),
+                (200, timezone.datetime(2022, 4, 1, 10)),
+                (200, timezone.datetime(2022, 4, 2)),
+                (300, timezone.datetime(2022, 4, 3)),
+                (400, timezone.datetime(2022, 4, 3, 23, 59)),
+                (100, timezone.datetime(2022, 4, 4)),
+            ]
+        ):
+            UserVisit.objects.create(
+                user_id=user_id,
+                timestamp=timestamp,
+                session_key=f"session_{index}",
+                hash=f"hash_{index}",
+            )
+
+    def test_count_distinct_users(self):
+        create_visit_sketches(
+            timezone.datetime(2022, 4, 1).date(), timezone.datetime(2022, 4, 4).date()
+        )
+
+        for start, end, expected in [
+            (1, 1, 2),
+            (2, 2, 1),
+            (1, 2, 2),
+            (2, 4, 4),
+            (1, 4, 4),
+            (5, 10, 0),
+        ]:
+            with self.subTest(start=start, end=end):
+                self.assertEqual(
+                    count_distinct_users(
+                        timezone.datetime(2022, 4, start).date(),
+                        timezone.datetime(2022, 4, end).date(),
+                    ),
+                    expected,
+                )
+
+    def test_count_distinct_users_cohort(self):
+        create_visit_sketches(
+            timezone.datetime(2022, 4, 1).date(), timezone.datetime(2022, 4, 4).date()
+        )
+
+        for cohort, expected in [(10, 1), (12, 1), (1, 2)]:
+            with self.subTest(cohort=cohort):
+                self.assertEqual(
+                    count_distinct_users(
+                        timezone.datetime(2022, 4, 1).date(),
+                        timezone.datetime(2022, 4, 4).date(),
+                        timezone.datetime(
+                            2021 if cohort > 1 else 2022, cohort, 1
+                        ).date(),
+                    ),
+                    expected,
+                )
+
+    def test_recreate(self):
+        day = timezone.datetime(2022, 4, 3).date()
+        create_visit_sketches(day, day)
+        UserVisit.objects.create(
+            user_id=100,
+            timestamp=timezone.datetime(2022, 4, 3, 12),
+            session_key="session_new",
+            hash="hash_new",
+        )
+        create_visit_sketches(day, day)
+
+        # Users 300 and 400 are in the same cohort
+        self.assertEqual(DailyVisitSketch.objects.filter(date=day).count(), 2)
+        self.assertEqual(count_distinct_users(day, day), 3)
+
+    def test_create_daily_visit_sketches(self):
+        now = timezone.datetime(2022, 4, 4, 3)
+        with patch("django.utils.timezone.now", return_value=now):
+            create_daily_visit_sketches()
+
+        self.assertListEqual(
+            list(DailyVisitSketch.objects.values_list("date", flat=True).distinct()),
+            [timezone.datetime(2022, 4, 3).date()],
+        )
+
+    def test_delete_past_user_visits(self):
+        # The sketches are created before the visits are deleted.
+        now = timezone.datetime(2022, 5, 3, 3)
+        with patch("django.utils.timezone.now", return_value=now):
+            delete_past_user_visits()
+
+        self.assertEqual(UserVisit.objects.count(), 0)
+        self.assertEqual(
+            count_distinct_users(
+                timezone.datetime(2022, 4, 1).date(),
+                timezone.datetime(2022, 4, 30).date(),
+            ),
+            4,
+        )
+
+    def test_delete_past_user_visits_resumed(self):
+        # The next run continues a run that reached the time limit and keeps
+        #  the sketches of the days whose visits were partially deleted.
+        now = timezone.datetime(2022, 5, 3, 3)
+        with patch("django.utils.timezone.now", return_value=now):
+            with patch("user_statistics.services.get_deadline", return_value=0):
+                delete_past_user_visits()
+            self.assertEqual(UserVisit.objects.count(), 6)
+            UserVisit.objects.filter(user_id=300).delete()
+            delete_past_user_visits()
+
+        self.assertEqual(UserVisit.objects.count(), 0)
+        self.assertEqual(
+            count_distinct_users(
+                timezone.datetime(2022, 4, 1).date(),
+                timezone.datetime(2022, 4, 30).date(),
+            ),
+            4,
+        )
+
+
 class TestDeletePastUserVisits(TestCase):
     fixtures = ["user.json"]
 
@@ -241,3 +512,27 @@ class TestDeletePastUserVisits(TestCase):
 
         self.assertEqual(UserVisit.objects.count(), 1)
         self.assertEqual(UserVisit.objects.last().timestamp, check_timestamp)
+
+    def test_keep_visits_of_week(self):
+        # The visits of the week containing the first day of the month are
+        #  required to calculate the weekly active users.
+        now = timezone.datetime(2022, 5, 1, 3)
+        check_timestamp = timezone.datetime(2022, 4, 25, tzinfo=pytz.utc)
+        UserVisit.objects.create(
+            user_id=100,
+            timestamp=timezone.datetime(2022, 4, 24, 23),
+            session_key="session_1",
+            hash="hash_1",
+        )
+        UserVisit.objects.create(
+            user_id=200,
+            timestamp=check_timestamp,
+            session_key="session_2",
+            hash="hash_2",
+        )
+
+        with patch("django.utils.timezone.now", return_value=now):
+            delete_past_user_visits()
+
+        self.assertEqual(UserVisit.objects.count(), 1)
+        self.assertEqual(UserVisit.objects.last().timestamp, check_timestamp)
@@ -0,0 +1,109 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+import json
+import random
+import string
+from statistics import mean, quantiles
+import time
+from typing import List, Tuple
+import urllib3
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulates users typing passwords into the password validation of a "
+        "running server and prints the latency distribution of the validation "
+        "requests"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", help="URL of the password validation endpoint")
+        parser.add_argument(
+            "-u", "--users", type=int, default=20, help="Number of concurrent users"
+        )
+        parser.add_argument(
+            "-l",
+            "--length",
+            type=int,
+            default=32,
+            help="Length of the password typed by each user",
+        )
+        parser.add_argument(
+            "-d",
+            "--delay",
+            type=float,
+            default=0.2,
+            help="Seconds between two requests of a user",
+        )
+
+    @staticmethod
+    def _type_password(
+        http: urllib3.PoolManager, url: str, user: int, length: int, delay: float
+    ) -> List[Tuple[int, float]]:
+        # Each user sends the password after every typed character, as the
+        #  frontend does. The users are anonymous, so they are throttled by
+        #  the client address forwarded by the reverse proxy.
+        headers = {
+            "Content-Type": "application/json",
+            "X-Forwarded-For": f"10.0.{user // 256}.{user % 256}",
+        }
+        alphabet = string.ascii_letters + string.digits + string.punctuation
+        password = "".join(random.choice(alphabet) for _ in range(length))
+        results = []
+        for i in range(1, length + 1):
+            body = json.dumps({"password": password[:i]})
+            start = time.perf_counter()
+            try:
+                status = http.request(
+                    "POST",
+                    url,
+                    body=body,
+                    headers=headers,
+                    retries=False,
+                ).status
+            except urllib3.exceptions.HTTPError:
+                status = 0
+            latency = time.perf_counter() - start
+            results.append((status, latency))
+            time.sleep(max(delay - latency, 0))
+
+        return results
+
+    def handle(self, *args, **options):
+        users = options["users"]
+        length = options["length"]
+        if users < 1 or length < 1:
+            raise CommandError("Users and length have to be positive")
+
+        http = urllib3.PoolManager(maxsize=users)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=users) as executor:
+            results = [
+                result
+                for user_results in executor.map(
+                    lambda user: self._type_password(
+                        http, options["url"], user, length, options["delay"]
+                    ),
+                    range(users),
+                )
+                for result in user_results
+            ]
+        duration = time.perf_counter() - start
+
+        latencies = [latency * 1000 for _, latency in results]
+        percentiles = quantiles(latencies, n=100) if len(latencies) > 1 else latencies
+        statuses = Counter(status for status, _ in results)
+
+        self.stdout.write(f"Requests:    {len(results)} ({users} users typing)")
+        self.stdout.write(f"Duration:    {duration:.2f}s")
+        self.stdout.write(
+            f"Latency:     mean {mean(latencies):.1f}ms, "
+            f"p50 {percentiles[len(percentiles) // 2]:.1f}ms, "
+            f"p95 {percentiles[int(len(percentiles) * 0.95)]:.1f}ms, "
+            f"p99 {percentiles[-1]:.1f}ms"
+        )
+        self.stdout.write(
+            "Status:      "
+            + ", ".join(f"{status}: {count}" for status, count in statuses.items())
+        )
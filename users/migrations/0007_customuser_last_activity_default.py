@@ -0,0 +1,29 @@
+# Generated by Django 4.2.8 on 2026-10-19 12:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def add_flush_activity_task(apps, schema_editor):
+    Schedule = apps.get_model("django_q", "schedule")
+    Schedule.objects.create(
+        func="users.services.flush_activity",
+        schedule_type="I",
+        minutes=5,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_q", "0014_schedule_cluster"),
+        ("users", "0006_customuser_locale"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="customuser",
+            name="last_activity",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(add_flush_activity_task),
+    ]
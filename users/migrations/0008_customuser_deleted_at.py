@@ -0,0 +1,17 @@
+# Generated by Django 4.2.8 on 2026-10-19 12:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0007_customuser_last_activity_default"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customuser",
+            name="deleted_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.8 on 2026-10-19 15:10
+
+from django.db import migrations, models
+
+NOTIFICATION_TYPES = {
+    "spritstat.services.send_create_location_notification": (
+        "create_location_reminder"
+    ),
+    "spritstat.services.send_location_reminder_notification": "location_reminder",
+}
+
+
+def move_notifications_from_schedules(apps, schema_editor):
+    CustomUser = apps.get_model("users", "CustomUser")
+    Schedule = apps.get_model("django_q", "Schedule")
+
+    for user in CustomUser.objects.filter(
+        next_notification__isnull=False
+    ).select_related("next_notification"):
+        schedule = user.next_notification
+        # Executed schedules are kept with zero repeats
+        if schedule.func in NOTIFICATION_TYPES and schedule.repeats != 0:
+            user.next_notification_type = NOTIFICATION_TYPES[schedule.func]
+            user.next_notification_at = schedule.next_run
+            user.save(update_fields=["next_notification_type", "next_notification_at"])
+
+    Schedule.objects.filter(func__in=NOTIFICATION_TYPES).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("spritstat", "0025_send_due_notifications_scheduled_task"),
+        ("users", "0008_customuser_deleted_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customuser",
+            name="next_notification_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="customuser",
+            name="next_notification_type",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("create_location_reminder", "Create Location Reminder"),
+                    ("location_reminder", "Location Reminder"),
+                ],
+                max_length=30,
+                null=True,
+            ),
+        ),
+        migrations.RunPython(move_notifications_from_schedules),
+        migrations.RemoveField(
+            model_name="customuser",
+            name="next_notification",
+        ),
+        migrations.AddIndex(
+            model_name="customuser",
+            index=models.Index(
+                condition=models.Q(("next_notification_at__isnull", False)),
+                fields=["next_notification_at"],
+                name="users_next_notification_idx",
+            ),
+        ),
+    ]
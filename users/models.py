@@ -1,8 +1,10 @@
 from __future__ import annotations
+from datetime import datetime
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from django_q.models import Schedule
 
 
 class Locales(models.TextChoices):
@@ -10,13 +12,67 @@ class Locales(models.TextChoices):
     EN = "en", _("Englisch")
 
 
+class Notifications(models.TextChoices):
+    CREATE_LOCATION_REMINDER = "create_location_reminder"
+    LOCATION_REMINDER = "location_reminder"
+
+
 class CustomUser(AbstractUser):
     locale = models.CharField(choices=Locales.choices, max_length=2, null=True)
     has_beta_access = models.BooleanField(default=False)
-    last_activity = models.DateTimeField(auto_now=True)
-    next_notification = models.OneToOneField(
-        Schedule, null=True, on_delete=models.SET_NULL
+    last_activity = models.DateTimeField(default=timezone.now)
+    # The next notification is sent by spritstat.services.send_due_notifications
+    #  once it is due.
+    next_notification_type = models.CharField(
+        choices=Notifications.choices, max_length=30, null=True, blank=True
     )
+    next_notification_at = models.DateTimeField(null=True, blank=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Only few users have a notification scheduled
+            models.Index(
+                fields=["next_notification_at"],
+                condition=Q(next_notification_at__isnull=False),
+                name="users_next_notification_idx",
+            )
+        ]
 
     def __str__(self):
         return f"{self.email} ({self.id})"
+
+    def soft_delete(self) -> None:
+        # Deactivate the user, so they can't log in anymore. The user and all
+        #  their data are deleted in the background by
+        #  spritstat.services.purge_deleted.
+        # The email address is removed immediately, so it can be registered
+        #  again while the user isn't deleted yet.
+        self.is_active = False
+        self.deleted_at = timezone.now()
+        self.email = ""
+        self.cancel_notification(save=False)
+        self.save(
+            update_fields=[
+                "is_active",
+                "deleted_at",
+                "email",
+                "next_notification_type",
+                "next_notification_at",
+            ]
+        )
+        self.emailaddress_set.all().delete()
+
+    def schedule_notification(
+        self, notification_type: Notifications, due: datetime
+    ) -> None:
+        # Replaces the currently scheduled notification.
+        self.next_notification_type = notification_type
+        self.next_notification_at = due
+        self.save(update_fields=["next_notification_type", "next_notification_at"])
+
+    def cancel_notification(self, save: bool = True) -> None:
+        self.next_notification_type = None
+        self.next_notification_at = None
+        if save:
+            self.save(update_fields=["next_notification_type", "next_notification_at"])
@@ -1,8 +1,35 @@
+from concurrent.futures import ProcessPoolExecutor
 from django.contrib.auth.models import AbstractUser
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.utils.crypto import salted_hmac
 import re
-from typing import List, Optional, Tuple
-from zxcvbn import zxcvbn
+from typing import Dict, List, Optional, Tuple
+
+from spritstat.metrics import observe_cache
+
+
+# The password validation endpoint is called while the user types, so the same
+#  inputs are evaluated repeatedly. zxcvbn gets expensive for long passwords,
+#  so only the beginning of a password is evaluated and the results are cached
+#  for a short time. The cache key is an HMAC of the inputs, so the password
+#  can't be recovered from the cache.
+
+KEY_SALT = "users.password_validation"
+CACHE_KEY_RESULT = "users:zxcvbn:{digest}"
+
+# Process pools per number of processes, created on first use in each process
+_executors: Dict[int, ProcessPoolExecutor] = {}
+
+
+def _evaluate(password: str, user_inputs: List[str]) -> Tuple[int, List[str]]:
+    # zxcvbn builds its frequency dictionaries on import, so it is only imported
+    #  by the processes which actually evaluate a password.
+    from zxcvbn import zxcvbn
+
+    result = zxcvbn(password, user_inputs)
+
+    return result["score"], result["feedback"]["suggestions"]
 
 
 class ZxcvbnValidator:
@@ -10,12 +37,34 @@ class ZxcvbnValidator:
     Validate password using the zxcvbn library.
     """
 
-    def __init__(self, minimum_score: int = 2, tokens: List[str] = None) -> None:
+    def __init__(
+        self,
+        minimum_score: int = 2,
+        tokens: List[str] = None,
+        max_length: int = 64,
+        cache_timeout: int = 5 * 60,
+        processes: int = 0,
+    ) -> None:
+        """
+        :param minimum_score: minimum zxcvbn score of a valid password
+        :param tokens: tokens which are penalized if used in a password
+        :param max_length: number of characters of a password that are
+            evaluated. Longer passwords are strong in any case, but their
+            evaluation takes long.
+        :param cache_timeout: seconds the result of an evaluation is cached
+        :param processes: number of processes the evaluation is executed in.
+            If 0 the evaluation is executed in the calling thread, which
+            blocks other threads of the process due to the GIL.
+        """
+
         self.__minimum_score = minimum_score
         if tokens:
             self.__tokens = tokens
         else:
             self.__tokens = []
+        self.__max_length = max_length
+        self.__cache_timeout = cache_timeout
+        self.__processes = processes
 
     @property
     def minimum_score(self) -> int:
@@ -54,9 +103,16 @@ class ZxcvbnValidator:
         if email:
             custom_tokens += self.__tokenize_email(email)
 
-        result = zxcvbn(password, set(self.__tokens + custom_tokens))
-        score = result["score"]
-        suggestions = result["feedback"]["suggestions"]
+        user_inputs = sorted(set(self.__tokens + custom_tokens))
+        password = password[: self.__max_length]
+        digest = salted_hmac(KEY_SALT, "\0".join([password] + user_inputs))
+        key = CACHE_KEY_RESULT.format(digest=digest.hexdigest())
+        result = cache.get(key)
+        observe_cache("password_validation", result is not None)
+        if result is None:
+            result = self.__evaluate(password, user_inputs)
+            cache.set(key, result, timeout=self.__cache_timeout)
+        score, suggestions = result
 
         valid = False
         if score >= self.__minimum_score:
@@ -64,6 +120,21 @@ class ZxcvbnValidator:
 
         return valid, score, suggestions
 
+    def __evaluate(
+        self, password: str, user_inputs: List[str]
+    ) -> Tuple[int, List[str]]:
+        if not self.__processes:
+            return _evaluate(password, user_inputs)
+
+        if self.__processes not in _executors:
+            _executors[self.__processes] = ProcessPoolExecutor(self.__processes)
+
+        return (
+            _executors[self.__processes]
+            .submit(_evaluate, password, user_inputs)
+            .result()
+        )
+
     @staticmethod
     def split_name(name: str) -> List[str]:
         # Utility function that allows splitting names into tokens by the usual
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+from typing import Dict, List, Tuple
+
+from spritstat.buffer import CacheBuffer
+from spritstat.metrics import observe_cache
+from spritstat.tracing import traced_task
+from .models import CustomUser
+
+
+# The last activity of a user is updated on every app load. To prevent a write
+#  to the user row for each request, activities are only recorded once per
+#  granularity interval and are buffered in the cache. The buffer is flushed to
+#  the database in bulk by a periodic task.
+
+CACHE_KEY_RECORDED = "users:activity:recorded:{user_id}"
+
+FLUSH_BATCH_SIZE = 500
+
+activity_buffer = CacheBuffer("users:activity")
+
+
+def record_activity(user: CustomUser) -> None:
+    # Record the activity of the provided user, if the last recorded activity
+    #  is older than the configured granularity.
+
+    now = timezone.now()
+    granularity = settings.LAST_ACTIVITY_GRANULARITY
+    if user.last_activity and now - user.last_activity < timedelta(seconds=granularity):
+        return
+
+    # The last activity of the user object might not contain the buffered
+    #  activity yet, so we additionally check if we already recorded one.
+    recorded = not cache.add(
+        CACHE_KEY_RECORDED.format(user_id=user.id), True, timeout=granularity
+    )
+    observe_cache("activity_recorded", recorded)
+    if recorded:
+        return
+
+    user.last_activity = now
+    if not activity_buffer.is_shared():
+        # The cache is local to this process, so write the activity directly.
+        CustomUser.objects.filter(id=user.id).update(last_activity=now)
+        return
+
+    activity_buffer.append((user.id, now))
+
+
+def _write_activities(values: List[Tuple[int, datetime]]) -> None:
+    # Only keep the newest activity for each user.
+    activities: Dict[int, datetime] = {}
+    for user_id, timestamp in values:
+        if user_id not in activities or activities[user_id] < timestamp:
+            activities[user_id] = timestamp
+
+    user_ids = list(activities)
+    for start in range(0, len(user_ids), FLUSH_BATCH_SIZE):
+        batch = user_ids[start : start + FLUSH_BATCH_SIZE]
+        # Never move the last activity backwards, e.g. if it was set directly.
+        CustomUser.objects.filter(id__in=batch).update(
+            last_activity=Case(
+                *[
+                    When(
+                        id=user_id,
+                        last_activity__lt=activities[user_id],
+                        then=Value(activities[user_id]),
+                    )
+                    for user_id in batch
+                ],
+                default="last_activity",
+                output_field=DateTimeField(),
+            )
+        )
+
+
+@traced_task
+def flush_activity() -> None:
+    # Write the buffered activities to the database.
+    activity_buffer.flush(_write_activities)
@@ -0,0 +1,84 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase
+from unittest.mock import patch
+
+from users import services
+from users.models import CustomUser
+
+
+@patch("spritstat.buffer.CacheBuffer.is_shared", return_value=True)
+class TestActivity(TestCase):
+    fixtures = ["user.json"]
+    now: datetime.datetime
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.now = datetime.datetime.strptime(
+            "2022-02-02T23:00+0000", "%Y-%m-%dT%H:%M%z"
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def _record(self, user: CustomUser, minutes: int = 0):
+        with patch(
+            "django.utils.timezone.now",
+            return_value=self.now + datetime.timedelta(minutes=minutes),
+        ):
+            services.record_activity(user)
+
+    def test_buffered(self, _):
+        user = CustomUser.objects.first()
+        last_activity = user.last_activity
+        self._record(user)
+        self.assertEqual(user.last_activity, self.now)
+        self.assertEqual(
+            CustomUser.objects.get(id=user.id).last_activity, last_activity
+        )
+
+        services.flush_activity()
+        self.assertEqual(CustomUser.objects.get(id=user.id).last_activity, self.now)
+
+    def test_skip_recorded(self, _):
+        # The user object doesn't know about the buffered activity, but it
+        #  isn't recorded twice within the granularity interval.
+        user = CustomUser.objects.first()
+        self._record(user)
+        self._record(CustomUser.objects.get(id=user.id), minutes=5)
+        self.assertEqual(cache.get("users:activity:last_slot"), 1)
+
+        services.flush_activity()
+        self.assertEqual(CustomUser.objects.get(id=user.id).last_activity, self.now)
+
+    def test_flush_multiple(self, _):
+        users = list(CustomUser.objects.all())
+        for user in users:
+            self._record(user)
+        cache.delete(services.CACHE_KEY_RECORDED.format(user_id=users[0].id))
+        self._record(users[0], minutes=20)
+
+        with self.assertNumQueries(1):
+            services.flush_activity()
+
+        for user in users:
+            with self.subTest(user=user.id):
+                self.assertEqual(
+                    CustomUser.objects.get(id=user.id).last_activity,
+                    self.now
+                    + datetime.timedelta(minutes=20 if user == users[0] else 0),
+                )
+
+        # Flushing again doesn't change anything.
+        with self.assertNumQueries(0):
+            services.flush_activity()
+
+    def test_flush_doesnt_move_backwards(self, _):
+        user = CustomUser.objects.first()
+        self._record(user)
+        later = self.now + datetime.timedelta(hours=1)
+        CustomUser.objects.filter(id=user.id).update(last_activity=later)
+
+        services.flush_activity()
+        self.assertEqual(CustomUser.objects.get(id=user.id).last_activity, later)
@@ -1,7 +1,9 @@
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from spritstat.services import purge_deleted
 from users.models import CustomUser
 
 
@@ -22,11 +24,44 @@ class TestDeleteUser(APITestCase):
     def test_ok(self):
         response = self.client.delete(self.url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        # The user is deactivated and deleted in the background.
+        user = CustomUser.objects.get(id=self.user.id)
+        self.assertFalse(user.is_active)
+        self.assertIsNotNone(user.deleted_at)
+        self.assertFalse(
+            self.client.post(reverse("account_session")).data["isAuthenticated"]
+        )
+
+        purge_deleted()
         with self.assertRaisesMessage(
             CustomUser.DoesNotExist, "CustomUser matching query does not exist."
         ):
             CustomUser.objects.get(id=self.user.id)
 
+    @override_settings(ACCOUNT_EMAIL_CONFIRMATION_COOLDOWN=0)
+    def test_register_again(self):
+        # The email address can be registered again before the user is deleted
+        #  in the background.
+        response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        user = CustomUser.objects.get(id=self.user.id)
+        self.assertEqual(user.email, "")
+        self.assertFalse(user.emailaddress_set.exists())
+
+        response = self.client.post(
+            reverse("account_register"),
+            {
+                "email": self.user.email,
+                "password1": "cdpyHEKZ0KiJmlR",
+                "password2": "cdpyHEKZ0KiJmlR",
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotEqual(
+            CustomUser.objects.get(email=self.user.email).id, self.user.id
+        )
+
     def test_not_logged_in(self):
         response = self.client.delete(self.url)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -1,7 +1,11 @@
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
+from unittest.mock import patch
+import zxcvbn
 
 from users.models import CustomUser
 from users.password_validation import ZxcvbnValidator
@@ -14,6 +18,9 @@ class TestPasswordZxcvbnValidator(APITestCase):
     def setUpTestData(cls):
         cls.validator = ZxcvbnValidator()
 
+    def setUp(self):
+        cache.clear()
+
     def test_custom_validate(self):
         # Test password only
         valid, score, suggestions = self.validator.custom_validate("L@huL,URDD*V7^jG")
@@ -81,6 +88,38 @@ class TestPasswordZxcvbnValidator(APITestCase):
         ):
             self.validator.validate("testThis")
 
+    def test_max_length(self):
+        # Only the beginning of long passwords is evaluated
+        validator = ZxcvbnValidator(max_length=8)
+        with patch("zxcvbn.zxcvbn", wraps=zxcvbn.zxcvbn) as zxcvbn_mock:
+            validator.custom_validate("L@huL,URDD*V7^jG")
+        self.assertEqual(zxcvbn_mock.call_args.args[0], "L@huL,UR")
+
+    def test_cached(self):
+        with patch("zxcvbn.zxcvbn", wraps=zxcvbn.zxcvbn) as zxcvbn_mock:
+            result = self.validator.custom_validate("testThis", "test@test.at")
+            self.assertEqual(
+                self.validator.custom_validate("testThis", "test@test.at"), result
+            )
+            self.assertEqual(zxcvbn_mock.call_count, 1)
+
+            # Different inputs aren't taken from the cache
+            self.validator.custom_validate("testThis", "other@test.at")
+            self.validator.custom_validate("testThis", tokens=["this"])
+            self.validator.custom_validate("testThat", "test@test.at")
+            self.assertEqual(zxcvbn_mock.call_count, 4)
+
+        # The password isn't stored in the cache key
+        for key in cache._cache:
+            self.assertNotIn("testThis", key)
+
+    def test_processes(self):
+        validator = ZxcvbnValidator(processes=1)
+        self.assertTupleEqual(
+            validator.custom_validate("testThis"),
+            (False, 1, ["Add another word or two. Uncommon words are better."]),
+        )
+
     def test_split_name(self):
         # Test tokenizing of names
         tokens = self.validator.split_name("First-Second Third")
@@ -94,6 +133,10 @@ class TestPasswordValidation(APITestCase):
     def setUpTestData(cls):
         cls.url = reverse("account_password_validate")
 
+    def setUp(self):
+        # The throttle state is stored in the cache
+        cache.clear()
+
     def test_good_password(self):
         # Test a good password with and without email. The password doesn't
         #  contain any part of the email address.
@@ -167,6 +210,23 @@ class TestPasswordValidation(APITestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    @override_settings(PASSWORD_VALIDATION_THROTTLE_RATE="2/m")
+    def test_throttled(self):
+        for _ in range(2):
+            response = self.client.post(self.url, {"password": "cdpyHEKZ0KiJmlR"})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.post(self.url, {"password": "cdpyHEKZ0KiJmlR"})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # Other sessions aren't throttled
+        user = CustomUser.objects.create_user(
+            username="test", email="test@thga.at", password="test"
+        )
+        self.client.force_login(user)
+        response = self.client.post(self.url, {"password": "cdpyHEKZ0KiJmlR"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_get(self):
         response = self.client.get(self.url, {"password": "cdpyHEKZ0KiJmlR"})
         self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
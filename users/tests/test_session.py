@@ -1,5 +1,6 @@
 import datetime
 
+from django.core.cache import cache
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -19,6 +20,8 @@ class TestSession(APITestCase):
         cls.email = "test2@test.at"
 
     def setUp(self):
+        cache.clear()
+
         if not self.id().endswith("_not_logged_in"):
             self.client.login(username=self.email, password="test")
 
@@ -48,6 +51,33 @@ class TestSession(APITestCase):
             {"isAuthenticated": True, "hasBetaAccess": True, "email": self.email},
         )
 
+    def test_activity_granularity(self):
+        # The activity is only recorded once per granularity interval.
+        mock_datetime = datetime.datetime.strptime(
+            "2022-02-02T22:53+0000", "%Y-%m-%dT%H:%M%z"
+        )
+        for minutes, expected in [(0, 0), (5, 0), (20, 20)]:
+            with self.subTest(minutes=minutes):
+                cache.clear()
+                with patch(
+                    "django.utils.timezone.now",
+                    return_value=mock_datetime + datetime.timedelta(minutes=minutes),
+                ):
+                    response = self.client.post(self.url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(
+                    CustomUser.objects.get(email=self.email).last_activity,
+                    mock_datetime + datetime.timedelta(minutes=expected),
+                )
+
+    def test_number_of_queries(self):
+        # The session and the user are loaded once by the authentication and
+        #  the activity and the user visit aren't written again.
+        self.client.post(self.url)
+        with self.assertNumQueries(2):
+            response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_not_logged_in(self):
         response = self.client.post(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
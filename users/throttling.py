@@ -0,0 +1,24 @@
+from django.conf import settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SessionRateThrottle(SimpleRateThrottle):
+    """
+    Limit the rate of requests per session, or per IP address for requests
+    without a session.
+    """
+
+    scope = "session"
+
+    def get_rate(self) -> str:
+        # Read from the application config, so it can be changed in tests
+        return getattr(settings, f"{self.scope.upper()}_THROTTLE_RATE")
+
+    def get_cache_key(self, request, view) -> str:
+        ident = request.session.session_key or self.get_ident(request)
+
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+class PasswordValidationRateThrottle(SessionRateThrottle):
+    scope = "password_validation"
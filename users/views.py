@@ -3,7 +3,7 @@ from allauth.account.signals import user_signed_up
 from allauth.account.utils import url_str_to_user_pk
 from dj_rest_auth.registration.views import VerifyEmailView
 from django.conf import settings
-from django.contrib.auth import user_logged_in, login
+from django.contrib.auth import user_logged_in, login, logout
 from django.core.mail import send_mail
 from django.dispatch import receiver
 from django.shortcuts import redirect
@@ -22,6 +22,8 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 
 from .models import CustomUser
+from .services import record_activity
+from .throttling import PasswordValidationRateThrottle
 from .serializers import (
     ContactFormSerializer,
     PasswordValidationSerializer,
@@ -31,6 +33,8 @@ from .serializers import (
 
 class PasswordValidationView(GenericAPIView):
     serializer_class = PasswordValidationSerializer
+    # The frontend validates the password while the user types
+    throttle_classes = [PasswordValidationRateThrottle]
 
     @sensitive_post_parameters_m
     def dispatch(self, request, *args, **kwargs):
@@ -102,8 +106,9 @@ def session_view(request):
     if not request.user.is_authenticated:
         return Response({"isAuthenticated": False})
 
-    user = CustomUser.objects.get(id=request.user.id)
-    user.save(update_fields=["last_activity"])
+    # The user has already been loaded by the authentication.
+    user = request.user
+    record_activity(user)
     return Response(
         {
             "isAuthenticated": True,
@@ -159,6 +164,12 @@ class DeleteView(DestroyAPIView, GenericAPIView):
     def get_object(self):
         return self.request.user
 
+    def perform_destroy(self, instance):
+        # Deleting all data of a user takes a while, so it is done in the
+        #  background.
+        instance.soft_delete()
+        logout(self.request)
+
 
 class LocaleView(RetrieveAPIView, GenericAPIView):
     serializer_class = LocaleSerializer
@@ -179,7 +190,7 @@ class LocaleView(RetrieveAPIView, GenericAPIView):
         max_age = None
         if request.user.is_authenticated:
             request.user.locale = locale
-            request.user.save()
+            request.user.save(update_fields=["locale"])
 
             if not request.session.get_expire_at_browser_close():
                 max_age = request.session.get_expiry_age()
@@ -198,4 +209,4 @@ def set_locale(request: Request, user: CustomUser, **kwargs) -> None:
     locale = request.COOKIES.get(settings.LANGUAGE_COOKIE_NAME)
     if locale:
         user.locale = locale
-        user.save()
+        user.save(update_fields=["locale"])